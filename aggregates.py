@@ -0,0 +1,123 @@
+from flight_status import STATUSES
+
+# Per-destination and per-pilot totals are kept in DestinationStats and PilotStats
+# by triggers on Flight (see migrations.py), so the summary reports read one row
+# per destination or pilot instead of grouping the whole Flight table.
+# Flights without a pilot are counted under PilotID 0.
+
+STATS_TABLES = {
+    "DestinationStats": ("DestinationID", "DestinationID"),
+    "PilotStats": ("PilotID", "IFNULL(PilotID, 0)"),
+}
+
+STATS_COLUMNS = ("FlightCount", "TotalDistance") + STATUSES
+
+
+def _live_select(key_expression):
+    status_counts = ", ".join(f"SUM(FlightStatus = '{status}')" for status in STATUSES)
+    return f"""
+        SELECT {key_expression}, COUNT(*), SUM(Distance), {status_counts}
+        FROM Flight
+        GROUP BY {key_expression}
+    """
+
+
+# table -> the totals it should hold, aggregated from Flight; and the totals it holds.
+LIVE_STATS_SQL = {table: _live_select(key_expression) for table, (_, key_expression) in STATS_TABLES.items()}
+
+STORED_STATS_SQL = {
+    table: f"SELECT {key}, {', '.join(STATS_COLUMNS)} FROM {table} WHERE FlightCount > 0"
+    for table, (key, _) in STATS_TABLES.items()
+}
+
+
+def stats_table_sql(table, key):
+    columns = ",\n            ".join(f"{column} INTEGER NOT NULL DEFAULT 0" for column in STATS_COLUMNS)
+    return f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            {key} INTEGER PRIMARY KEY,
+            {columns}
+        )
+    """
+
+
+def _add_row_sql(table, key, row):
+    """Statement adding one flight row (NEW or OLD) to a stats table."""
+    key_value = f"IFNULL({row}.{key}, 0)" if key == "PilotID" else f"{row}.{key}"
+    status_values = ", ".join(f"{row}.FlightStatus = '{status}'" for status in STATUSES)
+    status_updates = ", ".join(f"{status} = {status} + excluded.{status}" for status in STATUSES)
+    return f"""
+        INSERT INTO {table} ({key}, {", ".join(STATS_COLUMNS)})
+        VALUES ({key_value}, 1, {row}.Distance, {status_values})
+        ON CONFLICT ({key}) DO UPDATE SET
+            FlightCount = FlightCount + 1,
+            TotalDistance = TotalDistance + excluded.TotalDistance,
+            {status_updates};
+    """
+
+
+def _remove_row_sql(table, key, row):
+    """Statement taking one flight row (NEW or OLD) back out of a stats table."""
+    key_value = f"IFNULL({row}.{key}, 0)" if key == "PilotID" else f"{row}.{key}"
+    status_updates = ", ".join(f"{status} = {status} - ({row}.FlightStatus = '{status}')" for status in STATUSES)
+    return f"""
+        UPDATE {table} SET
+            FlightCount = FlightCount - 1,
+            TotalDistance = TotalDistance - {row}.Distance,
+            {status_updates}
+        WHERE {key} = {key_value};
+    """
+
+
+def trigger_sql():
+    """Returns the CREATE TRIGGER statements that keep the stats tables current."""
+    add_new = "".join(_add_row_sql(table, key, "NEW") for table, (key, _) in STATS_TABLES.items())
+    remove_old = "".join(_remove_row_sql(table, key, "OLD") for table, (key, _) in STATS_TABLES.items())
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_flight_stats_insert AFTER INSERT ON Flight BEGIN {add_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_flight_stats_delete AFTER DELETE ON Flight BEGIN {remove_old} END",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_flight_stats_update
+            AFTER UPDATE OF PilotID, DestinationID, FlightStatus, Distance ON Flight
+            BEGIN {remove_old} {add_new} END""",
+    ]
+
+
+def create_aggregates(cursor):
+    """Creates the stats tables and their triggers, then fills them from Flight."""
+    for table, (key, _) in STATS_TABLES.items():
+        cursor.execute(stats_table_sql(table, key))
+    for statement in trigger_sql():
+        cursor.execute(statement)
+    _rebuild(cursor)
+
+
+def _rebuild(cursor):
+    for table, (key, _) in STATS_TABLES.items():
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.execute(f"INSERT INTO {table} ({key}, {', '.join(STATS_COLUMNS)}) {LIVE_STATS_SQL[table]}")
+
+
+def rebuild_aggregates(conn):
+    """Recomputes both stats tables from a full aggregate over Flight."""
+    try:
+        _rebuild(conn.cursor())
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def check_aggregates(conn):
+    """Compares the stats tables to a live aggregate over Flight.
+
+    Returns a list of (table, key, stored, live) tuples for every key whose stored
+    totals differ; an empty list means the tables are consistent.
+    """
+    mismatches = []
+    for table in STATS_TABLES:
+        stored = {row[0]: row[1:] for row in conn.execute(STORED_STATS_SQL[table])}
+        live = {row[0]: row[1:] for row in conn.execute(LIVE_STATS_SQL[table])}
+        for key_value in sorted(stored.keys() | live.keys()):
+            if stored.get(key_value) != live.get(key_value):
+                mismatches.append((table, key_value, stored.get(key_value), live.get(key_value)))
+    return mismatches
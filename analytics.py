@@ -0,0 +1,335 @@
+import json
+import os
+from datetime import date, timedelta
+
+import changelog
+import queries
+from changelog import database_file
+from flight_status import STATUSES
+
+# NumPy is optional and slow to import, so it is only loaded when a FlightAnalytics
+# is created; the rest of the system (including migrations) runs without it.
+np = None
+
+
+def _import_numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise RuntimeError("Analytics needs NumPy; install it with 'pip install numpy'.")
+        np = numpy
+
+
+def _columns_select(f):
+    """Flight columns as integers, so fetched batches convert straight into one NumPy array."""
+    status_code = " ".join(f"WHEN '{status}' THEN {code}" for code, status in enumerate(STATUSES))
+    return f"""
+        {f}FlightID, IFNULL({f}PilotID, 0), {f}OriginID, {f}DestinationID,
+        CASE {f}FlightStatus {status_code} ELSE -1 END, {f}Distance,
+        CAST(julianday({f}DepartureDate) - 2440587.5 AS INTEGER)
+    """
+
+
+FLIGHT_COLUMNS_SQL = f"SELECT {_columns_select('')} FROM Flight ORDER BY FlightID"
+
+# Current columns of the flights whose IDs fill the IN list; missing IDs were deleted.
+CHANGED_FLIGHTS_SQL = f"SELECT {_columns_select('')} FROM Flight WHERE FlightID IN ({{}})"
+
+DESTINATION_NAMES_SQL = "SELECT DestinationID, City, AirportCode FROM Destination"
+
+PILOT_NAMES_SQL = "SELECT PilotID, FirstName || ' ' || LastName FROM Pilot"
+
+# (name, dtype) of each cached column, in FLIGHT_COLUMNS_SQL order. pilot_id is 0
+# for unassigned flights, status indexes STATUSES and departure_day counts days
+# since 1970-01-01.
+COLUMNS = (
+    ("flight_id", "int64"),
+    ("pilot_id", "int32"),
+    ("origin_id", "int32"),
+    ("destination_id", "int32"),
+    ("status", "int8"),
+    ("distance", "int32"),
+    ("departure_day", "int32"),
+)
+
+LOAD_BATCH_SIZE = 100000
+
+# Flight IDs per IN (...) lookup when re-reading changed flights.
+LOOKUP_CHUNK = 500
+
+# Past this share of changed rows a full reload is cheaper than patching.
+FULL_RELOAD_RATIO = 0.25
+
+DEFAULT_PERCENTILES = (50, 75, 90, 95, 99)
+
+EPOCH_DAY = date(1970, 1, 1)
+
+
+class RouteStat(queries.Record):
+    __slots__ = ("origin", "destination", "flights", "total_distance")
+
+
+class DayVolume(queries.Record):
+    __slots__ = ("day", "flights")
+
+
+def _to_columns(rows):
+    data = np.array(rows, dtype=np.int64).reshape(-1, len(COLUMNS))
+    return {name: data[:, i].astype(dtype) for i, (name, dtype) in enumerate(COLUMNS)}
+
+
+def _empty_columns():
+    return {name: np.zeros(0, dtype=dtype) for name, dtype in COLUMNS}
+
+
+class FlightAnalytics:
+    """Vectorized flight reports over compact NumPy copies of the Flight columns.
+
+    The columns are cached as .npy files in cache_dir (memory-mapped on load) and
+    patched from changelog.ChangeLog before each report, so only flights changed since
+    the last load are read back from SQLite. cache_dir defaults to
+    '<database>.analytics'; False keeps the columns in memory only. The existing
+    reports return the same records as their queries.py counterparts.
+    """
+
+    def __init__(self, conn, cache_dir=None):
+        _import_numpy()
+        self.conn = conn
+        self.db_file = database_file(conn)
+        if cache_dir is None and self.db_file:
+            cache_dir = f"{os.path.splitext(self.db_file)[0]}.analytics"
+        self.cache_dir = cache_dir or None
+        self.columns = None
+        self.change_seq = None
+        self.full_loads = 0
+        self.rows_patched = 0
+
+    # ---- Loading ----
+
+    def refresh(self):
+        """Brings the columns up to date; returns the number of flights re-read."""
+        if self.columns is None:
+            self._load_cache()
+        # Read the sequence first: a change that lands while we load is simply
+        # picked up again on the next refresh.
+        latest = changelog.current_seq(self.conn)
+        if self.columns is None or latest < self.change_seq:
+            return self._full_load(latest)
+        if latest == self.change_seq:
+            return 0
+        try:
+            keys, latest = changelog.changed_keys(self.conn, self.change_seq, ["Flight"])
+        except changelog.ChangeLogGap:
+            return self._full_load(changelog.current_seq(self.conn))
+        changed = sorted(keys.get("Flight", ()))
+        if len(changed) > FULL_RELOAD_RATIO * max(len(self.columns["flight_id"]), 1):
+            return self._full_load(latest)
+        current = []
+        for start in range(0, len(changed), LOOKUP_CHUNK):
+            chunk = changed[start:start + LOOKUP_CHUNK]
+            current += self.conn.execute(CHANGED_FLIGHTS_SQL.format(", ".join("?" * len(chunk))), chunk).fetchall()
+        self._patch(changed, current)
+        self.change_seq = latest
+        self.rows_patched += len(changed)
+        if changed:
+            self._save_cache()
+        return len(changed)
+
+    def _full_load(self, latest):
+        cursor = self.conn.execute(FLIGHT_COLUMNS_SQL)
+        parts = []
+        while True:
+            rows = cursor.fetchmany(LOAD_BATCH_SIZE)
+            if not rows:
+                break
+            parts.append(_to_columns(rows))
+        self.columns = {name: np.concatenate([part[name] for part in parts]) if parts
+                        else np.zeros(0, dtype=dtype) for name, dtype in COLUMNS}
+        self.change_seq = latest
+        self.full_loads += 1
+        self._save_cache()
+        return len(self.columns["flight_id"])
+
+    def _patch(self, changed, current):
+        """Drops every changed flight, then inserts the current version of those that still exist."""
+        ids = self.columns["flight_id"]
+        keep = ~np.isin(ids, np.array(changed, dtype=np.int64))
+        current = sorted(current)
+        fresh = _to_columns(current) if current else _empty_columns()
+        kept_ids = ids[keep]
+        positions = np.searchsorted(kept_ids, fresh["flight_id"])
+        self.columns = {name: np.insert(self.columns[name][keep], positions, fresh[name])
+                        for name, _ in COLUMNS}
+
+    def _load_cache(self):
+        if not self.cache_dir:
+            return
+        try:
+            with open(os.path.join(self.cache_dir, "meta.json"), encoding="utf-8") as handle:
+                meta = json.load(handle)
+            # A cache written for a replaced database file must not be patched.
+            if ([list(column) for column in COLUMNS] != meta["columns"] or meta["inode"] != self._inode()
+                    or meta.get("feed") != "ChangeLog"):
+                return
+            self.columns = {name: np.load(os.path.join(self.cache_dir, f"{name}.npy"), mmap_mode="r")
+                            for name, _ in COLUMNS}
+            self.change_seq = meta["change_seq"]
+        except (OSError, ValueError, KeyError):
+            self.columns = None
+
+    def _save_cache(self):
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write to temporary files and rename, so arrays another reader has
+        # memory-mapped are never truncated under it.
+        for name, _ in COLUMNS:
+            temporary = os.path.join(self.cache_dir, f"{name}.tmp.npy")
+            np.save(temporary, self.columns[name])
+            os.replace(temporary, os.path.join(self.cache_dir, f"{name}.npy"))
+        temporary = os.path.join(self.cache_dir, "meta.json.tmp")
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump({"change_seq": self.change_seq, "feed": "ChangeLog", "inode": self._inode(),
+                       "rows": len(self.columns["flight_id"]),
+                       "columns": [list(column) for column in COLUMNS]}, handle)
+        os.replace(temporary, os.path.join(self.cache_dir, "meta.json"))
+
+    def _inode(self):
+        return os.stat(self.db_file).st_ino if self.db_file else None
+
+    # ---- Group-by helpers ----
+
+    def _current(self):
+        self.refresh()
+        return self.columns
+
+    def _destination_groups(self):
+        """Returns (city names, destination ID -> city index with -1 for unknown IDs)."""
+        destinations = self.conn.execute(DESTINATION_NAMES_SQL).fetchall()
+        cities = sorted({city for _, city, _ in destinations})
+        city_index = {city: i for i, city in enumerate(cities)}
+        size = max([destination_id for destination_id, _, _ in destinations] + [0]) + 1
+        lookup = np.full(size, -1, dtype=np.int64)
+        for destination_id, city, _ in destinations:
+            lookup[destination_id] = city_index[city]
+        return cities, lookup
+
+    def _by_city(self, weight=None):
+        """Returns (cities, flights per city, summed weight column per city)."""
+        columns = self._current()
+        weights = columns[weight] if weight else None
+        cities, lookup = self._destination_groups()
+        destination = columns["destination_id"]
+        codes = np.where(destination < len(lookup), lookup[np.minimum(destination, len(lookup) - 1)], -1)
+        known = codes >= 0
+        counts = np.bincount(codes[known], minlength=len(cities))
+        totals = (np.bincount(codes[known], weights=weights[known], minlength=len(cities))
+                  if weights is not None else None)
+        return cities, counts, totals
+
+    def _by_pilot(self, weight=None):
+        """Returns (pilot IDs with flights, flights, summed weight column) per pilot, 0 = unassigned."""
+        columns = self._current()
+        pilot = columns["pilot_id"]
+        weights = columns[weight] if weight else None
+        counts = np.bincount(pilot)
+        totals = np.bincount(pilot, weights=weights) if weights is not None else None
+        present = np.nonzero(counts)[0]
+        return present, counts[present], totals[present] if totals is not None else None
+
+    def _pilot_names(self):
+        return dict(self.conn.execute(PILOT_NAMES_SQL))
+
+    @staticmethod
+    def _ranked(records):
+        return sorted(records, key=lambda record: record[1], reverse=True)
+
+    # ---- Existing reports ----
+
+    def flight_count_by_destination(self):
+        """Returns CityStat records of flight counts per destination city."""
+        cities, counts, _ = self._by_city()
+        return self._ranked(queries.CityStat(city, int(count)) for city, count in zip(cities, counts) if count)
+
+    def flight_summary(self):
+        """Returns CityStat records of total flights per destination city."""
+        return self.flight_count_by_destination()
+
+    def average_distance_by_destination(self):
+        """Returns CityStat records of average distance (km) per destination city."""
+        cities, counts, totals = self._by_city("distance")
+        return self._ranked(queries.CityStat(city, round(float(total) / int(count), 2))
+                            for city, count, total in zip(cities, counts, totals) if count)
+
+    def flights_per_pilot(self):
+        """Returns PilotStat records of flight counts per pilot ('Unassigned' for none)."""
+        names = self._pilot_names()
+        pilot_ids, counts, _ = self._by_pilot()
+        return self._ranked(queries.PilotStat(names.get(int(pilot_id), "Unassigned"), int(count))
+                            for pilot_id, count in zip(pilot_ids, counts))
+
+    def total_distance_by_pilot(self):
+        """Returns PilotStat records of total distance (km) per pilot."""
+        names = self._pilot_names()
+        pilot_ids, _, totals = self._by_pilot("distance")
+        return self._ranked(queries.PilotStat(names.get(int(pilot_id), "Unassigned"), int(total))
+                            for pilot_id, total in zip(pilot_ids, totals))
+
+    # ---- Distributions and routes ----
+
+    def _filtered(self, status=None):
+        columns = self._current()
+        if status is None:
+            return columns
+        mask = columns["status"] == STATUSES.index(status)
+        return {name: values[mask] for name, values in columns.items()}
+
+    def distance_percentiles(self, percentiles=DEFAULT_PERCENTILES, status=None):
+        """Returns [(percentile, distance km)] over all flights, or those with a status."""
+        distance = self._filtered(status)["distance"]
+        if not len(distance):
+            return []
+        values = np.percentile(distance, percentiles)
+        return [(percentile, round(float(value), 1)) for percentile, value in zip(percentiles, values)]
+
+    def distance_histogram(self, bins=20, status=None):
+        """Returns (counts, bin edges) of flight distances."""
+        counts, edges = np.histogram(self._filtered(status)["distance"], bins=bins)
+        return counts.tolist(), edges.tolist()
+
+    def route_matrix(self, value="flights", status=None):
+        """Returns (airport IDs, matrix) where matrix[i, j] is the number of flights
+        (or total distance, value="distance") from airport i to airport j.
+        """
+        columns = self._filtered(status)
+        airports, codes = np.unique(np.concatenate([columns["origin_id"], columns["destination_id"]]),
+                                    return_inverse=True)
+        size = len(airports)
+        pairs = codes[:len(codes) // 2] * size + codes[len(codes) // 2:]
+        weights = columns["distance"] if value == "distance" else None
+        matrix = np.bincount(pairs, weights=weights, minlength=size * size).reshape(size, size)
+        return airports, matrix.astype(np.int64)
+
+    def busiest_routes(self, limit=10, status=None):
+        """Returns RouteStat records for the routes with the most flights."""
+        columns = self._filtered(status)
+        stride = int(columns["destination_id"].max(initial=0)) + 1
+        pairs = columns["origin_id"].astype(np.int64) * stride + columns["destination_id"]
+        routes, inverse, counts = np.unique(pairs, return_inverse=True, return_counts=True)
+        totals = np.bincount(inverse.ravel(), weights=columns["distance"], minlength=len(routes))
+        top = np.argsort(-counts, kind="stable")[:limit]
+        codes = {destination_id: code for destination_id, _, code in self.conn.execute(DESTINATION_NAMES_SQL)}
+        return [RouteStat(codes.get(int(routes[i] // stride)), codes.get(int(routes[i] % stride)),
+                          int(counts[i]), int(totals[i])) for i in top]
+
+    def daily_volumes(self, status=None):
+        """Returns a DayVolume record for every departure day from the first to the last."""
+        day = self._filtered(status)["departure_day"]
+        if not len(day):
+            return []
+        first = int(day.min())
+        counts = np.bincount(day - first)
+        return [DayVolume((EPOCH_DAY + timedelta(days=first + offset)).isoformat(), int(count))
+                for offset, count in enumerate(counts)]
@@ -0,0 +1,259 @@
+from bisect import bisect_left
+from datetime import datetime
+from itertools import accumulate
+from operator import itemgetter
+
+import queries
+
+EPOCH = datetime(1970, 1, 1)
+
+# Keeps each IN (...) lookup well under SQLite's bound-parameter limit.
+LOOKUP_CHUNK = 500
+
+# Flights a pilot's timeline checks one by one before sorting them in.
+MAX_PENDING = 32
+
+_FLIGHT_TIMES = """
+    SELECT FlightID, PilotID, DepartureDate, DepartureTime, ArrivalDate, ArrivalTime,
+           FlightStatus, AircraftCode, DepartureUTC, ArrivalUTC
+    FROM Flight
+"""
+
+FLIGHT_TIMES_SQL = _FLIGHT_TIMES + " WHERE FlightID IN ({})"
+
+PILOT_FLIGHTS_SQL = _FLIGHT_TIMES + " WHERE PilotID IS NOT NULL AND FlightStatus != 'Cancelled'"
+
+PILOT_FLIGHTS_OF_SQL = PILOT_FLIGHTS_SQL + " AND PilotID IN ({})"
+
+PILOT_QUALIFICATIONS_SQL = """
+    SELECT PilotID, LicenseExpiry, CertifiedAircraftCode, CertificationExpiry
+    FROM Pilot
+    WHERE PilotID IN ({})
+"""
+
+
+def to_minutes(day, clock):
+    """Converts a 'YYYY-MM-DD' date and 'HH:MM' time to minutes since 1970-01-01."""
+    return int((datetime.fromisoformat(f"{day}T{clock}") - EPOCH).total_seconds()) // 60
+
+
+def flight_minutes(day, clock, utc):
+    """Minutes since 1970 UTC from a flight's UTC epoch column, falling back to its
+    local date and time when the airport's time zone is unknown.
+    """
+    return utc // 60 if utc is not None else to_minutes(day, clock)
+
+
+class AssignmentCheck(queries.Record):
+    __slots__ = ("flight_id", "pilot_id", "ok", "reasons")
+
+
+class _Timeline:
+    """One pilot's flights as [start, end) minute intervals.
+
+    Most of them are stored sorted by start, where max_end[i] is the latest end
+    among the first i + 1, which lets an overlap query finish with one binary search
+    even if the stored intervals themselves overlap. Flights added or removed since
+    the last settle() are kept aside and checked one by one; settle() sorts them in
+    and rebuilds max_end once, instead of shifting the arrays on every change.
+    """
+    __slots__ = ("starts", "ends", "flight_ids", "max_end", "pending", "removed")
+
+    def __init__(self, intervals=()):
+        self._build(sorted(intervals, key=itemgetter(0)))
+
+    def _build(self, intervals):
+        """Stores (start, end, flight_id) intervals that are already sorted by start."""
+        self.starts = [start for start, _, _ in intervals]
+        self.ends = [end for _, end, _ in intervals]
+        self.flight_ids = [flight_id for _, _, flight_id in intervals]
+        self.max_end = list(accumulate(self.ends, max))
+        self.pending = []
+        self.removed = set()
+
+    def add(self, start, end, flight_id):
+        self.pending.append((start, end, flight_id))
+        if len(self.pending) > MAX_PENDING:
+            self.settle()
+
+    def remove(self, flight_id):
+        for position, (_, _, pending_id) in enumerate(self.pending):
+            if pending_id == flight_id:
+                del self.pending[position]
+                return True
+        if flight_id in self.removed or flight_id not in self.flight_ids:
+            return False
+        self.removed.add(flight_id)
+        return True
+
+    def settle(self):
+        if not self.pending and not self.removed:
+            return
+        stored = [interval for interval in zip(self.starts, self.ends, self.flight_ids)
+                  if interval[2] not in self.removed]
+        # Both runs are sorted, so this is a merge rather than a full sort.
+        self._build(sorted(stored + sorted(self.pending, key=itemgetter(0)), key=itemgetter(0)))
+
+    def _overlapping(self, start, end):
+        """Yields the (start, flight_id) of every interval overlapping [start, end)."""
+        # Only stored intervals that start before `end` can overlap [start, end).
+        count = bisect_left(self.starts, end)
+        if count and self.max_end[count - 1] > start:
+            for i in range(count):
+                if self.ends[i] > start and self.flight_ids[i] not in self.removed:
+                    yield self.starts[i], self.flight_ids[i]
+        for pending_start, pending_end, flight_id in self.pending:
+            if pending_start < end and pending_end > start:
+                yield pending_start, flight_id
+
+    def is_free(self, start, end):
+        return next(self._overlapping(start, end), None) is None
+
+    def conflicts(self, start, end):
+        """Returns the flight IDs overlapping [start, end), in start order."""
+        return [flight_id for _, flight_id in sorted(self._overlapping(start, end), key=itemgetter(0))]
+
+    def intervals(self):
+        self.settle()
+        return list(zip(self.starts, self.ends, self.flight_ids))
+
+
+class PilotIntervalIndex:
+    """Per-pilot interval index over assigned, non-cancelled flights.
+
+    is_free answers "is this pilot free for [start, end)?" in O(log n) for the
+    pilot's n flights, plus the flights added or removed since the last settle().
+    """
+
+    def __init__(self):
+        self._timelines = {}
+
+    @classmethod
+    def from_db(cls, conn, pilot_ids=None):
+        """Builds the index from the Flight table, for every pilot or only pilot_ids.
+        Each pilot's flights are sorted once.
+        """
+        if pilot_ids is None:
+            rows = conn.execute(PILOT_FLIGHTS_SQL)
+        else:
+            rows = _chunked(conn, PILOT_FLIGHTS_OF_SQL, list(pilot_ids))
+        intervals = {}
+        for flight_id, pilot_id, dep_date, dep_time, arr_date, arr_time, _, _, dep_utc, arr_utc in rows:
+            intervals.setdefault(pilot_id, []).append((flight_minutes(dep_date, dep_time, dep_utc),
+                                                       flight_minutes(arr_date, arr_time, arr_utc), flight_id))
+        index = cls()
+        index._timelines = {pilot_id: _Timeline(flights) for pilot_id, flights in intervals.items()}
+        return index
+
+    def add(self, pilot_id, start, end, flight_id):
+        timeline = self._timelines.get(pilot_id)
+        if timeline is None:
+            timeline = self._timelines[pilot_id] = _Timeline()
+        timeline.add(start, end, flight_id)
+
+    def remove(self, pilot_id, flight_id):
+        timeline = self._timelines.get(pilot_id)
+        return timeline.remove(flight_id) if timeline else False
+
+    def settle(self):
+        """Sorts the flights added or removed since the last call into every timeline."""
+        for timeline in self._timelines.values():
+            timeline.settle()
+
+    def is_free(self, pilot_id, start, end):
+        timeline = self._timelines.get(pilot_id)
+        return timeline is None or timeline.is_free(start, end)
+
+    def conflicts(self, pilot_id, start, end):
+        timeline = self._timelines.get(pilot_id)
+        return timeline.conflicts(start, end) if timeline else []
+
+    def flights(self, pilot_id):
+        """Returns the pilot's (start, end, flight_id) intervals in start order."""
+        timeline = self._timelines.get(pilot_id)
+        return timeline.intervals() if timeline else []
+
+
+def _chunked(conn, sql, keys):
+    for start in range(0, len(keys), LOOKUP_CHUNK):
+        chunk = keys[start:start + LOOKUP_CHUNK]
+        yield from conn.execute(sql.format(", ".join("?" * len(chunk))), chunk)
+
+
+def _qualification_problems(pilot, flight):
+    """Returns reasons why a pilot may not fly a flight, ignoring the schedule."""
+    _, license_expiry, certified_aircraft, certification_expiry = pilot
+    arr_date, status, aircraft_code = flight[4], flight[6], flight[7]
+    reasons = []
+    if status in ("Cancelled", "Completed"):
+        reasons.append(f"flight is {status}")
+    if str(license_expiry) < arr_date:
+        reasons.append(f"license expires {license_expiry}")
+    if str(certification_expiry) < arr_date:
+        reasons.append(f"certification expires {certification_expiry}")
+    if aircraft_code and certified_aircraft and aircraft_code.upper() != certified_aircraft.upper():
+        reasons.append(f"certified for {certified_aircraft}, flight uses {aircraft_code}")
+    return reasons
+
+
+def validate_roster(conn, assignments, index=None):
+    """Checks a whole roster of (flight_id, pilot_id) assignments in one pass.
+
+    Flights and pilots are loaded with a few chunked queries, and the pilots'
+    current schedules go into a PilotIntervalIndex (or the one given). Assignments
+    are checked in order; each accepted one is added to the index and taken off the
+    flight's previous pilot, so conflicts inside the roster are caught too; the
+    index is settled once at the end. Returns one AssignmentCheck per assignment.
+    Nothing is written.
+    """
+    assignments = [(int(flight_id), int(pilot_id)) for flight_id, pilot_id in assignments]
+    flights = {row[0]: row for row in _chunked(
+        conn, FLIGHT_TIMES_SQL, list({f for f, _ in assignments}))}
+    pilots = {row[0]: row for row in _chunked(
+        conn, PILOT_QUALIFICATIONS_SQL, list({p for _, p in assignments}))}
+    if index is None:
+        index = PilotIntervalIndex.from_db(conn, pilots)
+    current_pilot = {flight_id: flight[1] for flight_id, flight in flights.items()}
+
+    results = []
+    for flight_id, pilot_id in assignments:
+        flight, pilot = flights.get(flight_id), pilots.get(pilot_id)
+        if flight is None or pilot is None:
+            reason = "no such flight" if flight is None else "no such pilot"
+            results.append(AssignmentCheck(flight_id, pilot_id, False, [reason]))
+            continue
+        if current_pilot.get(flight_id) == pilot_id:
+            results.append(AssignmentCheck(flight_id, pilot_id, True, []))
+            continue
+
+        reasons = _qualification_problems(pilot, flight)
+        start = flight_minutes(flight[2], flight[3], flight[8])
+        end = flight_minutes(flight[4], flight[5], flight[9])
+        if not index.is_free(pilot_id, start, end):
+            clashes = index.conflicts(pilot_id, start, end)
+            reasons.append("overlaps flight " + ", ".join(str(clash) for clash in clashes))
+        if not reasons:
+            previous = current_pilot.get(flight_id)
+            if previous is not None:
+                index.remove(previous, flight_id)
+            index.add(pilot_id, start, end, flight_id)
+            current_pilot[flight_id] = pilot_id
+        results.append(AssignmentCheck(flight_id, pilot_id, not reasons, reasons))
+    index.settle()
+    return results
+
+
+def validate_assignment(conn, flight_id, pilot_id):
+    """Checks a single assignment; see validate_roster."""
+    return validate_roster(conn, [(flight_id, pilot_id)])[0]
+
+
+def assign_pilot(conn, flight_id, pilot_id):
+    """Assigns a pilot to a flight after validate_assignment's checks. Returns the
+    number of rows changed and raises ValueError with the reasons when the pilot
+    cannot fly it.
+    """
+    check = validate_assignment(conn, flight_id, pilot_id)
+    if not check.ok:
+        raise ValueError("Pilot cannot be assigned: " + "; ".join(check.reasons))
+    return queries.assign_pilot(conn, flight_id, pilot_id)
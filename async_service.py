@@ -0,0 +1,110 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import queries
+from assignments import assign_pilot
+from flight_status import update_status, update_statuses
+from pool import ConnectionPool
+
+DEFAULT_MAX_WORKERS = 4
+
+
+class AsyncFlightService:
+    """asyncio counterpart of the flight operations.
+
+    SQLite work runs on a bounded thread pool through a ConnectionPool, so the
+    event loop is never blocked. Identical reads that are already running are
+    coalesced: later callers await the same execution instead of starting another.
+    Writes are never coalesced. Results are always fully fetched lists or records.
+    """
+
+    def __init__(self, db_path=None, profile=None, max_workers=DEFAULT_MAX_WORKERS):
+        self.pool = ConnectionPool(db_path, profile)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="flight-db")
+        self._in_flight = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    async def _read(self, name, *args):
+        key = (name, args)
+        future = self._in_flight.get(key)
+        if future is None:
+            self.executions += 1
+            future = asyncio.ensure_future(self._run(self.pool.read, getattr(queries, name), *args))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        # shield() so one caller being cancelled doesn't cancel the shared query.
+        return await asyncio.shield(future)
+
+    def _forget(self, key, future):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+
+    async def _write(self, name, *args):
+        return await self._run(self.pool.write, getattr(queries, name), *args)
+
+    # ---- Reads ----
+
+    async def flight_by_number(self, flight_number):
+        return await self._read("flight_by_number", flight_number)
+
+    async def flight_status(self, flight_number):
+        """Returns the status of a flight, or None if there is no such flight."""
+        flight = await self.flight_by_number(flight_number)
+        return flight.status if flight else None
+
+    async def flights_by_status(self, status):
+        return await self._read("flights_by_status", status)
+
+    async def pilot_schedule(self, pilot_id):
+        return await self._read("pilot_schedule", pilot_id)
+
+    async def flight_summary(self):
+        return await self._read("flight_summary")
+
+    async def flight_count_by_destination(self):
+        return await self._read("flight_count_by_destination")
+
+    async def average_distance_by_destination(self):
+        return await self._read("average_distance_by_destination")
+
+    async def flights_per_pilot(self):
+        return await self._read("flights_per_pilot")
+
+    async def total_distance_by_pilot(self):
+        return await self._read("total_distance_by_pilot")
+
+    # ---- Writes ----
+
+    async def update_flight_status(self, flight_id, status):
+        """Changes one flight's status if the change is allowed; see flight_status.update_status."""
+        return await self._run(self.pool.write, update_status, flight_id, status)
+
+    async def update_statuses(self, changes):
+        """Applies a batch of (flight, status) changes; see flight_status.update_statuses."""
+        return await self._run(self.pool.write, update_statuses, list(changes))
+
+    async def assign_pilot(self, flight_id, pilot_id):
+        """Assigns a pilot after the license and schedule checks; see assignments.assign_pilot."""
+        return await self._run(self.pool.write, assign_pilot, flight_id, pilot_id)
+
+    async def remove_pilot(self, flight_id):
+        return await self._write("remove_pilot", flight_id)
+
+    async def close(self):
+        """Waits for queued work to finish, then closes every connection."""
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+        self.pool.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -0,0 +1,227 @@
+import heapq
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+import queries
+from assignments import flight_minutes
+
+# Minimum time on the ground between a pilot's arrival and next departure.
+MIN_TURNAROUND_MINUTES = 45
+
+UNASSIGNED_FLIGHTS_SQL = """
+    SELECT FlightID, OriginID, DestinationID, DepartureDate, DepartureTime,
+           ArrivalDate, ArrivalTime, Distance, AircraftCode, DepartureUTC, ArrivalUTC
+    FROM Flight
+    WHERE PilotID IS NULL
+      AND DepartureDate BETWEEN ? AND ?
+      AND FlightStatus IN ('Scheduled', 'Delayed')
+    ORDER BY DepartureDate, DepartureTime
+"""
+
+ASSIGNED_FLIGHTS_SQL = """
+    SELECT PilotID, OriginID, DestinationID, DepartureDate, DepartureTime, ArrivalDate, ArrivalTime,
+           DepartureUTC, ArrivalUTC
+    FROM Flight
+    WHERE PilotID IS NOT NULL
+      AND DepartureDate BETWEEN ? AND ?
+      AND FlightStatus != 'Cancelled'
+"""
+
+PILOT_LOCATIONS_SQL = """
+    SELECT PilotID, DestinationID, ArrivalDate, ArrivalTime, ArrivalUTC,
+           MAX(DepartureDate || ' ' || DepartureTime)
+    FROM Flight
+    WHERE PilotID IS NOT NULL
+      AND DepartureDate < ?
+      AND FlightStatus != 'Cancelled'
+    GROUP BY PilotID
+"""
+
+PILOTS_SQL = """
+    SELECT p.PilotID, p.LicenseExpiry, p.CertificationExpiry, UPPER(p.CertifiedAircraftCode),
+           IFNULL(s.TotalDistance, 0)
+    FROM Pilot p
+    LEFT JOIN PilotStats s ON s.PilotID = p.PilotID
+"""
+
+
+class RosterResult(queries.Record):
+    __slots__ = ("assignments", "flights", "unassigned", "seconds")
+
+
+def load_problem(conn, start_date, end_date):
+    """Loads everything the solver needs for flights departing in [start_date, end_date].
+    Already-assigned flights are loaded from the day before, since they can still be
+    in the air when the window starts.
+
+    Returns (flights, pilots, fixed) as plain structures:
+      flights: (flight_id, origin, destination, start, end, arrival_date, distance, aircraft)
+               for every unassigned flight, ordered by local departure date and time
+               (start is in UTC minutes where known, so it need not be ascending);
+      pilots:  pilot_id -> [license_expiry, certification_expiry, aircraft, workload,
+                            location, free_at];
+      fixed:   pilot_id -> (start, end, origin, destination) of flights they already fly,
+               sorted by start.
+    """
+    flights = [
+        (flight_id, origin, destination, flight_minutes(dep_date, dep_time, dep_utc),
+         flight_minutes(arr_date, arr_time, arr_utc), arr_date, distance, aircraft.upper() if aircraft else None)
+        for flight_id, origin, destination, dep_date, dep_time, arr_date, arr_time, distance, aircraft,
+        dep_utc, arr_utc in conn.execute(UNASSIGNED_FLIGHTS_SQL, (start_date, end_date))
+    ]
+
+    pilots = {
+        pilot_id: [str(license_expiry), str(certification_expiry), aircraft, workload, None, None]
+        for pilot_id, license_expiry, certification_expiry, aircraft, workload in conn.execute(PILOTS_SQL)
+    }
+    for pilot_id, location, arr_date, arr_time, arr_utc, _ in conn.execute(PILOT_LOCATIONS_SQL, (start_date,)):
+        if pilot_id in pilots:
+            pilots[pilot_id][4] = location
+            pilots[pilot_id][5] = flight_minutes(arr_date, arr_time, arr_utc)
+
+    lookback = (date.fromisoformat(start_date) - timedelta(days=1)).isoformat()
+    fixed = defaultdict(list)
+    for pilot_id, origin, destination, dep_date, dep_time, arr_date, arr_time, dep_utc, arr_utc in conn.execute(
+            ASSIGNED_FLIGHTS_SQL, (lookback, end_date)):
+        fixed[pilot_id].append((flight_minutes(dep_date, dep_time, dep_utc),
+                                flight_minutes(arr_date, arr_time, arr_utc), origin, destination))
+    for schedule in fixed.values():
+        schedule.sort()
+    return flights, pilots, dict(fixed)
+
+
+def solve(flights, pilots, fixed, turnaround=MIN_TURNAROUND_MINUTES):
+    """Greedy chronological roster. Returns a list of (pilot_id, flight_id).
+
+    Flights are taken in departure order. A pilot can fly a flight if their license
+    and certification outlast it, their certified aircraft matches (when the flight
+    has one), they are on the ground at the origin airport with at least
+    `turnaround` minutes to spare (pilots with no known location can start
+    anywhere), and the flight ends in time, and at the right airport, for the next
+    flight they already fly. Among those, the pilot with the least total distance
+    is chosen, which balances the workload.
+
+    Available pilots sit in heaps keyed by (workload, pilot) per (airport, aircraft),
+    so each flight only looks at pilots who are actually at its origin.
+    """
+    pools = defaultdict(list)          # (airport, aircraft) -> heap of (workload, pilot, version)
+    pools_at = defaultdict(set)        # airport -> aircraft codes with a pool there
+    floating = defaultdict(list)       # aircraft -> heap of pilots with no location yet
+    arrivals = []                      # heap of (ready_at, pilot, version, airport)
+    version = {}
+    next_fixed = {pilot_id: 0 for pilot_id in fixed}
+
+    def make_available(pilot_id, airport):
+        workload, aircraft = pilots[pilot_id][3], pilots[pilot_id][2]
+        if airport is None:
+            heapq.heappush(floating[aircraft], (workload, pilot_id, version[pilot_id]))
+        else:
+            heapq.heappush(pools[airport, aircraft], (workload, pilot_id, version[pilot_id]))
+            pools_at[airport].add(aircraft)
+
+    for pilot_id, (_, _, _, _, location, free_at) in pilots.items():
+        version[pilot_id] = 0
+        if location is not None and free_at is not None:
+            heapq.heappush(arrivals, (free_at + turnaround, pilot_id, 0, location))
+        else:
+            make_available(pilot_id, location)
+
+    # Flights pilots already fly are events too: the pilot leaves the pools when
+    # the flight departs and reappears at its destination after landing.
+    events = [(start, 0, pilot_id, end, destination)
+              for pilot_id, schedule in fixed.items()
+              for start, end, _, destination in schedule]
+    events += [(flight[3], 1, flight) for flight in flights]
+    events.sort(key=lambda event: (event[0], event[1]))
+
+    def fits_next_fixed(pilot_id, start, end, destination):
+        schedule = fixed.get(pilot_id)
+        if not schedule:
+            return True
+        position = next_fixed[pilot_id]
+        while position < len(schedule) and schedule[position][0] < start:
+            position += 1
+        next_fixed[pilot_id] = position
+        if position == len(schedule):
+            return True
+        next_start, _, next_origin, _ = schedule[position]
+        return next_start >= end + turnaround and next_origin == destination
+
+    assignments = []
+    for event in events:
+        now = event[0]
+        while arrivals and arrivals[0][0] <= now:
+            _, pilot_id, pilot_version, airport = heapq.heappop(arrivals)
+            if version[pilot_id] == pilot_version:
+                make_available(pilot_id, airport)
+
+        if event[1] == 0:
+            _, _, pilot_id, end, destination = event
+            if pilot_id in version:
+                version[pilot_id] += 1
+                heapq.heappush(arrivals, (end + turnaround, pilot_id, version[pilot_id], destination))
+            continue
+
+        flight_id, origin, destination, start, end, arrival_date, distance, aircraft = event[2]
+        if aircraft:
+            heaps = [pools.get((origin, aircraft)), floating.get(aircraft)]
+        else:
+            heaps = [pools.get((origin, code)) for code in pools_at.get(origin, ())] + list(floating.values())
+
+        best = None
+        set_aside = []
+        for heap in heaps:
+            while heap:
+                workload, pilot_id, pilot_version = heap[0]
+                license_expiry, certification_expiry = pilots[pilot_id][0], pilots[pilot_id][1]
+                if version[pilot_id] != pilot_version or license_expiry < arrival_date \
+                        or certification_expiry < arrival_date:
+                    # Stale entry, or a pilot whose papers lapse before any later flight too.
+                    heapq.heappop(heap)
+                    continue
+                if not fits_next_fixed(pilot_id, start, end, destination):
+                    set_aside.append((heap, heapq.heappop(heap)))
+                    continue
+                if best is None or heap[0] < best[1]:
+                    best = (heap, heap[0])
+                break
+        if best is not None:
+            # Taken before the set-aside pilots go back, which could move it off the top.
+            heapq.heappop(best[0])
+        for heap, entry in set_aside:
+            heapq.heappush(heap, entry)
+        if best is None:
+            continue
+
+        workload, pilot_id, _ = best[1]
+        pilots[pilot_id][3] = workload + distance
+        version[pilot_id] += 1
+        heapq.heappush(arrivals, (end + turnaround, pilot_id, version[pilot_id], destination))
+        assignments.append((pilot_id, flight_id))
+    return assignments
+
+
+def auto_roster(conn, start_date, end_date=None, turnaround=MIN_TURNAROUND_MINUTES, apply=True):
+    """Assigns eligible pilots to the unassigned flights departing in the window.
+
+    The problem is solved in one pass: pilots chain across every airport, so it has
+    no parts that could be solved apart without losing assignments. When apply is
+    true every assignment is written in one transaction; a flight that gained a
+    pilot in the meantime is left alone.
+    """
+    started = time.perf_counter()
+    end_date = end_date or start_date
+    flights, pilots, fixed = load_problem(conn, start_date, end_date)
+    assignments = solve(flights, pilots, fixed, turnaround)
+
+    if apply and assignments:
+        try:
+            conn.executemany(queries.ASSIGN_PILOT_IF_UNASSIGNED_SQL, assignments)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    return RosterResult(assignments, len(flights), len(flights) - len(assignments),
+                        round(time.perf_counter() - started, 3))
@@ -0,0 +1,389 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import queries
+from db_config import PRESETS, ConnectionProfile, load_profile
+from generate_data import generate
+from pool import ConnectionPool
+from services import FlightService
+
+
+def _consume(result):
+    """Drains a query result and returns the number of rows it produced."""
+    if result is None:
+        return 0
+    if isinstance(result, queries.Record):
+        return 1
+    return sum(1 for _ in result)
+
+
+def menu_queries(conn, seed=42):
+    """Returns (name, callable) pairs covering every read behind the console menu.
+    Parameters are sampled from the data so lookups hit real rows.
+    """
+    rng = random.Random(seed)
+    pilot_ids = [row[0] for row in conn.execute("SELECT PilotID FROM Pilot LIMIT 1000")] or [1]
+    numbers = [row[0] for row in conn.execute("SELECT FlightNumber FROM Flight LIMIT 1000")] or ["none"]
+    batch = 1000
+    return [
+        ("flights_by_status", lambda c: queries.flights_by_status(c, "Delayed", batch_size=batch)),
+        ("pilot_schedule", lambda c: queries.pilot_schedule(c, rng.choice(pilot_ids))),
+        ("flight_details", lambda c: queries.flight_details(c, batch_size=batch)),
+        ("flight_summary", queries.flight_summary),
+        ("flight_by_number", lambda c: queries.flight_by_number(c, rng.choice(numbers))),
+        ("flights_per_pilot", queries.flights_per_pilot),
+        ("average_distance_by_destination", queries.average_distance_by_destination),
+        ("total_distance_by_pilot", queries.total_distance_by_pilot),
+        ("flight_count_by_destination", queries.flight_count_by_destination),
+        ("all_flights", lambda c: queries.all_flights(c, batch_size=batch)),
+    ]
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    index = lambda q: samples[min(len(samples) - 1, round(q * (len(samples) - 1)))]
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(index(0.95) * 1000, 3),
+        "min_ms": round(samples[0] * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3),
+    }
+
+
+def _time(query, conn):
+    started = time.perf_counter()
+    rows = _consume(query(conn))
+    return time.perf_counter() - started, rows
+
+
+def run_benchmark(db_path, repeat=5, cold_repeat=3, skip=(), profile=None):
+    """Times every menu query against db_path.
+
+    Cold runs open a fresh connection per run, so SQLite's page cache starts
+    empty (the OS file cache is not flushed). Warm runs reuse one connection
+    after a discarded first run.
+    """
+    profile = (profile or load_profile()).with_path(db_path)
+    setup = FlightService(profile=profile)
+    counts = {table: setup.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+              for table in ("Destination", "Pilot", "Flight")}
+    plan = [(name, query) for name, query in menu_queries(setup.conn) if name not in skip]
+    setup.conn.close()
+
+    results = {}
+    for name, query in plan:
+        cold = []
+        for _ in range(cold_repeat):
+            conn = profile.connect()
+            elapsed, rows = _time(query, conn)
+            conn.close()
+            cold.append(elapsed)
+
+        conn = profile.connect()
+        _time(query, conn)
+        warm = []
+        for _ in range(repeat):
+            elapsed, rows = _time(query, conn)
+            warm.append(elapsed)
+        conn.close()
+
+        results[name] = {"rows": rows, "cold": _percentiles(cold), "warm": _percentiles(warm)}
+        print(f"{name:<34} rows={rows:<10} cold p50={results[name]['cold']['p50_ms']:>10.3f} ms"
+              f"   warm p50={results[name]['warm']['p50_ms']:>10.3f} ms"
+              f"   p95={results[name]['warm']['p95_ms']:>10.3f} ms")
+
+    return {"database": db_path, "preset": profile.preset, "rows": counts, "results": results}
+
+
+def _copy_database(source, target):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(target + suffix):
+            os.remove(target + suffix)
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    src.backup(dst)
+    src.close()
+    dst.close()
+
+
+def _reader(profile, numbers, pilot_ids, deadline, counts):
+    conn = profile.connect()
+    rng = random.Random(threading.get_ident())
+    while time.perf_counter() < deadline:
+        try:
+            queries.flight_by_number(conn, rng.choice(numbers))
+            queries.pilot_schedule(conn, rng.choice(pilot_ids))
+            counts["reads"] += 2
+        except sqlite3.OperationalError:
+            counts["read_errors"] += 1
+    conn.close()
+
+
+def _writer(profile, flight_ids, deadline, counts):
+    conn = profile.connect()
+    rng = random.Random(0)
+    while time.perf_counter() < deadline:
+        try:
+            queries.update_flight_status(conn, rng.choice(flight_ids), rng.choice(("Scheduled", "Delayed")))
+            counts["writes"] += 1
+        except sqlite3.OperationalError:
+            conn.rollback()
+            counts["write_errors"] += 1
+    conn.close()
+
+
+def run_profile_benchmark(db_path, presets, workdir, seconds=2.0, writes=500, readers=4):
+    """Measures read and write throughput of each connection preset.
+
+    Each preset runs against its own copy of db_path: single-connection point
+    reads, one-commit-per-row inserts, and a mixed load of several reader
+    threads alongside one committing writer.
+    """
+    os.makedirs(workdir, exist_ok=True)
+    results = {}
+    for preset in presets:
+        copy = os.path.join(workdir, f"profile_{preset}.db")
+        _copy_database(db_path, copy)
+        profile = ConnectionProfile(copy, preset)
+        conn = FlightService(profile=profile).conn
+        numbers = [row[0] for row in conn.execute("SELECT FlightNumber FROM Flight LIMIT 2000")]
+        flight_ids = [row[0] for row in conn.execute("SELECT FlightID FROM Flight LIMIT 2000")]
+        pilot_ids = [row[0] for row in conn.execute("SELECT PilotID FROM Pilot LIMIT 2000")] or [1]
+        origin = conn.execute("SELECT MIN(DestinationID) FROM Destination").fetchone()[0]
+        if not numbers or origin is None:
+            raise ValueError(f"{db_path} has no flights to benchmark; generate data first")
+
+        counts = {"reads": 0, "read_errors": 0, "writes": 0, "write_errors": 0}
+        _reader(profile, numbers, pilot_ids, time.perf_counter() + seconds, counts)
+        read_ops = counts["reads"] / seconds
+
+        started = time.perf_counter()
+        for i in range(writes):
+            queries.add_flight(conn, f"PB{preset}{i}", None, origin, origin, "2025-01-01", "10:00",
+                               "2025-01-01", "11:00", "Scheduled", 100)
+        write_ops = writes / (time.perf_counter() - started)
+        conn.close()
+
+        counts = {"reads": 0, "read_errors": 0, "writes": 0, "write_errors": 0}
+        deadline = time.perf_counter() + seconds
+        threads = [threading.Thread(target=_reader, args=(profile, numbers, pilot_ids, deadline, counts))
+                   for _ in range(readers)]
+        threads.append(threading.Thread(target=_writer, args=(profile, flight_ids, deadline, counts)))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        results[preset] = {
+            "settings": profile.settings,
+            "read_ops_per_s": round(read_ops, 1),
+            "commit_ops_per_s": round(write_ops, 1),
+            "mixed_read_ops_per_s": round(counts["reads"] / seconds, 1),
+            "mixed_write_ops_per_s": round(counts["writes"] / seconds, 1),
+            "mixed_lock_errors": counts["read_errors"] + counts["write_errors"],
+        }
+        print(f"{preset:<12} reads {read_ops:>10.0f}/s   commits {write_ops:>8.0f}/s   "
+              f"mixed reads {results[preset]['mixed_read_ops_per_s']:>10.0f}/s   "
+              f"mixed writes {results[preset]['mixed_write_ops_per_s']:>8.0f}/s   "
+              f"lock errors {results[preset]['mixed_lock_errors']}")
+    return results
+
+
+def _pool_worker(pool, pilot_ids, numbers, operations, seed):
+    rng = random.Random(seed)
+    for _ in range(operations // 2):
+        pool.pilot_schedule(rng.choice(pilot_ids))
+        pool.flight_by_number(rng.choice(numbers))
+    return operations // 2 * 2
+
+
+def run_pool_benchmark(db_path, thread_counts, operations=20000):
+    """Runs the same number of pooled point reads with each thread count and
+    reports the read throughput, to show how reads scale across threads.
+    """
+    results = {}
+    with ConnectionPool(db_path) as pool:
+        conn = pool.reader()
+        pilot_ids = [row[0] for row in conn.execute("SELECT PilotID FROM Pilot LIMIT 2000")] or [1]
+        numbers = [row[0] for row in conn.execute("SELECT FlightNumber FROM Flight LIMIT 2000")] or ["none"]
+        for threads in thread_counts:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                # Open every worker's connection before the clock starts.
+                list(executor.map(lambda _: pool.reader(), range(threads * 4)))
+                started = time.perf_counter()
+                futures = [executor.submit(_pool_worker, pool, pilot_ids, numbers, operations // threads, seed)
+                           for seed in range(threads)]
+                done = sum(future.result() for future in futures)
+                elapsed = time.perf_counter() - started
+            results[threads] = {"operations": done, "seconds": round(elapsed, 3),
+                                "read_ops_per_s": round(done / elapsed, 1)}
+            print(f"{threads:>3} threads   {done / elapsed:>10.0f} reads/s")
+    return results
+
+
+# How a time window had to be answered before the UTC columns: from the text
+# date/time pairs, either ignoring time zones or converting every row.
+TEXT_WINDOW_SQL = """
+    SELECT f.FlightNumber FROM Flight f
+    WHERE f.DepartureDate || ' ' || f.DepartureTime >= ? AND f.DepartureDate || ' ' || f.DepartureTime < ?
+"""
+
+ZONED_TEXT_WINDOW_SQL = """
+    SELECT f.FlightNumber FROM Flight f
+    JOIN Destination o ON f.OriginID = o.DestinationID
+    WHERE utc_epoch(f.DepartureDate, f.DepartureTime, o.TimeZone) >= ?
+      AND utc_epoch(f.DepartureDate, f.DepartureTime, o.TimeZone) < ?
+"""
+
+
+def run_window_benchmark(db_path, hours=(2, 24), repeat=10, seed=42):
+    """Times "flights departing in the next N hours" three ways: a zone-blind scan
+    of the text columns, a zone-correct scan converting every row, and the range
+    scan over the indexed DepartureUTC column.
+    """
+    rng = random.Random(seed)
+    conn = FlightService(db_path).conn
+    first, last = conn.execute("SELECT MIN(DepartureUTC), MAX(DepartureUTC) FROM Flight").fetchone()
+    if first is None:
+        print("No flights with UTC times to benchmark.")
+        return {}
+    fmt = lambda epoch: time.strftime("%Y-%m-%d %H:%M", time.gmtime(epoch))
+    methods = {
+        "text_pair_scan": lambda start, end: conn.execute(TEXT_WINDOW_SQL, (fmt(start), fmt(end))).fetchall(),
+        "zoned_text_scan": lambda start, end: conn.execute(ZONED_TEXT_WINDOW_SQL, (start, end)).fetchall(),
+        "utc_index": lambda start, end: queries.flights_departing_between(conn, start, end),
+    }
+    results = {}
+    for window in hours:
+        span = int(window * 3600)
+        starts = [rng.randrange(first, max(first + 1, last - span)) for _ in range(repeat)]
+        results[f"{window}h"] = {}
+        for name, method in methods.items():
+            samples, rows = [], 0
+            for start in starts:
+                started = time.perf_counter()
+                rows += len(method(start, start + span))
+                samples.append(time.perf_counter() - started)
+            results[f"{window}h"][name] = {"rows_per_query": rows / repeat, **_percentiles(samples)}
+            print(f"{window:>4}h  {name:<16} rows/query={rows / repeat:<10.1f} "
+                  f"p50={results[f'{window}h'][name]['p50_ms']:>10.3f} ms")
+    conn.close()
+    return results
+
+
+def run_route_benchmark(db_path, searches=100, seed=42):
+    """Times building the route timetable and random earliest-arrival and
+    shortest-distance searches between airports.
+    """
+    from routes import RouteNetwork
+
+    rng = random.Random(seed)
+    conn = FlightService(db_path).conn
+    network = RouteNetwork(conn)
+    started = time.perf_counter()
+    network.refresh()
+    results = {"flights": network.timetable.size, "build_s": round(time.perf_counter() - started, 3)}
+    codes = sorted(network.airports)
+    if len(codes) < 2 or not network.timetable.size:
+        print("Not enough airports or bookable flights to search.")
+        return results
+    first, last = int(network.timetable.departure[0]), int(network.timetable.departure[-1])
+    trips = [(*rng.sample(codes, 2), rng.randrange(first, max(first + 1, last))) for _ in range(searches)]
+    for name in ("earliest_arrival", "shortest_distance"):
+        search, samples, found = getattr(network, name), [], 0
+        for origin, destination, start in trips:
+            started = time.perf_counter()
+            found += search(origin, destination, start) is not None
+            samples.append(time.perf_counter() - started)
+        results[name] = {"found": found, **_percentiles(samples)}
+        print(f"{name:<18} found={found:<6} p50={results[name]['p50_ms']:>8.3f} ms "
+              f"p95={results[name]['p95_ms']:>8.3f} ms")
+    conn.close()
+    return results
+
+
+def _write_report(path, **sections):
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        **sections,
+    }
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Results written to {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time every FlightService query and write JSON results.")
+    parser.add_argument("--db", help="database to benchmark (defaults to the connection profile's path)")
+    parser.add_argument("--sizes", help="comma-separated flight counts; generates a fresh database "
+                                        "per size in --workdir instead of using --db")
+    parser.add_argument("--airports", type=int, default=1000)
+    parser.add_argument("--pilots", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default="bench_data")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--cold-repeat", type=int, default=3)
+    parser.add_argument("--skip", default="", help="comma-separated query names to leave out")
+    parser.add_argument("--profiles", help="comma-separated connection presets to compare instead of "
+                                           f"timing the menu queries ({', '.join(PRESETS)} or 'all')")
+    parser.add_argument("--seconds", type=float, default=2.0, help="duration of each profile read test")
+    parser.add_argument("--threads", help="comma-separated thread counts for a pooled read load test, "
+                                          "e.g. 1,2,4,8, instead of timing the menu queries")
+    parser.add_argument("--windows", help="comma-separated window lengths in hours, e.g. 2,24, to compare "
+                                          "departure-window queries instead of timing the menu queries")
+    parser.add_argument("--routes", type=int, help="time this many random route searches instead of "
+                                                   "timing the menu queries")
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args(argv)
+    skip = set(filter(None, args.skip.split(",")))
+    db_path = args.db or load_profile().db_path
+
+    if args.threads:
+        thread_counts = [int(value) for value in args.threads.split(",")]
+        _write_report(args.output, database=db_path, pool=run_pool_benchmark(db_path, thread_counts))
+        return
+
+    if args.windows:
+        hours = [float(value) for value in args.windows.split(",")]
+        _write_report(args.output, database=db_path,
+                      windows=run_window_benchmark(db_path, hours, args.repeat, args.seed))
+        return
+
+    if args.routes:
+        _write_report(args.output, database=db_path, routes=run_route_benchmark(db_path, args.routes, args.seed))
+        return
+
+    if args.profiles:
+        presets = list(PRESETS) if args.profiles == "all" else args.profiles.split(",")
+        _write_report(args.output, database=db_path,
+                      profiles=run_profile_benchmark(db_path, presets, args.workdir, args.seconds))
+        return
+
+    runs = []
+    if args.sizes:
+        os.makedirs(args.workdir, exist_ok=True)
+        for size in (int(value) for value in args.sizes.split(",")):
+            db_path = os.path.join(args.workdir, f"flights_{size}.db")
+            if not os.path.exists(db_path):
+                service = FlightService(db_path)
+                print(f"Generating {db_path} ...",
+                      generate(service.conn, args.airports, args.pilots, size, args.seed))
+                service.conn.close()
+            runs.append(run_benchmark(db_path, args.repeat, args.cold_repeat, skip))
+    else:
+        runs.append(run_benchmark(db_path, args.repeat, args.cold_repeat, skip))
+
+    _write_report(args.output, seed=args.seed, runs=runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import csv
+import json
+import time
+
+import queries
+from timezones import ZONES_SQL, flight_utc_times
+
+# Columns expected in an import file. Pilots and airports are given by their
+# natural keys and resolved to IDs through in-memory lookup maps.
+IMPORT_FIELDS = (
+    "FlightNumber", "LicenseNumber", "OriginCode", "DestinationCode",
+    "DepartureDate", "DepartureTime", "ArrivalDate", "ArrivalTime",
+    "FlightStatus", "Distance", "AircraftCode",
+)
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Only the first few rejected rows are kept, so a bad file can't exhaust memory.
+MAX_REPORTED_ERRORS = 20
+
+AIRPORT_CODES_SQL = "SELECT UPPER(AirportCode), DestinationID FROM Destination"
+
+LICENSE_NUMBERS_SQL = "SELECT UPPER(LicenseNumber), PilotID FROM Pilot"
+
+
+class ImportReport(queries.Record):
+    __slots__ = ("rows_read", "rows_inserted", "rows_rejected", "seconds", "errors")
+
+    @property
+    def rows_per_second(self):
+        return self.rows_read / self.seconds if self.seconds else 0.0
+
+
+def read_records(path, fmt=None):
+    """Yields one dict per flight from a CSV or JSONL file, without loading it whole.
+    The format is taken from the file extension unless fmt is given.
+    """
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".json")) else "csv")
+    with open(path, newline="", encoding="utf-8") as handle:
+        if fmt == "csv":
+            yield from csv.DictReader(handle)
+        elif fmt == "jsonl":
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise ValueError(f"Unsupported import format '{fmt}'")
+
+
+def load_lookups(conn):
+    """Returns (airport code -> DestinationID, license number -> PilotID,
+    DestinationID -> TimeZone) maps.
+    """
+    airports = dict(conn.execute(AIRPORT_CODES_SQL))
+    pilots = dict(conn.execute(LICENSE_NUMBERS_SQL))
+    zones = dict(conn.execute(ZONES_SQL))
+    return airports, pilots, zones
+
+
+def _resolve(record, airports, pilots, zones):
+    """Turns an import record into an INSERT_FLIGHT_SQL parameter tuple."""
+    license_number = (record.get("LicenseNumber") or "").strip().upper()
+    origin_code = (record.get("OriginCode") or "").strip().upper()
+    destination_code = (record.get("DestinationCode") or "").strip().upper()
+
+    pilot_id = None
+    if license_number:
+        if license_number not in pilots:
+            raise ValueError(f"unknown license number '{license_number}'")
+        pilot_id = pilots[license_number]
+    if origin_code not in airports:
+        raise ValueError(f"unknown origin airport '{origin_code}'")
+    if destination_code not in airports:
+        raise ValueError(f"unknown destination airport '{destination_code}'")
+
+    origin_id, destination_id = airports[origin_code], airports[destination_code]
+    times = (record["DepartureDate"], record["DepartureTime"], record["ArrivalDate"], record["ArrivalTime"])
+    return (
+        record["FlightNumber"],
+        pilot_id,
+        origin_id,
+        destination_id,
+        *times,
+        record["FlightStatus"],
+        int(record["Distance"]),
+        (record.get("AircraftCode") or "").strip().upper() or None,
+        *flight_utc_times(zones, origin_id, destination_id, *times),
+    )
+
+
+def import_flights(conn, records, batch_size=DEFAULT_BATCH_SIZE):
+    """Inserts flights from an iterable of import records in a single transaction.
+
+    Rows are written with executemany in batches of batch_size. Rows whose pilot or
+    airports cannot be resolved are skipped and reported; any database error rolls
+    back the whole import. Foreign keys are checked once, at commit.
+    """
+    airports, pilots, zones = load_lookups(conn)
+    rows_read = rows_inserted = 0
+    errors = []
+    batch = []
+    started = time.perf_counter()
+
+    conn.commit()
+    conn.execute("PRAGMA foreign_keys = ON")
+    try:
+        conn.execute("BEGIN")
+        conn.execute("PRAGMA defer_foreign_keys = ON")
+        for record in records:
+            rows_read += 1
+            try:
+                batch.append(_resolve(record, airports, pilots, zones))
+            except (KeyError, ValueError) as e:
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append(f"row {rows_read}: {e}")
+                continue
+            if len(batch) >= batch_size:
+                conn.executemany(queries.INSERT_FLIGHT_SQL, batch)
+                rows_inserted += len(batch)
+                batch = []
+        if batch:
+            conn.executemany(queries.INSERT_FLIGHT_SQL, batch)
+            rows_inserted += len(batch)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute("PRAGMA foreign_keys = OFF")
+
+    return ImportReport(rows_read, rows_inserted, rows_read - rows_inserted,
+                        time.perf_counter() - started, errors)
+
+
+def import_flights_file(conn, path, fmt=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Streams a CSV or JSONL file into the Flight table. See import_flights."""
+    return import_flights(conn, read_records(path, fmt), batch_size)
@@ -0,0 +1,363 @@
+import os
+import time
+
+import queries
+from timezones import fill_utc_times
+
+# ChangeLog is an append-only record of which Destination, Pilot and Flight rows
+# were inserted, updated or deleted, written by triggers (migration 5). Seq comes
+# from AUTOINCREMENT, so it only ever grows, even after compaction. Entries name
+# the changed row, not its values: consumers read the row's current state, which
+# lets compaction drop entries that a later entry for the same row supersedes.
+
+# Logged tables and their keys, parents first, which is the order rows are copied in.
+LOGGED_TABLES = (("Destination", "DestinationID"), ("Pilot", "PilotID"), ("Flight", "FlightID"))
+
+# Updates are logged when one of these columns changes. Flight's DepartureUTC and
+# ArrivalUTC are left out: they are derived from Destination.TimeZone, so a consumer
+# that reads them treats a logged Destination change as a change to its flights.
+# A column added to Flight has to be added here to be logged.
+UPDATE_COLUMNS = {
+    "Flight": ("FlightID", "FlightNumber", "PilotID", "OriginID", "DestinationID", "DepartureDate",
+               "DepartureTime", "ArrivalDate", "ArrivalTime", "FlightStatus", "Distance", "AircraftCode"),
+}
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Entries older than this are truncated by compact(), unless a consumer still needs them.
+DEFAULT_RETENTION_DAYS = 7
+
+_NOW = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+
+CHANGE_LOG_SQL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS ChangeLog (
+        Seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        TableName TEXT NOT NULL,
+        RowKey INTEGER NOT NULL,
+        Operation TEXT NOT NULL CHECK (Operation IN ('insert', 'update', 'delete')),
+        ChangedAt TEXT NOT NULL DEFAULT ({_NOW})
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_change_log_row ON ChangeLog (TableName, RowKey)",
+    # Named consumers and the last Seq each has applied; compaction keeps what they still need.
+    f"""
+    CREATE TABLE IF NOT EXISTS ChangeConsumers (
+        Name TEXT PRIMARY KEY,
+        Position INTEGER NOT NULL,
+        UpdatedAt TEXT NOT NULL DEFAULT ({_NOW})
+    )
+    """,
+    # Highest Seq removed by truncation. A consumer behind it has missed changes.
+    """
+    CREATE TABLE IF NOT EXISTS ChangeLogCompaction (
+        ID INTEGER PRIMARY KEY CHECK (ID = 1),
+        TruncatedThrough INTEGER NOT NULL
+    )
+    """,
+    "INSERT OR IGNORE INTO ChangeLogCompaction (ID, TruncatedThrough) VALUES (1, 0)",
+]
+for _table, _key in LOGGED_TABLES:
+    _of = f"OF {', '.join(UPDATE_COLUMNS[_table])} " if _table in UPDATE_COLUMNS else ""
+    CHANGE_LOG_SQL += [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{_table.lower()}_log_insert AFTER INSERT ON {_table} BEGIN
+            INSERT INTO ChangeLog (TableName, RowKey, Operation) VALUES ('{_table}', NEW.{_key}, 'insert');
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{_table.lower()}_log_update AFTER UPDATE {_of}ON {_table} BEGIN
+            INSERT INTO ChangeLog (TableName, RowKey, Operation)
+            SELECT '{_table}', OLD.{_key}, 'delete' WHERE OLD.{_key} IS NOT NEW.{_key};
+            INSERT INTO ChangeLog (TableName, RowKey, Operation) VALUES ('{_table}', NEW.{_key}, 'update');
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{_table.lower()}_log_delete AFTER DELETE ON {_table} BEGIN
+            INSERT INTO ChangeLog (TableName, RowKey, Operation) VALUES ('{_table}', OLD.{_key}, 'delete');
+        END
+        """,
+    ]
+
+CURRENT_SEQ_SQL = "SELECT seq FROM sqlite_sequence WHERE name = 'ChangeLog'"
+
+TRUNCATED_THROUGH_SQL = "SELECT TruncatedThrough FROM ChangeLogCompaction WHERE ID = 1"
+
+CHANGES_SINCE_SQL = """
+    SELECT Seq, TableName, RowKey, Operation, ChangedAt
+    FROM ChangeLog
+    WHERE Seq > ?
+    ORDER BY Seq
+    LIMIT ?
+"""
+
+# The unary + keeps SQLite on the Seq range instead of every entry of the table.
+CHANGED_KEYS_SQL = """
+    SELECT DISTINCT TableName, RowKey FROM ChangeLog
+    WHERE Seq > ? AND Seq <= ? AND +TableName IN ({})
+"""
+
+CONSUMER_POSITION_SQL = "SELECT Position FROM ChangeConsumers WHERE Name = ?"
+
+SAVE_POSITION_SQL = f"""
+    INSERT INTO ChangeConsumers (Name, Position) VALUES (?, ?)
+    ON CONFLICT (Name) DO UPDATE SET Position = excluded.Position, UpdatedAt = {_NOW}
+"""
+
+LAST_SEQ_BEFORE_SQL = "SELECT MAX(Seq) FROM ChangeLog WHERE ChangedAt < ?"
+
+TRUNCATE_SQL = "DELETE FROM ChangeLog WHERE Seq <= ?"
+
+# A replica's log holds the source's entries, not the ones its own triggers write
+# while they are applied.
+DROP_ENTRIES_AFTER_SQL = "DELETE FROM ChangeLog WHERE Seq > ?"
+
+COPY_ENTRY_SQL = "INSERT OR REPLACE INTO ChangeLog (Seq, TableName, RowKey, Operation, ChangedAt) VALUES (?, ?, ?, ?, ?)"
+
+SET_SEQ_SQL = "UPDATE sqlite_sequence SET seq = ? WHERE name = 'ChangeLog'"
+
+ZONES_BY_ID_SQL = "SELECT DestinationID, TimeZone FROM Destination WHERE DestinationID IN ({})"
+
+# Keeps only the newest entry of each row.
+COLLAPSE_SQL = """
+    DELETE FROM ChangeLog
+    WHERE Seq < (SELECT MAX(l.Seq) FROM ChangeLog l
+                 WHERE l.TableName = ChangeLog.TableName AND l.RowKey = ChangeLog.RowKey)
+"""
+
+
+class Change(queries.Record):
+    __slots__ = ("seq", "table", "key", "operation", "changed_at")
+
+
+class CompactionReport(queries.Record):
+    __slots__ = ("truncated", "collapsed", "truncated_through")
+
+
+class SyncReport(queries.Record):
+    __slots__ = ("position", "changes", "upserted", "deleted", "full_copy", "seconds")
+
+
+class ChangeLogGap(Exception):
+    """Entries a consumer had not read yet were truncated; it has to reload in full."""
+
+
+def create_change_log(cursor):
+    """Creates ChangeLog, its consumer and compaction tables and the triggers that fill it."""
+    for statement in CHANGE_LOG_SQL:
+        cursor.execute(statement)
+
+
+def database_file(conn):
+    """Returns the file behind a connection's main database ('' for :memory:)."""
+    for _, name, path in conn.execute("PRAGMA database_list"):
+        if name == "main":
+            return path
+    return ""
+
+
+# ---- Consumer API ----
+
+def current_seq(conn):
+    """Returns the Seq of the newest change ever logged (0 if none), which stays
+    correct after compaction has deleted the entries themselves.
+    """
+    row = conn.execute(CURRENT_SEQ_SQL).fetchone()
+    return row[0] if row else 0
+
+
+def truncated_through(conn):
+    return conn.execute(TRUNCATED_THROUGH_SQL).fetchone()[0]
+
+
+def _check_position(conn, position):
+    if position < truncated_through(conn):
+        raise ChangeLogGap(f"Changes after {position} up to {truncated_through(conn)} were compacted away")
+
+
+def changes_since(conn, position, limit=DEFAULT_BATCH_SIZE):
+    """Returns up to limit Change records after Seq `position`, oldest first. Raises
+    ChangeLogGap when some of them were already truncated.
+    """
+    _check_position(conn, position)
+    return [Change(*row) for row in conn.execute(CHANGES_SINCE_SQL, (position, limit))]
+
+
+def changed_keys(conn, position, tables=None):
+    """Returns ({table: set of changed keys}, new position) for the given tables (all
+    logged tables by default) after `position`: what a cache has to re-read or drop
+    to be current again. Raises ChangeLogGap when some of the changes were already
+    truncated.
+    """
+    tables = tables or [table for table, _ in LOGGED_TABLES]
+    latest = current_seq(conn)
+    _check_position(conn, position)
+    keys = {}
+    if latest > position:
+        sql = CHANGED_KEYS_SQL.format(", ".join("?" * len(tables)))
+        for table, key in conn.execute(sql, (position, latest, *tables)):
+            keys.setdefault(table, set()).add(key)
+    return keys, latest
+
+
+def consumer_position(conn, name):
+    """Returns the last Seq the named consumer saved, or None for a new consumer."""
+    row = conn.execute(CONSUMER_POSITION_SQL, (name,)).fetchone()
+    return row[0] if row else None
+
+
+def save_position(conn, name, position):
+    """Records how far the named consumer has read, so compaction keeps the rest."""
+    conn.execute(SAVE_POSITION_SQL, (name, position))
+    conn.commit()
+
+
+def drop_consumer(conn, name):
+    """Forgets a consumer, so compaction no longer waits for it."""
+    conn.execute("DELETE FROM ChangeConsumers WHERE Name = ?", (name,))
+    conn.commit()
+
+
+def compact(conn, retention_days=DEFAULT_RETENTION_DAYS, through=None):
+    """Truncates entries older than retention_days (or up to Seq `through`) that every
+    registered consumer has read, then drops entries superseded by a newer entry for
+    the same row. Returns a CompactionReport.
+    """
+    if through is None:
+        cutoff = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(time.time() - retention_days * 86400))
+        through = conn.execute(LAST_SEQ_BEFORE_SQL, (cutoff,)).fetchone()[0] or 0
+    positions = [row[0] for row in conn.execute("SELECT Position FROM ChangeConsumers")]
+    through = min([through] + positions)
+    try:
+        truncated = conn.execute(TRUNCATE_SQL, (through,)).rowcount
+        if through > truncated_through(conn):
+            conn.execute("UPDATE ChangeLogCompaction SET TruncatedThrough = ? WHERE ID = 1", (through,))
+        collapsed = conn.execute(COLLAPSE_SQL).rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return CompactionReport(truncated, collapsed, truncated_through(conn))
+
+
+# ---- Replica sync ----
+
+REPLICA_STATE_SQL = """
+    CREATE TABLE IF NOT EXISTS ReplicaSource (
+        Source TEXT PRIMARY KEY,
+        Position INTEGER NOT NULL
+    )
+"""
+
+
+def _columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _upsert_sql(table, key, columns):
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column != key)
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT ({key}) DO UPDATE SET {updates}")
+
+
+def _rows_by_key(conn, table, key, columns, keys):
+    rows = []
+    keys = sorted(keys)
+    for start in range(0, len(keys), DEFAULT_BATCH_SIZE):
+        chunk = keys[start:start + DEFAULT_BATCH_SIZE]
+        rows += conn.execute(f"SELECT {', '.join(columns)} FROM {table} WHERE {key} IN "
+                             f"({', '.join('?' * len(chunk))})", chunk).fetchall()
+    return rows
+
+
+def _full_copy(conn, replica, source):
+    """Replaces the replica with a page-by-page copy of this database, taken from one
+    read snapshot, and returns the Seq that copy is current to.
+    """
+    conn.backup(replica)
+    position = current_seq(replica)
+    # The copy's consumers are the source's, not its own.
+    replica.execute("DELETE FROM ChangeConsumers")
+    replica.execute(REPLICA_STATE_SQL)
+    replica.execute("INSERT OR REPLACE INTO ReplicaSource (Source, Position) VALUES (?, ?)", (source, position))
+    replica.commit()
+    return position
+
+
+def sync_replica(conn, replica_path, batch_size=DEFAULT_BATCH_SIZE):
+    """Brings the SQLite file at replica_path up to date with this database.
+
+    A new replica, or one that has fallen behind a truncation, is first overwritten
+    by a copy of the whole database made with the SQLite backup API. After that each
+    batch of up to batch_size log entries is applied in one replica transaction that
+    also records the replica's position, so an interrupted sync resumes where it
+    stopped. The replica's ChangeLog holds the source's entries and is compacted
+    with it. The source registers the replica as a consumer, which keeps compaction
+    from truncating entries it has not applied. Returns a SyncReport.
+    """
+    from services import FlightService  # the replica gets the same schema and migrations
+
+    started = time.perf_counter()
+    replica = FlightService(replica_path).conn
+    try:
+        replica.execute(REPLICA_STATE_SQL)
+        source = os.path.abspath(database_file(conn) or ":memory:")
+        consumer = "replica:" + os.path.abspath(replica_path)
+        row = replica.execute("SELECT Position FROM ReplicaSource WHERE Source = ?", (source,)).fetchone()
+        position = row[0] if row else None
+        full_copy, changes, upserted, deleted = False, 0, 0, 0
+        if position is None or position < truncated_through(conn):
+            position = _full_copy(conn, replica, source)
+            full_copy = True
+            save_position(conn, consumer, position)
+        shared = {table: [column for column in _columns(conn, table) if column in _columns(replica, table)]
+                  for table, _ in LOGGED_TABLES}
+
+        while True:
+            batch = changes_since(conn, position, batch_size)
+            if not batch:
+                break
+            keys = {}
+            for change in batch:
+                keys.setdefault(change.table, set()).add(change.key)
+            current = {table: _rows_by_key(conn, table, key, shared[table], keys.get(table, ()))
+                       for table, key in LOGGED_TABLES}
+            destinations = sorted(keys.get("Destination", ()))
+            zones_before = dict(replica.execute(ZONES_BY_ID_SQL.format(", ".join("?" * len(destinations))),
+                                                destinations))
+            logged_before = current_seq(replica)
+            try:
+                # Deletes children first and upserts parents first.
+                for table, key in reversed(LOGGED_TABLES):
+                    index = shared[table].index(key)
+                    gone = sorted(keys.get(table, set()) - {row[index] for row in current[table]})
+                    replica.executemany(f"DELETE FROM {table} WHERE {key} = ?", [(k,) for k in gone])
+                    deleted += len(gone)
+                for table, key in LOGGED_TABLES:
+                    replica.executemany(_upsert_sql(table, key, shared[table]), current[table])
+                    upserted += len(current[table])
+                # The UTC times of flights at a destination whose TimeZone changed are not
+                # logged per flight. New destinations have no flights the batch left out.
+                zones_after = dict(replica.execute(ZONES_BY_ID_SQL.format(", ".join("?" * len(destinations))),
+                                                   destinations))
+                for destination_id, zone in zones_before.items():
+                    if zones_after.get(destination_id, zone) != zone:
+                        fill_utc_times(replica, destination_id)
+                replica.execute(DROP_ENTRIES_AFTER_SQL, (logged_before,))
+                replica.executemany(COPY_ENTRY_SQL, [tuple(change) for change in batch])
+                replica.execute(SET_SEQ_SQL, (max(logged_before, batch[-1].seq),))
+                position = batch[-1].seq
+                replica.execute("UPDATE ReplicaSource SET Position = ? WHERE Source = ?", (position, source))
+                replica.commit()
+            except Exception:
+                replica.rollback()
+                raise
+            changes += len(batch)
+            save_position(conn, consumer, position)
+        # Compactions of the source are repeated on the replica, so its log stays the
+        # same size.
+        if truncated_through(conn) > truncated_through(replica):
+            compact(replica, through=min(truncated_through(conn), position))
+    finally:
+        replica.close()
+    return SyncReport(position, changes, upserted, deleted, full_copy, round(time.perf_counter() - started, 3))
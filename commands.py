@@ -0,0 +1,604 @@
+import argparse
+import csv
+import json
+import shlex
+import sys
+from itertools import islice
+
+import queries
+from assignments import validate_assignment
+from flight_status import update_statuses
+
+# One subcommand per console operation, for scripts and cron jobs. Every command
+# returns records or a dict, printed as a table or, with --json, as JSON. `batch`
+# runs many commands over one connection, grouping them into transactions.
+
+DEFAULT_GROUP_SIZE = 100
+
+# Commands that copy or replace the whole database, or run their own transaction,
+# which cannot happen inside a batch's transaction. A batch commits the commands
+# before one of these and runs it on its own.
+OUTSIDE_TRANSACTION = ("reset", "restore", "snapshot", "sync", "import")
+
+# Commands that can write their data to stdout (path '-'); their result goes to stderr then.
+STDOUT_DATA = ("export",)
+
+
+class CommandError(Exception):
+    """A command that could not be carried out, e.g. an unknown flight."""
+
+
+def _limited(rows, limit):
+    return list(islice(rows, limit)) if limit else list(rows)
+
+
+def _read_csv(path):
+    handle = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    with handle:
+        return list(csv.DictReader(handle))
+
+
+# ---- Reads ----
+
+def _flights(conn, args):
+    if args.status:
+        rows = queries.flights_by_status(conn, args.status.capitalize(), batch_size=1000)
+    else:
+        rows = queries.all_flights(conn, batch_size=1000)
+    return _limited(rows, args.limit)
+
+
+def _flight(conn, args):
+    flight = queries.flight_by_number(conn, args.flight_number)
+    if flight is None:
+        raise CommandError(f"No flight with number '{args.flight_number}'")
+    return flight
+
+
+def _schedule(conn, args):
+    return _limited(queries.pilot_schedule(conn, args.pilot_id, batch_size=1000), args.limit)
+
+
+def _details(conn, args):
+    return _limited(queries.flight_details(conn, batch_size=1000), args.limit)
+
+
+def _summary(conn, args):
+    return queries.flight_summary(conn)
+
+
+def _flights_per_pilot(conn, args):
+    return queries.flights_per_pilot(conn)
+
+
+def _average_distance(conn, args):
+    return queries.average_distance_by_destination(conn)
+
+
+def _pilot_distance(conn, args):
+    return queries.total_distance_by_pilot(conn)
+
+
+def _destination_counts(conn, args):
+    return queries.flight_count_by_destination(conn)
+
+
+def _search(conn, args):
+    from search import search
+    try:
+        return search(conn, args.text, args.kind, args.limit)
+    except ValueError as e:
+        raise CommandError(str(e))
+
+
+def _departures(conn, args):
+    from datetime import datetime
+    now = datetime.fromisoformat(args.at) if args.at else None
+    return queries.flights_departing_within(conn, args.hours, now)
+
+
+def _analytics(conn, args):
+    from analytics import FlightAnalytics
+    analytics = FlightAnalytics(conn)
+    analytics.refresh()
+    status = args.status.capitalize() if args.status else None
+    result = {
+        "distance_percentiles": [{"percentile": percentile, "distance_km": distance}
+                                 for percentile, distance in analytics.distance_percentiles(status=status)],
+        "busiest_routes": analytics.busiest_routes(args.routes, status=status),
+    }
+    if args.days:
+        result["daily_volumes"] = analytics.daily_volumes(status=status)
+    return result
+
+
+def _route(conn, args):
+    import time
+    from datetime import datetime
+    from routes import RouteNetwork
+    network = RouteNetwork(conn)
+    after = datetime.fromisoformat(args.after) if args.after else int(time.time())
+    if args.by == "distance":
+        itinerary = network.shortest_distance(args.origin, args.destination, after, args.min_connection,
+                                              args.max_hours, args.max_legs)
+    else:
+        itinerary = network.earliest_arrival(args.origin, args.destination, after, args.min_connection)
+    return dict(itinerary.as_dict(), hours=itinerary.hours) if itinerary else None
+
+
+def _changes(conn, args):
+    from changelog import changes_since
+    return changes_since(conn, args.since, args.limit)
+
+
+def _check_aggregates(conn, args):
+    from aggregates import check_aggregates
+    mismatches = check_aggregates(conn)
+    if mismatches:
+        lines = [f"{table} {key}: stored {stored}, live {live}" for table, key, stored, live in mismatches]
+        raise CommandError("\n".join(lines + [f"{len(mismatches)} stats rows are out of date; "
+                                              f"run rebuild-aggregates"]))
+    return {"consistent": True}
+
+
+# ---- Writes ----
+
+def _add_flight(conn, args):
+    flight_id = queries.add_flight(conn, args.flight_number, args.pilot_id, args.origin_id, args.destination_id,
+                                   args.departure_date, args.departure_time, args.arrival_date, args.arrival_time,
+                                   args.status.capitalize(), args.distance, args.aircraft_code)
+    return {"flight_id": flight_id}
+
+
+def _set_status(conn, args):
+    ref = int(args.flight) if args.flight.isdigit() else args.flight
+    change = update_statuses(conn, [(ref, args.status)])[0]
+    if change.result not in ("updated", "unchanged"):
+        raise CommandError(f"Flight status not updated: {change.reason}")
+    return change
+
+
+def _assign_pilot(conn, args):
+    check = validate_assignment(conn, args.flight_id, args.pilot_id)
+    if not check.ok:
+        raise CommandError("Pilot cannot be assigned: " + "; ".join(check.reasons))
+    return {"changed": queries.assign_pilot(conn, args.flight_id, args.pilot_id)}
+
+
+def _remove_pilot(conn, args):
+    return {"changed": queries.remove_pilot(conn, args.flight_id)}
+
+
+def _add_destination(conn, args):
+    return {"destination_id": queries.add_destination(conn, args.city, args.country, args.airport_code,
+                                                      args.time_zone, args.notes)}
+
+
+def _add_pilot(conn, args):
+    return {"pilot_id": queries.add_pilot(conn, args.first_name, args.last_name, args.rank, args.license_number,
+                                          args.license_expiry, args.flight_type, args.aircraft_code,
+                                          args.certification_expiry, args.email, args.phone)}
+
+
+def _set_notes(conn, args):
+    changed = queries.update_destination_notes(conn, args.destination_id, args.notes)
+    if not changed:
+        raise CommandError(f"No destination with ID {args.destination_id}")
+    return {"changed": changed}
+
+
+def _delete_flight(conn, args):
+    deleted = queries.delete_flight_by_number(conn, args.flight_number)
+    if not deleted:
+        raise CommandError(f"No flight with number '{args.flight_number}'")
+    return {"deleted": deleted}
+
+
+def _sample_data(conn, args):
+    from sample_data import sample_data
+    sample_data(conn.cursor(), conn)
+    return {"loaded": True}
+
+
+def _reset(conn, args):
+    if not args.yes:
+        raise CommandError("reset deletes every flight, pilot and destination; pass --yes to confirm")
+    queries.reset(conn)
+    return {"reset": True}
+
+
+def _flight_ref(row):
+    # A FlightID that is not a number is passed on as text, so update_statuses
+    # reports that row as an unknown flight instead of the whole file failing.
+    flight_id = (row.get("FlightID") or "").strip()
+    if not flight_id:
+        return (row.get("FlightNumber") or "").strip()
+    return int(flight_id) if flight_id.isdigit() else flight_id
+
+
+def _update_statuses(conn, args):
+    return update_statuses(conn, [(_flight_ref(row), row.get("FlightStatus")) for row in _read_csv(args.path)])
+
+
+def _check_roster(conn, args):
+    from assignments import validate_roster
+    checks = validate_roster(conn, [(row["FlightID"], row["PilotID"]) for row in _read_csv(args.path)])
+    valid = [(check.pilot_id, check.flight_id) for check in checks if check.ok]
+    if args.apply and valid:
+        conn.executemany(queries.ASSIGN_PILOT_SQL, valid)
+        conn.commit()
+    return checks
+
+
+def _auto_roster(conn, args):
+    from auto_roster import auto_roster
+    result = auto_roster(conn, args.start_date, args.end_date, apply=not args.dry_run)
+    return {"assigned" if not args.dry_run else "found": len(result.assignments), "flights": result.flights,
+            "unassigned": result.unassigned, "seconds": result.seconds}
+
+
+# ---- Bulk data and maintenance ----
+
+def _import(conn, args):
+    from bulk_import import import_flights_file
+    report = import_flights_file(conn, args.path, args.format, args.batch_size)
+    return dict(report.as_dict(), seconds=round(report.seconds, 2), rows_per_second=round(report.rows_per_second))
+
+
+def _generate(conn, args):
+    from generate_data import generate
+    return generate(conn, args.airports, args.pilots, args.flights, args.seed)
+
+
+def _export(conn, args):
+    from export import export_file
+    return export_file(conn, args.path, args.report, args.format, args.batch_size)
+
+
+def _sync(conn, args):
+    from changelog import sync_replica
+    return sync_replica(conn, args.replica, args.batch_size)
+
+
+def _snapshot(conn, args):
+    import snapshots
+    return snapshots.snapshot(conn, args.path, args.step_pages)
+
+
+def _restore(conn, args):
+    import snapshots
+    if not args.yes:
+        raise CommandError("restore replaces every flight, pilot and destination; pass --yes to confirm")
+    return snapshots.restore(conn, args.path, args.step_pages)
+
+
+def _compact_log(conn, args):
+    from changelog import compact
+    return compact(conn, args.days, args.through)
+
+
+def _rebuild_aggregates(conn, args):
+    from aggregates import rebuild_aggregates
+    rebuild_aggregates(conn)
+    return {"rebuilt": True}
+
+
+def _add_arguments(name, parser):
+    if name in ("flights", "schedule", "details"):
+        parser.add_argument("--limit", type=int, help="show at most this many flights")
+    if name == "flights":
+        parser.add_argument("--status", help="only flights with this status")
+    elif name in ("flight", "delete-flight"):
+        parser.add_argument("flight_number")
+    elif name == "schedule":
+        parser.add_argument("pilot_id", type=int)
+    elif name == "add-flight":
+        parser.add_argument("flight_number")
+        parser.add_argument("origin_id", type=int)
+        parser.add_argument("destination_id", type=int)
+        parser.add_argument("departure_date", help="YYYY-MM-DD, local to the origin")
+        parser.add_argument("departure_time", help="HH:MM")
+        parser.add_argument("arrival_date", help="YYYY-MM-DD, local to the destination")
+        parser.add_argument("arrival_time", help="HH:MM")
+        parser.add_argument("distance", type=int, help="km")
+        parser.add_argument("--pilot-id", type=int)
+        parser.add_argument("--status", default="Scheduled")
+        parser.add_argument("--aircraft-code")
+    elif name == "set-status":
+        parser.add_argument("flight", help="FlightID or FlightNumber")
+        parser.add_argument("status")
+    elif name == "assign-pilot":
+        parser.add_argument("flight_id", type=int)
+        parser.add_argument("pilot_id", type=int)
+    elif name == "remove-pilot":
+        parser.add_argument("flight_id", type=int)
+    elif name == "add-destination":
+        parser.add_argument("city")
+        parser.add_argument("country")
+        parser.add_argument("airport_code")
+        parser.add_argument("--time-zone", help="IANA name, e.g. Europe/London")
+        parser.add_argument("--notes")
+    elif name == "add-pilot":
+        for argument in ("first_name", "last_name", "rank", "license_number"):
+            parser.add_argument(argument)
+        parser.add_argument("license_expiry", help="YYYY-MM-DD")
+        parser.add_argument("flight_type")
+        parser.add_argument("aircraft_code", help="certified aircraft code")
+        parser.add_argument("certification_expiry", help="YYYY-MM-DD")
+        parser.add_argument("--email")
+        parser.add_argument("--phone")
+    elif name == "set-notes":
+        parser.add_argument("destination_id", type=int)
+        parser.add_argument("notes")
+    elif name == "search":
+        parser.add_argument("text", help="flight number, pilot name or license, city, country or airport code; "
+                                         "one or two characters only match the start of flight numbers "
+                                         "and airport codes")
+        parser.add_argument("--kind", action="append", choices=["flight", "pilot", "destination"],
+                            help="only this kind of match; repeat for several")
+        parser.add_argument("--limit", type=int, default=20, help="most matches to show (default 20)")
+    elif name == "reset":
+        parser.add_argument("--yes", action="store_true", help="confirm deleting all data")
+    elif name == "departures":
+        parser.add_argument("--hours", type=float, default=2, help="window length (default 2)")
+        parser.add_argument("--at", help="window start as an ISO date/time, e.g. 2025-07-01T12:00+00:00 "
+                                         "(naive means UTC; defaults to now)")
+    elif name == "analytics":
+        parser.add_argument("--status", help="only flights with this status")
+        parser.add_argument("--routes", type=int, default=10, help="number of busiest routes to list")
+        parser.add_argument("--days", action="store_true", help="also list the number of flights per day")
+    elif name == "route":
+        parser.add_argument("origin", help="airport code")
+        parser.add_argument("destination", help="airport code")
+        parser.add_argument("--after", help="earliest departure as an ISO date/time (naive means UTC; "
+                                            "defaults to now)")
+        parser.add_argument("--min-connection", type=float, default=45, help="minutes between flights (default 45)")
+        parser.add_argument("--by", choices=["arrival", "distance"], default="arrival",
+                            help="earliest arrival (the default) or least total distance")
+        parser.add_argument("--max-hours", type=float, default=48, help="with --by distance, latest arrival "
+                                                                        "after --after (default 48)")
+        parser.add_argument("--max-legs", type=int, default=4, help="with --by distance, most flights (default 4)")
+    elif name == "changes":
+        parser.add_argument("--since", type=int, default=0)
+        parser.add_argument("--limit", type=int, default=1000)
+    elif name == "update-statuses":
+        parser.add_argument("path", nargs="?", default="-",
+                            help="CSV with FlightID or FlightNumber and FlightStatus columns; - for stdin")
+    elif name == "check-roster":
+        parser.add_argument("path", nargs="?", default="-", help="CSV of FlightID,PilotID rows; - for stdin")
+        parser.add_argument("--apply", action="store_true", help="assign every valid row in one transaction")
+    elif name == "auto-roster":
+        parser.add_argument("--from", dest="start_date", required=True, help="first departure date (YYYY-MM-DD)")
+        parser.add_argument("--to", dest="end_date", help="last departure date; defaults to --from")
+        parser.add_argument("--dry-run", action="store_true", help="report the assignments without writing them")
+    elif name == "import":
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="defaults to the file extension")
+        parser.add_argument("--batch-size", type=int, default=5000)
+    elif name == "generate":
+        parser.add_argument("--airports", type=int, default=1000)
+        parser.add_argument("--pilots", type=int, default=20000)
+        parser.add_argument("--flights", type=int, default=100000)
+        parser.add_argument("--seed", type=int, default=42)
+    elif name == "export":
+        parser.add_argument("path", nargs="?", default="-", help="output file; - for stdout")
+        parser.add_argument("--report", choices=["flights", "all", "details"], default="flights",
+                            help="flights (re-importable, the default), all or details")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="defaults to the file extension")
+        parser.add_argument("--batch-size", type=int, default=1000)
+    elif name == "sync":
+        parser.add_argument("replica", help="replica SQLite file; created with a full copy if new")
+        parser.add_argument("--batch-size", type=int, default=1000, help="change log entries per replica transaction")
+    elif name in ("snapshot", "restore"):
+        parser.add_argument("path")
+        parser.add_argument("--step-pages", type=int, default=1024,
+                            help="pages copied per step; the database is unlocked between steps")
+        if name == "restore":
+            parser.add_argument("--yes", action="store_true", help="confirm replacing all data")
+    elif name == "compact-log":
+        parser.add_argument("--days", type=float, default=7, help="keep entries newer than this (default 7)")
+        parser.add_argument("--through", type=int, help="truncate up to this Seq instead of by age")
+
+
+# name -> (handler, help). Handlers take (conn, args) and return records or a dict.
+COMMANDS = {
+    "flights": (_flights, "List flights, optionally by status"),
+    "flight": (_flight, "Show one flight by flight number"),
+    "schedule": (_schedule, "List a pilot's flights"),
+    "details": (_details, "List flights with pilot, origin and destination"),
+    "summary": (_summary, "Flights per destination"),
+    "flights-per-pilot": (_flights_per_pilot, "Flights assigned to each pilot"),
+    "average-distance": (_average_distance, "Average flight distance per destination"),
+    "pilot-distance": (_pilot_distance, "Total distance flown by each pilot"),
+    "destination-counts": (_destination_counts, "Flight count per destination"),
+    "search": (_search, "Find flights, pilots and destinations by prefix, substring or near match"),
+    "departures": (_departures, "List flights departing in a time window"),
+    "analytics": (_analytics, "Distance percentiles, busiest routes and daily volumes"),
+    "route": (_route, "Find the earliest-arriving or shortest itinerary between two airports"),
+    "changes": (_changes, "List change log entries after a sequence number"),
+    "check-aggregates": (_check_aggregates, "Compare the stats tables with a live aggregate over Flight"),
+    "add-flight": (_add_flight, "Add a flight"),
+    "set-status": (_set_status, "Change a flight's status, if the change is allowed"),
+    "assign-pilot": (_assign_pilot, "Assign a pilot to a flight after checking license and schedule"),
+    "remove-pilot": (_remove_pilot, "Remove the pilot from a flight"),
+    "add-destination": (_add_destination, "Add a destination airport"),
+    "add-pilot": (_add_pilot, "Add a pilot"),
+    "set-notes": (_set_notes, "Replace a destination's notes"),
+    "delete-flight": (_delete_flight, "Delete a flight by flight number"),
+    "sample-data": (_sample_data, "Insert the sample data"),
+    "reset": (_reset, "Delete all data"),
+    "update-statuses": (_update_statuses, "Apply a CSV of status changes in one transaction"),
+    "check-roster": (_check_roster, "Validate a CSV of FlightID,PilotID assignments"),
+    "auto-roster": (_auto_roster, "Assign pilots to the unassigned flights in a date range"),
+    "import": (_import, "Bulk import flights from a CSV or JSONL file"),
+    "generate": (_generate, "Fill the database with seeded synthetic data"),
+    "export": (_export, "Stream a flight report to a CSV or JSONL file"),
+    "sync": (_sync, "Apply changes since the last sync to a replica database file"),
+    "snapshot": (_snapshot, "Copy the database to a file with the backup API"),
+    "restore": (_restore, "Replace the database with a snapshot"),
+    "compact-log": (_compact_log, "Drop old and superseded change log entries"),
+    "rebuild-aggregates": (_rebuild_aggregates, "Recompute the per-destination and per-pilot stats tables"),
+}
+
+
+def add_commands(subcommands):
+    """Adds a subparser for every entry of COMMANDS."""
+    for name, (_, help_text) in COMMANDS.items():
+        _add_arguments(name, subcommands.add_parser(name, help=help_text))
+
+
+class _BatchArgumentParser(argparse.ArgumentParser):
+    """Reports a bad command line as a CommandError instead of exiting."""
+
+    def error(self, message):
+        raise CommandError(message)
+
+
+def build_batch_parser():
+    """Parser for the command lines of a batch file."""
+    parser = _BatchArgumentParser(prog="batch", add_help=False)
+    add_commands(parser.add_subparsers(dest="command", required=True))
+    return parser
+
+
+def run(conn, args):
+    """Runs one parsed command and returns its result."""
+    return COMMANDS[args.command][0](conn, args)
+
+
+def result_file(args):
+    """Where a command's result is printed: stderr when its data goes to stdout."""
+    return sys.stderr if args.command in STDOUT_DATA and args.path == "-" else sys.stdout
+
+
+def _plain(result):
+    if isinstance(result, queries.Record):
+        return result.as_dict()
+    if isinstance(result, (list, tuple)):
+        return [_plain(item) for item in result]
+    if isinstance(result, dict):
+        return {key: _plain(value) for key, value in result.items()}
+    return result
+
+
+def _table(rows, file):
+    from tabulate import tabulate
+    if isinstance(rows[0], dict):
+        names = list(rows[0])
+        rows = [[row.get(name) for name in names] for row in rows]
+    else:
+        names = rows[0].__slots__
+    headers = [name.replace("_", " ").title() for name in names]
+    print(tabulate(rows, headers=headers, tablefmt="grid"), file=file)
+
+
+def render(result, as_json=False, file=None):
+    """Prints a command result as JSON, or as a table (tabulate is only imported here).
+    A dict prints one "key: value" line per entry, and a list in it as a table below
+    its key (or one item per line if the items are plain values).
+    """
+    if as_json:
+        print(json.dumps(_plain(result), default=str), file=file)
+        return
+    if isinstance(result, dict):
+        for key, value in result.items():
+            if not isinstance(value, list) or not value:
+                print(f"{key}: {value}", file=file)
+            elif value and isinstance(value[0], (queries.Record, dict)):
+                print(f"{key}:", file=file)
+                _table(value, file)
+            else:
+                print(f"{key}:", file=file)
+                for item in value:
+                    print(f"  {item}", file=file)
+        return
+    rows = [result] if isinstance(result, queries.Record) else result
+    if not rows:
+        print("No results.", file=file)
+        return
+    _table(rows, file)
+
+
+class _GroupedConnection:
+    """Stands in for the connection inside a batch: the commit and rollback calls of
+    the operations are ignored, since the batch commits or rolls back each group.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def run_batch(conn, lines, group_size=DEFAULT_GROUP_SIZE, stop_on_error=False, as_json=False):
+    """Runs one command per line ('#' comments and blank lines are skipped) over a
+    single connection, committing every group_size commands.
+
+    Each command runs inside a savepoint, so a failing one is rolled back on its own
+    and the rest of its group still commits (unless stop_on_error). A command in
+    OUTSIDE_TRANSACTION commits the group before it and runs outside any transaction. Returns (commands run,
+    commands failed).
+    """
+    parser = build_batch_parser()
+    grouped = _GroupedConnection(conn)
+    ran = failed = in_group = 0
+    conn.commit()
+    conn.execute("BEGIN")
+    try:
+        for number, line in enumerate(lines, 1):
+            savepoint = False
+            try:
+                words = shlex.split(line, comments=True)
+                if not words:
+                    continue
+                ran += 1
+                args = parser.parse_args(words)
+                if args.command in OUTSIDE_TRANSACTION:
+                    conn.commit()
+                    in_group = 0
+                    try:
+                        result = run(conn, args)
+                    finally:
+                        if not conn.in_transaction:
+                            conn.execute("BEGIN")
+                else:
+                    conn.execute("SAVEPOINT batch_command")
+                    savepoint = True
+                    result = run(grouped, args)
+                    conn.execute("RELEASE batch_command")
+            except (Exception, SystemExit) as e:
+                if savepoint:
+                    conn.execute("ROLLBACK TO batch_command")
+                    conn.execute("RELEASE batch_command")
+                failed += 1
+                message = str(e) if isinstance(e, Exception) else "invalid command"
+                if as_json:
+                    print(json.dumps({"line": number, "command": line.strip(), "ok": False, "error": message}))
+                else:
+                    print(f"Error on line {number} ({line.strip()}): {message}", file=sys.stderr)
+                if stop_on_error:
+                    break
+            else:
+                if as_json:
+                    print(json.dumps({"line": number, "command": line.strip(), "ok": True,
+                                      "result": _plain(result)}, default=str), file=result_file(args))
+                else:
+                    print(f"> {line.strip()}", file=result_file(args))
+                    render(result, file=result_file(args))
+            in_group += 1
+            if in_group >= group_size:
+                conn.commit()
+                conn.execute("BEGIN")
+                in_group = 0
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return ran, failed
@@ -0,0 +1,156 @@
+import configparser
+import os
+import pathlib
+import sqlite3
+
+import instrumentation
+import timezones
+
+DEFAULT_DB_PATH = "FlightManagement.db"
+DEFAULT_CONFIG_FILE = "flight_management.ini"
+
+# Connection presets. "default" leaves every setting at SQLite's own defaults,
+# which is how the service connected before profiles existed.
+PRESETS = {
+    "default": {},
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,          # negative = KiB, so 64 MiB
+        "mmap_size": 268435456,        # 256 MiB
+        "temp_store": "MEMORY",
+        "statement_cache": 256,
+    },
+    "read-heavy": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -262144,         # 256 MiB
+        "mmap_size": 1073741824,       # 1 GiB
+        "temp_store": "MEMORY",
+        "statement_cache": 512,
+    },
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -65536,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "statement_cache": 256,
+    },
+}
+
+DEFAULT_PRESET = "balanced"
+
+# Applied in this order; journal_mode comes first because it may need to
+# rewrite the database header.
+PRAGMAS = ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store")
+
+# Settings of the connection object itself rather than PRAGMAs. `instrument` = 1
+# times every statement (see instrumentation.py); statements slower than
+# slow_query_ms are logged with their query plan.
+CONNECTION_SETTINGS = ("statement_cache", "timeout", "instrument", "slow_query_ms")
+
+INTEGER_SETTINGS = ("cache_size", "mmap_size", "statement_cache", "timeout", "instrument", "slow_query_ms")
+
+ENVIRONMENT = {
+    "FMS_DB_PATH": "db_path",
+    "FMS_PROFILE": "preset",
+    "FMS_JOURNAL_MODE": "journal_mode",
+    "FMS_SYNCHRONOUS": "synchronous",
+    "FMS_CACHE_SIZE": "cache_size",
+    "FMS_MMAP_SIZE": "mmap_size",
+    "FMS_TEMP_STORE": "temp_store",
+    "FMS_STATEMENT_CACHE": "statement_cache",
+    "FMS_TIMEOUT": "timeout",
+    "FMS_INSTRUMENT": "instrument",
+    "FMS_SLOW_QUERY_MS": "slow_query_ms",
+}
+
+
+class ConnectionProfile:
+    """Everything needed to open a tuned connection to the flight database."""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, preset=DEFAULT_PRESET, **overrides):
+        if preset not in PRESETS:
+            raise ValueError(f"Unknown connection preset '{preset}'. Choose from: {', '.join(PRESETS)}")
+        self.db_path = db_path
+        self.preset = preset
+        self.settings = dict(PRESETS[preset])
+        for name, value in overrides.items():
+            if value is None:
+                continue
+            if name not in PRAGMAS and name not in CONNECTION_SETTINGS:
+                raise ValueError(f"Unknown connection setting '{name}'")
+            self.settings[name] = int(value) if name in INTEGER_SETTINGS else str(value).upper()
+
+    def with_path(self, db_path):
+        """Returns a copy of this profile pointed at another database file."""
+        profile = ConnectionProfile(db_path, self.preset)
+        profile.settings = dict(self.settings)
+        return profile
+
+    def connect(self, **kwargs):
+        """Opens a connection and applies the profile's pragmas to it."""
+        kwargs.setdefault("cached_statements", self.settings.get("statement_cache", 128))
+        kwargs.setdefault("timeout", self.settings.get("timeout", 5))
+        database = kwargs.pop("database", self.db_path)
+        self._instrument(kwargs)
+        conn = sqlite3.connect(database, **kwargs)
+        timezones.register(conn)
+        self.apply(conn)
+        return conn
+
+    def connect_read_only(self, **kwargs):
+        """Opens a read-only (mode=ro) connection. The journal mode is left alone,
+        since only a writer may change it.
+        """
+        if self.db_path == ":memory:":
+            raise ValueError("An in-memory database cannot be opened read-only from another connection")
+        kwargs.setdefault("cached_statements", self.settings.get("statement_cache", 128))
+        kwargs.setdefault("timeout", self.settings.get("timeout", 5))
+        uri = pathlib.Path(self.db_path).resolve().as_uri() + "?mode=ro"
+        self._instrument(kwargs)
+        conn = sqlite3.connect(uri, uri=True, **kwargs)
+        timezones.register(conn)
+        self.apply(conn, skip=("journal_mode",))
+        return conn
+
+    def _instrument(self, kwargs):
+        """Makes sqlite3.connect build an InstrumentedConnection when the profile asks
+        for one; otherwise connections are left exactly as sqlite3 makes them.
+        """
+        if self.settings.get("instrument"):
+            kwargs.setdefault("factory", instrumentation.InstrumentedConnection)
+
+    def apply(self, conn, skip=()):
+        if isinstance(conn, instrumentation.InstrumentedConnection):
+            conn.slow_query_ms = self.settings.get("slow_query_ms", instrumentation.DEFAULT_SLOW_QUERY_MS)
+        for pragma in PRAGMAS:
+            if pragma in self.settings and pragma not in skip:
+                conn.execute(f"PRAGMA {pragma} = {self.settings[pragma]}")
+
+    def __repr__(self):
+        return f"ConnectionProfile(db_path={self.db_path!r}, preset={self.preset!r}, settings={self.settings!r})"
+
+
+def load_profile(config_file=None, environ=None):
+    """Builds the connection profile from, in increasing priority: the preset, the
+    [database] section of the config file, and FMS_* environment variables.
+
+    The config file defaults to $FMS_CONFIG, then flight_management.ini in the
+    working directory; a missing file is simply skipped.
+    """
+    environ = os.environ if environ is None else environ
+    config_file = config_file or environ.get("FMS_CONFIG", DEFAULT_CONFIG_FILE)
+
+    values = {}
+    parser = configparser.ConfigParser()
+    if parser.read(config_file) and parser.has_section("database"):
+        values.update(parser["database"])
+    for variable, name in ENVIRONMENT.items():
+        if variable in environ:
+            values[name] = environ[variable]
+
+    db_path = values.pop("db_path", DEFAULT_DB_PATH)
+    preset = values.pop("preset", DEFAULT_PRESET)
+    return ConnectionProfile(db_path, preset, **values)
@@ -0,0 +1,221 @@
+import threading
+from collections import OrderedDict
+
+import changelog
+import queries
+
+# Keeps each IN (...) lookup well under SQLite's bound-parameter limit.
+LOOKUP_CHUNK = 500
+
+DEFAULT_MAX_DESTINATIONS = 10000
+DEFAULT_MAX_PILOTS = 50000
+
+DESTINATIONS_BY_ID_SQL = """
+    SELECT DestinationID, City, Country, AirportCode, TimeZone
+    FROM Destination
+    WHERE DestinationID IN ({})
+"""
+
+PILOTS_BY_ID_SQL = """
+    SELECT PilotID, FirstName || ' ' || LastName
+    FROM Pilot
+    WHERE PilotID IN ({})
+"""
+
+# Narrow Flight rows, decorated with city and pilot names from the cache instead
+# of joining Destination twice and Pilot once.
+_NARROW_COLUMNS = """
+    SELECT FlightNumber, PilotID, OriginID, DestinationID,
+           DepartureDate, DepartureTime, ArrivalDate, ArrivalTime, FlightStatus
+    FROM Flight
+"""
+
+NARROW_FLIGHTS_BY_STATUS_SQL = _NARROW_COLUMNS + """
+    WHERE FlightStatus = ?
+    ORDER BY DepartureDate, DepartureTime
+"""
+
+NARROW_PILOT_SCHEDULE_SQL = _NARROW_COLUMNS + """
+    WHERE PilotID = ?
+    ORDER BY DepartureDate, DepartureTime
+"""
+
+
+class DestinationInfo(queries.Record):
+    __slots__ = ("city", "country", "airport_code", "time_zone")
+
+
+class LRUCache:
+    """Thread-safe mapping of at most maxsize entries that evicts the least
+    recently used one, counting hits, misses and evictions.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_many(self, keys):
+        """Returns ({key: value} for cached keys, [keys that are not cached])."""
+        found, missing = {}, []
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+                else:
+                    missing.append(key)
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions,
+                    "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0}
+
+
+class DimensionCache:
+    """Read-through LRU caches of the Destination and Pilot tables.
+
+    Lookups take the connection to read misses from, so one cache can serve every
+    connection of a pool. Writes through queries.py invalidate the entries they
+    touch at once; catch_up() drops those changed by other processes.
+    """
+
+    def __init__(self, max_destinations=DEFAULT_MAX_DESTINATIONS, max_pilots=DEFAULT_MAX_PILOTS):
+        self.destination_cache = LRUCache(max_destinations)
+        self.pilot_cache = LRUCache(max_pilots)
+        self.position = None
+        queries.register_dimension_cache(self)
+
+    def _lookup(self, cache, conn, sql, keys, make):
+        found, missing = cache.get_many(keys)
+        for start in range(0, len(missing), LOOKUP_CHUNK):
+            chunk = missing[start:start + LOOKUP_CHUNK]
+            for row in conn.execute(sql.format(", ".join("?" * len(chunk))), chunk):
+                value = make(row)
+                cache.put(row[0], value)
+                found[row[0]] = value
+        return found
+
+    def destinations(self, conn, destination_ids):
+        """Returns {DestinationID: DestinationInfo} for the IDs that exist."""
+        return self._lookup(self.destination_cache, conn, DESTINATIONS_BY_ID_SQL, destination_ids,
+                            lambda row: DestinationInfo(*row[1:]))
+
+    def pilot_names(self, conn, pilot_ids):
+        """Returns {PilotID: 'First Last'} for the IDs that exist."""
+        return self._lookup(self.pilot_cache, conn, PILOTS_BY_ID_SQL, pilot_ids, lambda row: row[1])
+
+    def catch_up(self, conn):
+        """Drops the entries of Destination and Pilot rows changed since the last call,
+        by this or any other process, as recorded in changelog.ChangeLog.
+        """
+        if self.position is None:
+            self.position = changelog.current_seq(conn)
+            return
+        try:
+            keys, self.position = changelog.changed_keys(conn, self.position, ["Destination", "Pilot"])
+        except changelog.ChangeLogGap:
+            keys, self.position = {"Destination": None, "Pilot": None}, changelog.current_seq(conn)
+        for table, changed in keys.items():
+            if changed is None:
+                self.invalidate(table)
+            for key in changed or ():
+                self.invalidate(table, key)
+
+    def invalidate(self, table, key=None):
+        """Drops one entry of a table's cache, or all of them when key is None."""
+        cache = {"Destination": self.destination_cache, "Pilot": self.pilot_cache}.get(table)
+        if cache is None:
+            return
+        if key is None:
+            cache.clear()
+        else:
+            cache.discard(key)
+
+    def stats(self):
+        return {"Destination": self.destination_cache.stats(), "Pilot": self.pilot_cache.stats()}
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache():
+    """Returns the process-wide DimensionCache used when none is given."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = DimensionCache()
+        return _shared
+
+
+def _decorate(conn, cache, rows, build):
+    """Turns a batch of narrow Flight rows into records. Like the joins they replace,
+    rows whose airports are missing are dropped and a missing pilot is 'Unassigned'.
+    """
+    places = cache.destinations(conn, {row[2] for row in rows} | {row[3] for row in rows})
+    cities = {destination_id: place.city for destination_id, place in places.items()}
+    pilots = cache.pilot_names(conn, {row[1] for row in rows if row[1] is not None})
+    return [build(row, pilots.get(row[1], "Unassigned"), cities[row[2]], cities[row[3]])
+            for row in rows if row[2] in cities and row[3] in cities]
+
+
+def _listing(row, pilot, origin, destination):
+    return queries.FlightListing(row[0], pilot, origin, destination, *row[4:9])
+
+
+def _schedule_entry(row, pilot, origin, destination):
+    return queries.ScheduleEntry(row[0], row[4], row[5], row[6], row[7], origin, destination, row[8])
+
+
+def _records(conn, cursor, build, cache, batch_size):
+    cache = cache or shared_cache()
+    cache.catch_up(conn)
+    if batch_size is None:
+        return _decorate(conn, cache, cursor.fetchall(), build)
+    return _stream(conn, cursor, build, cache, batch_size)
+
+
+def _stream(conn, cursor, build, cache, batch_size):
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from _decorate(conn, cache, rows, build)
+    finally:
+        cursor.close()
+
+
+# Same results as the queries.py functions of the same name.
+
+def flights_by_status(conn, status, batch_size=None, cache=None):
+    return _records(conn, conn.execute(NARROW_FLIGHTS_BY_STATUS_SQL, (status,)), _listing, cache, batch_size)
+
+
+def pilot_schedule(conn, pilot_id, batch_size=None, cache=None):
+    return _records(conn, conn.execute(NARROW_PILOT_SCHEDULE_SQL, (pilot_id,)), _schedule_entry, cache, batch_size)
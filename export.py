@@ -0,0 +1,89 @@
+import csv
+import json
+import sys
+import time
+
+import queries
+
+DEFAULT_BATCH_SIZE = 1000
+
+# The "flights" report uses the bulk_import.IMPORT_FIELDS columns, so an export can be loaded
+# back with `main.py import`.
+EXPORT_FLIGHTS_SQL = """
+    SELECT f.FlightNumber, p.LicenseNumber, o.AirportCode AS OriginCode,
+        d.AirportCode AS DestinationCode, f.DepartureDate, f.DepartureTime,
+        f.ArrivalDate, f.ArrivalTime, f.FlightStatus, f.Distance, f.AircraftCode
+    FROM Flight f
+    LEFT JOIN Pilot p ON f.PilotID = p.PilotID
+    JOIN Destination o ON f.OriginID = o.DestinationID
+    JOIN Destination d ON f.DestinationID = d.DestinationID
+    ORDER BY f.DepartureDate, f.DepartureTime
+"""
+
+REPORTS = {
+    "flights": EXPORT_FLIGHTS_SQL,
+    "all": queries.ALL_FLIGHTS_SQL,
+    "details": queries.FLIGHT_DETAILS_SQL,
+}
+
+
+class ExportReport(queries.Record):
+    __slots__ = ("rows", "seconds", "first_row_seconds")
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def _write_csv(handle, columns, batches):
+    writer = csv.writer(handle)
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows(rows)
+        yield len(rows)
+
+
+def _write_jsonl(handle, columns, batches):
+    for rows in batches:
+        handle.write("".join(json.dumps(dict(zip(columns, row))) + "\n" for row in rows))
+        yield len(rows)
+
+
+WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl}
+
+
+def stream_report(conn, handle, report="flights", fmt="csv", batch_size=DEFAULT_BATCH_SIZE):
+    """Writes a report to an open text handle straight from the cursor, batch_size
+    rows at a time, and returns an ExportReport. first_row_seconds is how long the
+    first batch took to reach the handle.
+    """
+    if report not in REPORTS:
+        raise ValueError(f"Unknown report '{report}'; choose from {', '.join(REPORTS)}")
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported export format '{fmt}'")
+    started = time.perf_counter()
+    cursor = conn.execute(REPORTS[report])
+    columns = [column[0] for column in cursor.description]
+    batches = iter(lambda: cursor.fetchmany(batch_size), [])
+    rows, first_row_seconds = 0, None
+    try:
+        for written in WRITERS[fmt](handle, columns, batches):
+            if first_row_seconds is None:
+                handle.flush()
+                first_row_seconds = time.perf_counter() - started
+            rows += written
+    finally:
+        cursor.close()
+    return ExportReport(rows, round(time.perf_counter() - started, 3), round(first_row_seconds or 0.0, 4))
+
+
+def export_file(conn, path, report="flights", fmt=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Exports a report to a file, or to stdout when path is '-'. The format is taken
+    from the file extension unless fmt is given.
+    """
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".json")) else "csv")
+    if path == "-":
+        return stream_report(conn, sys.stdout, report, fmt, batch_size)
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        return stream_report(conn, handle, report, fmt, batch_size)
+
@@ -0,0 +1,107 @@
+import queries
+
+STATUSES = ("Scheduled", "Departed", "Delayed", "Cancelled", "Completed")
+
+# Allowed status changes. Completed and Cancelled are final.
+TRANSITIONS = {
+    "Scheduled": {"Delayed", "Departed", "Cancelled"},
+    "Delayed": {"Scheduled", "Departed", "Cancelled"},
+    "Departed": {"Completed"},
+    "Completed": set(),
+    "Cancelled": set(),
+}
+
+# Keeps each IN (...) lookup well under SQLite's bound-parameter limit.
+LOOKUP_CHUNK = 500
+
+STATUS_BY_ID_SQL = "SELECT FlightID, FlightID, FlightStatus FROM Flight WHERE FlightID IN ({})"
+
+STATUS_BY_NUMBER_SQL = "SELECT FlightNumber, FlightID, FlightStatus FROM Flight WHERE FlightNumber IN ({})"
+
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+REJECTED = "rejected"
+NOT_FOUND = "not_found"
+
+
+class StatusChange(queries.Record):
+    __slots__ = ("ref", "flight_id", "old_status", "new_status", "result", "reason")
+
+
+def normalize_status(status):
+    """Returns the canonical spelling of a status ("delayed" -> "Delayed")."""
+    return str(status).strip().capitalize()
+
+
+def can_transition(old_status, new_status):
+    return new_status in TRANSITIONS.get(old_status, ())
+
+
+def _load(conn, sql, keys):
+    """Maps each FlightID or FlightNumber in keys to (FlightID, FlightStatus), with
+    STATUS_BY_ID_SQL or STATUS_BY_NUMBER_SQL.
+    """
+    found = {}
+    keys = list(keys)
+    for start in range(0, len(keys), LOOKUP_CHUNK):
+        chunk = keys[start:start + LOOKUP_CHUNK]
+        for key, flight_id, status in conn.execute(sql.format(", ".join("?" * len(chunk))), chunk):
+            found[key] = (flight_id, status)
+    return found
+
+
+def update_statuses(conn, changes):
+    """Applies a batch of (flight, new status) changes in one transaction.
+
+    A flight is given by FlightID (int) or FlightNumber (str). Changes are checked
+    in order against TRANSITIONS, so one batch may move a flight through several
+    states; every accepted change is written with a single executemany. Returns a
+    StatusChange per input pair, in input order; a rejected pair never stops the rest.
+    """
+    changes = [(ref, normalize_status(status)) for ref, status in changes]
+    by_id = _load(conn, STATUS_BY_ID_SQL, {ref for ref, _ in changes if isinstance(ref, int)})
+    by_number = _load(conn, STATUS_BY_NUMBER_SQL, {ref for ref, _ in changes if not isinstance(ref, int)})
+
+    current = {}
+    final = {}
+    results = []
+    for ref, new_status in changes:
+        found = by_id.get(ref) if isinstance(ref, int) else by_number.get(ref)
+        if found is None:
+            results.append(StatusChange(ref, None, None, new_status, NOT_FOUND, "no such flight"))
+            continue
+        flight_id, stored_status = found
+        old_status = current.get(flight_id, stored_status)
+        if new_status not in STATUSES:
+            results.append(StatusChange(ref, flight_id, old_status, new_status, REJECTED,
+                                        f"unknown status '{new_status}'"))
+        elif new_status == old_status:
+            results.append(StatusChange(ref, flight_id, old_status, new_status, UNCHANGED, None))
+        elif not can_transition(old_status, new_status):
+            results.append(StatusChange(ref, flight_id, old_status, new_status, REJECTED,
+                                        f"cannot change {old_status} to {new_status}"))
+        else:
+            current[flight_id] = new_status
+            final[flight_id] = new_status
+            results.append(StatusChange(ref, flight_id, old_status, new_status, UPDATED, None))
+
+    try:
+        if final:
+            conn.executemany(queries.UPDATE_FLIGHT_STATUS_SQL,
+                             [(status, flight_id) for flight_id, status in final.items()])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return results
+
+
+def update_status(conn, flight, status):
+    """Changes one flight's status through update_statuses. Returns the number of
+    rows changed (0 when the flight already has the status) and raises ValueError
+    when the flight does not exist or the change is not allowed.
+    """
+    change = update_statuses(conn, [(flight, status)])[0]
+    if change.result in (REJECTED, NOT_FOUND):
+        raise ValueError(f"Flight status not updated: {change.reason}")
+    return 1 if change.result == UPDATED else 0
@@ -0,0 +1,168 @@
+import math
+import random
+import string
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from zoneinfo import ZoneInfo
+
+import queries
+
+CITY_WORDS = ["Port", "Saint", "New", "Lake", "North", "South", "East", "West", "Fort", "Mount",
+              "Bay", "River", "Glen", "Spring", "Harbor", "Rock", "Cedar", "Pine", "Oak", "Green"]
+CITY_SUFFIXES = ["ton", "ville", "burg", "field", "ford", "haven", "mouth", "stad", "polis", "dale"]
+COUNTRIES = ["UK", "USA", "UAE", "Japan", "France", "Australia", "Germany", "Canada", "Singapore",
+             "South Africa", "Brazil", "India", "China", "Spain", "Italy", "Mexico", "Kenya", "Norway"]
+
+FIRST_NAMES = ["Alice", "Brian", "Clara", "David", "Evelyn", "Frank", "Grace", "Henry", "Ivy", "Jack",
+               "Kemi", "Liam", "Maya", "Noah", "Olu", "Priya", "Quinn", "Ravi", "Sara", "Tomas"]
+LAST_NAMES = ["Johnson", "Smith", "Lee", "Brown", "Wilson", "Taylor", "Martins", "Lopez", "Nguyen",
+              "Owen", "Adeyemi", "Garcia", "Khan", "Muller", "Rossi", "Sato", "Silva", "Okafor"]
+RANKS = [("Captain", 4), ("First Officer", 5), ("Second Officer", 1)]
+AIRCRAFT = [("A320", 25), ("B737", 25), ("A321", 10), ("B787", 10), ("A350", 8),
+            ("B777", 10), ("A380", 4), ("E190", 8)]
+AIRLINES = ["BA", "EK", "AF", "QF", "DL", "LH", "SQ", "AC", "SA", "VA", "KL", "UA", "NH", "ET"]
+STATUSES = [("Scheduled", 55), ("Completed", 30), ("Delayed", 6), ("Departed", 4), ("Cancelled", 5)]
+
+# Airports are scattered around these (lat, lon) centres, and most flights stay
+# within one region, so short-haul routes dominate as they do in real schedules.
+REGIONS = [(51, 0), (48, 10), (40, -75), (34, -100), (45, -120), (25, 55), (35, 135),
+           (1, 104), (-33, 151), (-26, 28), (-15, -50), (20, 78)]
+REGION_ZONES = ["Europe/London", "Europe/Berlin", "America/New_York", "America/Chicago",
+                "America/Los_Angeles", "Asia/Dubai", "Asia/Tokyo", "Asia/Singapore",
+                "Australia/Sydney", "Africa/Johannesburg", "America/Sao_Paulo", "Asia/Kolkata"]
+DOMESTIC_RATIO = 0.75
+
+CRUISE_KMH = 800
+TAXI_MINUTES = 30
+
+
+def _weighted(rng, choices):
+    """Returns a function that draws from a list of (value, weight) pairs."""
+    values = [value for value, _ in choices]
+    cumulative = list(accumulate(weight for _, weight in choices))
+    return lambda: rng.choices(values, cum_weights=cumulative)[0]
+
+
+def _airport_code(index):
+    letters = string.ascii_uppercase
+    return letters[index // 676 % 26] + letters[index // 26 % 26] + letters[index % 26]
+
+
+def _distance_km(a, b):
+    """Great-circle distance between two (lat, lon) points, in whole kilometres."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return max(1, round(12742 * math.asin(math.sqrt(h))))
+
+
+def _destinations(rng, regions):
+    for i, region in enumerate(regions):
+        city = rng.choice(CITY_WORDS) + " " + rng.choice(CITY_WORDS) + rng.choice(CITY_SUFFIXES)
+        yield (city, rng.choice(COUNTRIES), _airport_code(i), REGION_ZONES[region],
+               f"Synthetic airport {i + 1}")
+
+
+def _pilots(rng, count, start):
+    rank = _weighted(rng, RANKS)
+    aircraft = _weighted(rng, AIRCRAFT)
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        license_expiry = start + timedelta(days=rng.randint(-90, 3 * 365))
+        certification_expiry = start + timedelta(days=rng.randint(-60, 2 * 365))
+        yield (first, last, rank(), f"LIC{i + 1:07d}", license_expiry.isoformat(), "Commercial",
+               aircraft(), certification_expiry.isoformat(),
+               f"{first.lower()}.{last.lower()}{i + 1}@example.com", f"{rng.randrange(10**9, 10**10)}")
+
+
+def _hub_weights(count):
+    # Hub airports get most of the traffic: popularity follows a Zipf-like curve.
+    return list(accumulate(1 / (rank + 1) ** 0.8 for rank in range(count)))
+
+
+def _flights(rng, count, airport_ids, regions, positions, pilot_ids, start, days, assigned_ratio):
+    hub_weights = _hub_weights(len(airport_ids))
+    by_region = {}
+    for airport_id in airport_ids:
+        by_region.setdefault(regions[airport_id], []).append(airport_id)
+    region_weights = {region: _hub_weights(len(ids)) for region, ids in by_region.items()}
+    status = _weighted(rng, STATUSES)
+    aircraft = _weighted(rng, AIRCRAFT)
+    zones = [ZoneInfo(name) for name in REGION_ZONES]
+    for i in range(count):
+        origin = rng.choices(airport_ids, cum_weights=hub_weights)[0]
+        region = regions[origin]
+        if len(by_region[region]) > 1 and rng.random() < DOMESTIC_RATIO:
+            candidates, weights = by_region[region], region_weights[region]
+        else:
+            candidates, weights = airport_ids, hub_weights
+        destination = origin
+        while destination == origin:
+            destination = rng.choices(candidates, cum_weights=weights)[0]
+        distance = _distance_km(positions[origin], positions[destination])
+        # Departures cluster in the daytime bank between 06:00 and 22:00 local time;
+        # arrivals are given in the destination's local time.
+        minute = min(int(rng.triangular(300, 1380, 720)), 1439)
+        departure = (start + timedelta(days=rng.randrange(days), minutes=minute)).replace(tzinfo=zones[region])
+        block = timedelta(minutes=TAXI_MINUTES + round(distance / CRUISE_KMH * 60))
+        arrival = (departure.astimezone(timezone.utc) + block).astimezone(zones[regions[destination]])
+        pilot_id = rng.choice(pilot_ids) if pilot_ids and rng.random() < assigned_ratio else None
+        yield (f"{rng.choice(AIRLINES)}{i + 1:07d}", pilot_id, origin, destination,
+               departure.strftime("%Y-%m-%d"), departure.strftime("%H:%M"),
+               arrival.strftime("%Y-%m-%d"), arrival.strftime("%H:%M"),
+               status(), distance, aircraft(), int(departure.timestamp()), int(arrival.timestamp()))
+
+
+def _insert(conn, sql, rows, batch_size):
+    total = 0
+    for batch in queries.batched(rows, batch_size):
+        conn.executemany(sql, batch)
+        total += len(batch)
+    return total
+
+
+def generate(conn, airports=1000, pilots=20000, flights=100000, seed=42,
+             start_date="2025-07-01", days=365, assigned_ratio=0.9, batch_size=10000):
+    """Fills an empty database with a reproducible synthetic data set and returns the
+    number of rows inserted per table. The same seed always yields the same rows.
+    Raises ValueError if the database already has destinations, pilots or flights,
+    whose codes and numbers the generated ones could collide with.
+    """
+    if airports > 26 ** 3:
+        raise ValueError(f"At most {26 ** 3} airports can be given unique codes")
+    for table in ("Destination", "Pilot", "Flight"):
+        if conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+            raise ValueError(f"The database already has {table} rows; generate needs an empty "
+                             f"database (reset it first)")
+    rng = random.Random(seed)
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    counts = {}
+    started = time.perf_counter()
+
+    try:
+        airport_regions = [rng.randrange(len(REGIONS)) for _ in range(airports)]
+        counts["Destination"] = _insert(conn, queries.INSERT_DESTINATION_SQL,
+                                        _destinations(rng, airport_regions), batch_size)
+        counts["Pilot"] = _insert(conn, queries.INSERT_PILOT_SQL,
+                                  _pilots(rng, pilots, start.date()), batch_size)
+
+        airport_ids = [row[0] for row in conn.execute("SELECT DestinationID FROM Destination ORDER BY DestinationID")]
+        pilot_ids = [row[0] for row in conn.execute("SELECT PilotID FROM Pilot")]
+        regions = dict(zip(airport_ids, airport_regions))
+        positions = {}
+        for airport_id, region in regions.items():
+            lat, lon = REGIONS[region]
+            positions[airport_id] = (lat + rng.gauss(0, 6), lon + rng.gauss(0, 8))
+        rng.shuffle(airport_ids)
+
+        counts["Flight"] = _insert(conn, queries.INSERT_FLIGHT_SQL,
+                                   _flights(rng, flights, airport_ids, regions, positions, pilot_ids,
+                                            start, days, assigned_ratio), batch_size)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    counts["seconds"] = round(time.perf_counter() - started, 2)
+    return counts
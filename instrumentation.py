@@ -0,0 +1,378 @@
+import contextvars
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+import queries
+
+# Statement timing is opt-in: with the connection profile's `instrument` setting
+# (FMS_INSTRUMENT=1) connections are InstrumentedConnection objects that time every
+# statement, fetch and commit into the process-wide QueryStats. Otherwise they are
+# plain sqlite3 connections and nothing here runs.
+
+# Upper bounds of the latency histogram buckets in milliseconds; the last bucket
+# is open-ended.
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+DEFAULT_SLOW_QUERY_MS = 100
+
+# Only the most recent slow statements are kept.
+SLOW_LOG_SIZE = 100
+
+UNATTRIBUTED = "(none)"
+
+# The operation whose statements are being timed in this thread / task.
+_current_call = contextvars.ContextVar("current_call", default=None)
+
+
+class Histogram:
+    """Latency counts per BUCKETS_MS bucket, with their total and maximum."""
+
+    __slots__ = ("counts", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile, capped at the maximum."""
+        rank, running = self.count * p / 100, 0
+        for index, count in enumerate(self.counts):
+            running += count
+            if count and running >= rank:
+                return min(BUCKETS_MS[index], self.max) if index < len(BUCKETS_MS) else self.max
+        return 0.0
+
+
+class OperationStats:
+    __slots__ = ("latency", "statements", "rows", "commits", "commit_ms")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.statements = 0
+        self.rows = 0
+        self.commits = 0
+        self.commit_ms = 0.0
+
+
+class StatementStats:
+    __slots__ = ("latency", "rows")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.rows = 0
+
+
+class SlowQuery(queries.Record):
+    __slots__ = ("operation", "sql", "params", "ms", "rows", "plan")
+
+
+class _Call:
+    """Database time spent by one call of an operation so far."""
+
+    __slots__ = ("name", "ms", "statements", "rows", "commits", "commit_ms")
+
+    def __init__(self, name):
+        self.name = name
+        self.ms = 0.0
+        self.statements = 0
+        self.rows = 0
+        self.commits = 0
+        self.commit_ms = 0.0
+
+
+class QueryStats:
+    """Thread-safe collector of per-operation and per-statement latencies, row counts,
+    commit times and the slow query log.
+
+    An operation's latency is the database time (statements, fetches and commits)
+    of one call, not its wall-clock time, so menu options that wait for input are
+    measured fairly.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.operations = {}
+            self.statements = {}
+            self.slow_queries = deque(maxlen=SLOW_LOG_SIZE)
+            self.started = time.time()
+
+    def record_statement(self, sql, ms, rows):
+        with self._lock:
+            stats = self.statements.get(sql)
+            if stats is None:
+                stats = self.statements[sql] = StatementStats()
+            stats.latency.add(ms)
+            stats.rows += rows
+        call = _current_call.get()
+        if call is None:
+            # Outside any operation each statement counts as a call of its own.
+            call = _Call(UNATTRIBUTED)
+            call.ms, call.statements, call.rows = ms, 1, rows
+            return self.record_call(call)
+        call.ms += ms
+        call.statements += 1
+        call.rows += rows
+
+    def record_commit(self, ms):
+        call = _current_call.get()
+        if call is None:
+            call = _Call(UNATTRIBUTED)
+            call.ms, call.commits, call.commit_ms = ms, 1, ms
+            return self.record_call(call)
+        call.ms += ms
+        call.commits += 1
+        call.commit_ms += ms
+
+    def record_call(self, call):
+        with self._lock:
+            stats = self.operations.get(call.name)
+            if stats is None:
+                stats = self.operations[call.name] = OperationStats()
+            stats.latency.add(call.ms)
+            stats.statements += call.statements
+            stats.rows += call.rows
+            stats.commits += call.commits
+            stats.commit_ms += call.commit_ms
+
+    def record_slow(self, sql, params, ms, rows, plan):
+        call = _current_call.get()
+        with self._lock:
+            self.slow_queries.append(SlowQuery(call.name if call else UNATTRIBUTED, sql, params,
+                                               round(ms, 3), rows, plan))
+
+
+_shared = QueryStats()
+
+
+def shared_stats():
+    """Returns the process-wide QueryStats that instrumented connections report to."""
+    return _shared
+
+
+@contextmanager
+def operation(name, stats=None):
+    """Attributes the statements run inside the block to the named operation. Nested
+    blocks count towards the outermost one.
+    """
+    if _current_call.get() is not None:
+        yield
+        return
+    call = _Call(name)
+    token = _current_call.set(call)
+    try:
+        yield
+    finally:
+        _current_call.reset(token)
+        (stats or shared_stats()).record_call(call)
+
+
+def instrument_methods(obj):
+    """Wraps each public method of obj in an operation named after it."""
+    for name in dir(type(obj)):
+        method = getattr(obj, name)
+        if name.startswith("_") or not callable(method):
+            continue
+        setattr(obj, name, _as_operation(name, method))
+
+
+def _as_operation(name, method):
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        with operation(name):
+            return method(*args, **kwargs)
+    return wrapper
+
+
+def _normalize(sql):
+    return " ".join(sql.split())
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times each statement from execute until its rows are used up, the
+    cursor is closed or reused, or it is garbage collected. Time spent by the caller
+    between fetches is not counted.
+    """
+
+    _sql = None
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._begin(sql, parameters, started)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        first = []
+
+        def remember_first(rows):
+            for parameters in rows:
+                if not first:
+                    first.append(parameters)
+                yield parameters
+
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, remember_first(seq_of_parameters))
+        finally:
+            self._begin(sql, first[0] if first else (), started)
+
+    def _begin(self, sql, parameters, started):
+        self._sql, self._params = sql, parameters
+        self._ms = (time.perf_counter() - started) * 1000
+        self._rows = 0
+        if self.description is None:
+            self._rows = max(self.rowcount, 0)
+            self._finish()
+
+    def _finish(self):
+        sql, self._sql = self._sql, None
+        if sql is None:
+            return
+        conn = self.connection
+        conn.stats.record_statement(_normalize(sql), self._ms, self._rows)
+        if self._ms >= conn.slow_query_ms:
+            conn.stats.record_slow(_normalize(sql), self._params, self._ms, self._rows,
+                                   explain(conn, sql, self._params))
+
+    def _timed(self, fetch, *args):
+        started = time.perf_counter()
+        result = fetch(*args)
+        if self._sql is not None:
+            self._ms += (time.perf_counter() - started) * 1000
+        return result
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        elif self._sql is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._timed(super().fetchmany, size)
+        if self._sql is not None:
+            self._rows += len(rows)
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        if self._sql is not None:
+            self._rows += len(rows)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._timed(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        if self._sql is not None:
+            self._rows += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3 connection whose statements and commits are timed into a QueryStats."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = shared_stats()
+        self.slow_query_ms = DEFAULT_SLOW_QUERY_MS
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        started = time.perf_counter()
+        super().commit()
+        self.stats.record_commit((time.perf_counter() - started) * 1000)
+
+
+def explain(conn, sql, parameters=()):
+    """Returns the EXPLAIN QUERY PLAN detail lines for a statement as run with the
+    given parameters, or [] for statements that have no plan.
+    """
+    try:
+        cursor = sqlite3.Cursor(conn)
+        return [row[3] for row in cursor.execute("EXPLAIN QUERY PLAN " + sql, parameters)]
+    except sqlite3.Error:
+        return []
+
+
+def print_stats(stats=None, statements=15):
+    """Prints the per-operation and slowest-statement tables and the slow query log."""
+    from tabulate import tabulate
+
+    stats = stats or shared_stats()
+    with stats._lock:
+        operations = sorted(stats.operations.items(), key=lambda item: -item[1].latency.total)
+        slowest = sorted(stats.statements.items(), key=lambda item: -item[1].latency.total)[:statements]
+        slow_queries = list(stats.slow_queries)
+    if not operations and not slowest:
+        print("No statements recorded yet.")
+        return
+
+    print("\n********** Database Time per Operation (ms) **********")
+    print(tabulate([(name, s.latency.count, round(s.latency.total, 1), round(s.latency.percentile(50), 2),
+                     round(s.latency.percentile(95), 2), round(s.latency.percentile(99), 2), round(s.latency.max, 1),
+                     s.statements, s.rows, s.commits, round(s.commit_ms, 1)) for name, s in operations],
+                   headers=["Operation", "Calls", "Total", "p50", "p95", "p99", "Max",
+                            "Statements", "Rows", "Commits", "Commit Total"], tablefmt="grid"))
+
+    print(f"\n********** Top {len(slowest)} Statements by Total Time (ms) **********")
+    print(tabulate([(sql[:70] + ("..." if len(sql) > 70 else ""), s.latency.count, round(s.latency.total, 1),
+                     round(s.latency.percentile(95), 2), round(s.latency.max, 1), s.rows) for sql, s in slowest],
+                   headers=["Statement", "Calls", "Total", "p95", "Max", "Rows"], tablefmt="grid"))
+
+    if slow_queries:
+        print(f"\n********** Slow Queries (last {len(slow_queries)}) **********")
+        for query in slow_queries:
+            print(f"\n{query.ms} ms, {query.rows} rows, in {query.operation}: {query.sql}")
+            if query.params:
+                print(f"  params: {query.params}")
+            for detail in query.plan:
+                print(f"  plan: {detail}")
@@ -1,3 +1,8 @@
+import argparse
+import json
+import sys
+
+import commands
 from services import FlightService
 from sample_data import sample_data
 
@@ -26,6 +31,9 @@ def main():
         print("16. View All Flights")
         print("17. Insert sample data ")
         print("18. Reset Database")
+        print("19. Show Name Cache Statistics")
+        print("20. Show Query Timing Statistics")
+        print("21. Search Flights, Pilots and Destinations")
 
         print("0. Exit")
 
@@ -88,6 +96,15 @@ def main():
         elif choice == '18':
             service.reset_database()  
 
+        elif choice == '19':
+            service.show_cache_stats()
+
+        elif choice == '20':
+            service.show_query_stats()
+
+        elif choice == '21':
+            service.search()
+
         elif choice == '0':
             print("Exiting system. Goodbye!")
             break
@@ -101,5 +118,70 @@ def main():
             print("Thank you for using Bukola's Flight Management System. Goodbye!")
             break
 
+def build_parser():
+    """Builds the parser for the non-interactive subcommands."""
+    parser = argparse.ArgumentParser(description="Bukola's Flight Management System")
+    parser.add_argument("--db", help="SQLite database file (defaults to the connection profile's path)")
+    parser.add_argument("--stats", action="store_true",
+                        help="time every statement and print query statistics after the command")
+    parser.add_argument("--slow-ms", type=int, help="with --stats, log statements slower than this (default 100)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_commands(subcommands)
+
+    batch_parser = subcommands.add_parser("batch", help="Run one command per line from a file or stdin "
+                                                        "over one connection")
+    batch_parser.add_argument("path", nargs="?", default="-", help="command file; - for stdin")
+    batch_parser.add_argument("--group-size", type=int, default=commands.DEFAULT_GROUP_SIZE,
+                              help="commands per transaction (default 100)")
+    batch_parser.add_argument("--stop-on-error", action="store_true",
+                              help="stop at the first failing command, keeping the ones before it")
+
+    return parser
+
+
+def run_command(argv):
+    """Runs a single subcommand without the interactive menu."""
+    args = build_parser().parse_args(argv)
+    if args.stats:
+        from db_config import load_profile
+        from instrumentation import operation, print_stats
+        profile = load_profile()
+        profile.settings["instrument"] = 1
+        if args.slow_ms is not None:
+            profile.settings["slow_query_ms"] = args.slow_ms
+        service = FlightService(args.db, profile)
+        with operation(args.command):
+            status = _run(service, args)
+        print_stats()
+        return status
+    return _run(FlightService(args.db), args)
+
+
+def _run(service, args):
+    """Runs the parsed subcommand against the service and returns the exit status."""
+    if args.command in commands.COMMANDS:
+        try:
+            commands.render(commands.run(service.conn, args), args.json, commands.result_file(args))
+        except Exception as e:
+            if args.json:
+                print(json.dumps({"error": str(e)}))
+            else:
+                print(f"Error running {args.command}:", e, file=sys.stderr)
+            return 1
+
+    elif args.command == "batch":
+        handle = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8")
+        with handle:
+            ran, failed = commands.run_batch(service.conn, handle, args.group_size, args.stop_on_error, args.json)
+        if not args.json:
+            print(f"Ran {ran} commands, {failed} failed.", file=sys.stderr)
+        return 1 if failed else 0
+
+    return 0
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_command(sys.argv[1:]))
     main()
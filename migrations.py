@@ -0,0 +1,72 @@
+from aggregates import create_aggregates
+from changelog import create_change_log
+from search import create_search_index
+from timezones import create_utc_times
+
+
+def _add_flight_indexes(cursor):
+    """Adds composite indexes matching the access paths used by the flight reports."""
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_flight_status_departure
+        ON Flight (FlightStatus, DepartureDate, DepartureTime)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_flight_pilot_departure
+        ON Flight (PilotID, DepartureDate, DepartureTime)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_flight_destination
+        ON Flight (DestinationID, Distance)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_flight_origin
+        ON Flight (OriginID)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_flight_departure
+        ON Flight (DepartureDate, DepartureTime)
+    """)
+
+
+def _add_aircraft_code(cursor):
+    """Records which aircraft type operates each flight, for pilot certification checks."""
+    cursor.execute("ALTER TABLE Flight ADD COLUMN AircraftCode TEXT")
+
+
+def _add_change_log_time_index(cursor):
+    """Lets compaction find the last entry before its retention cutoff without a scan."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_log_changed_at ON ChangeLog (ChangedAt)")
+
+
+# Each migration is (version, description, function). Versions must only ever be
+# appended; the database records the last one applied in PRAGMA user_version.
+MIGRATIONS = [
+    (1, "Flight access-path indexes", _add_flight_indexes),
+    (2, "Per-destination and per-pilot stats tables with triggers", create_aggregates),
+    (3, "Flight aircraft code", _add_aircraft_code),
+    (4, "IANA time zones and indexed UTC departure/arrival times", create_utc_times),
+    (5, "Append-only ChangeLog of Flight, Pilot and Destination changes", create_change_log),
+    (6, "FTS5 trigram search index over flights, pilots and destinations", create_search_index),
+    (7, "ChangeLog index on ChangedAt", _add_change_log_time_index),
+]
+
+
+def get_schema_version(conn):
+    """Returns the schema version currently recorded in the database."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(conn):
+    """Applies every migration newer than the database's schema version, in order."""
+    cursor = conn.cursor()
+    current = get_schema_version(conn)
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            migrate(cursor)
+            cursor.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
@@ -0,0 +1,98 @@
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+import assignments
+import flight_status
+import queries
+from services import FlightService
+
+READ_OPERATIONS = (
+    "flights_by_status", "pilot_schedule", "flight_details", "all_flights", "flight_by_number",
+    "flight_summary", "flight_count_by_destination", "average_distance_by_destination",
+    "flights_per_pilot", "total_distance_by_pilot",
+    "flights_departing_between", "flights_arriving_between", "flights_departing_within",
+    "all_flights_page", "flight_details_page",
+)
+
+WRITE_OPERATIONS = (
+    "add_flight", "update_flight_status", "assign_pilot", "remove_pilot", "add_pilot",
+    "add_destination", "update_destination_notes", "delete_flight_by_number", "reset",
+)
+
+# Writes that go through the same checks as the console instead of straight to queries.
+VALIDATED_WRITES = {
+    "update_flight_status": flight_status.update_status,
+    "assign_pilot": assignments.assign_pilot,
+}
+
+
+class ConnectionPool:
+    """Thread-safe access to the flight database.
+
+    Each thread reading through the pool gets its own read-only (mode=ro)
+    connection, opened on first use. All writes go through one shared writer
+    connection and are serialized by a lock, matching SQLite's single-writer model;
+    with the WAL journal readers keep running while a write is in progress.
+
+    The functions in queries.py are available as methods, e.g.
+    pool.flights_by_status("Delayed") or pool.update_flight_status(12, "Departed").
+    Status changes and pilot assignments are checked first, like in the console, and
+    raise ValueError when they are not allowed.
+    Streamed results (batch_size=...) must be consumed on the thread that asked for them.
+    """
+
+    def __init__(self, db_path=None, profile=None):
+        self._service = FlightService(db_path, profile, check_same_thread=False)
+        self.profile = self._service.profile
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def reader(self):
+        """Returns the calling thread's read-only connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self.profile.connect_read_only(check_same_thread=False)
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    @contextmanager
+    def writer(self):
+        """Holds the write lock and yields the shared writer connection."""
+        with self._write_lock:
+            yield self._service.conn
+
+    def read(self, func, *args, **kwargs):
+        """Calls func(conn, *args, **kwargs) with this thread's read-only connection."""
+        return func(self.reader(), *args, **kwargs)
+
+    def write(self, func, *args, **kwargs):
+        """Calls func(conn, *args, **kwargs) with the writer connection, under the lock."""
+        with self.writer() as conn:
+            return func(conn, *args, **kwargs)
+
+    def __getattr__(self, name):
+        if name in READ_OPERATIONS:
+            return partial(self.read, getattr(queries, name))
+        if name in WRITE_OPERATIONS:
+            return partial(self.write, VALIDATED_WRITES.get(name) or getattr(queries, name))
+        raise AttributeError(f"{type(self).__name__} has no attribute '{name}'")
+
+    def close(self):
+        """Closes every reader connection and the writer."""
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+        with self._write_lock:
+            self._service.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
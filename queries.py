@@ -0,0 +1,598 @@
+import time
+import weakref
+from itertools import islice
+
+from timezones import flight_utc_times, normalize_zone, to_epoch
+
+
+class Record:
+    """Lightweight read-only row. Subclasses list their column names in __slots__."""
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __iter__(self):
+        return (getattr(self, name) for name in self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __getitem__(self, index):
+        return getattr(self, self.__slots__[index])
+
+    def __eq__(self, other):
+        return type(self) is type(other) and tuple(self) == tuple(other)
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Flight(Record):
+    __slots__ = ("flight_id", "flight_number", "pilot_id", "origin_id", "destination_id",
+                 "departure_date", "departure_time", "arrival_date", "arrival_time",
+                 "status", "distance", "aircraft_code", "departure_utc", "arrival_utc")
+
+
+class FlightListing(Record):
+    __slots__ = ("flight_number", "pilot", "origin", "destination",
+                 "departure_date", "departure_time", "arrival_date", "arrival_time", "status")
+
+
+class ScheduleEntry(Record):
+    __slots__ = ("flight_number", "departure_date", "departure_time",
+                 "arrival_date", "arrival_time", "origin", "destination", "status")
+
+
+class FlightDetail(Record):
+    __slots__ = ("flight_number", "departure_date", "pilot", "origin", "destination", "status")
+
+
+class Page(Record):
+    """One page of a keyset-paginated listing. first_key and last_key are the
+    (DepartureDate, DepartureTime, FlightID) keys to pass as before / after.
+    """
+    __slots__ = ("rows", "first_key", "last_key", "has_previous", "has_next")
+
+
+class CityStat(Record):
+    __slots__ = ("city", "value")
+
+
+class PilotStat(Record):
+    __slots__ = ("pilot", "value")
+
+
+# Every statement the service runs is kept here so tests/test_query_plans.py can
+# check each one with EXPLAIN QUERY PLAN.
+# DepartureUTC and ArrivalUTC are computed by the caller (see timezones.py).
+INSERT_FLIGHT_SQL = """
+    INSERT INTO Flight (
+        FlightNumber, PilotID, OriginID, DestinationID,
+        DepartureDate, DepartureTime, ArrivalDate, ArrivalTime,
+        FlightStatus, Distance, AircraftCode, DepartureUTC, ArrivalUTC
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+FLIGHT_ZONES_SQL = "SELECT DestinationID, TimeZone FROM Destination WHERE DestinationID IN (?, ?)"
+
+FLIGHTS_BY_STATUS_SQL = """
+    SELECT 
+        f.FlightNumber,
+        IFNULL(p.FirstName || ' ' || p.LastName, 'Unassigned') AS Pilot,
+        o.City AS Origin,
+        d.City AS Destination,
+        f.DepartureDate,
+        f.DepartureTime,
+        f.ArrivalDate,
+        f.ArrivalTime,
+        f.FlightStatus
+    FROM Flight f
+    LEFT JOIN Pilot p ON f.PilotID = p.PilotID
+    JOIN Destination o ON f.OriginID = o.DestinationID
+    JOIN Destination d ON f.DestinationID = d.DestinationID
+    WHERE f.FlightStatus = ?
+    ORDER BY f.DepartureDate, f.DepartureTime
+"""
+
+UPDATE_FLIGHT_STATUS_SQL = "UPDATE Flight SET FlightStatus = ? WHERE FlightID = ?"
+
+ASSIGN_PILOT_SQL = "UPDATE Flight SET PilotID = ? WHERE FlightID = ?"
+
+ASSIGN_PILOT_IF_UNASSIGNED_SQL = "UPDATE Flight SET PilotID = ? WHERE FlightID = ? AND PilotID IS NULL"
+
+REMOVE_PILOT_SQL = "UPDATE Flight SET PilotID = NULL WHERE FlightID = ?"
+
+PILOT_SCHEDULE_SQL = """
+    SELECT 
+        f.FlightNumber,
+        f.DepartureDate,
+        f.DepartureTime,
+        f.ArrivalDate,
+        f.ArrivalTime,
+        o.City AS Origin,
+        d.City AS Destination,
+        f.FlightStatus
+    FROM Flight f
+    JOIN Destination o ON f.OriginID = o.DestinationID
+    JOIN Destination d ON f.DestinationID = d.DestinationID
+    WHERE f.PilotID = ?
+    ORDER BY f.DepartureDate, f.DepartureTime
+"""
+
+INSERT_DESTINATION_SQL = """
+    INSERT INTO Destination (City, Country, AirportCode, TimeZone, Notes)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+INSERT_PILOT_SQL = """
+    INSERT INTO Pilot (
+        FirstName, LastName, Rank, LicenseNumber, LicenseExpiry, FlightType,
+        CertifiedAircraftCode, CertificationExpiry, Email, PhoneNumber
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+UPDATE_DESTINATION_NOTES_SQL = "UPDATE Destination SET Notes = ? WHERE DestinationID = ?"
+
+FLIGHT_DETAILS_SQL = """
+    SELECT 
+        f.FlightNumber,
+        f.DepartureDate,
+        IFNULL(p.FirstName || ' ' || p.LastName, 'Unassigned') AS Pilot,
+        o.City AS OriginCity,
+        d.City AS DestinationCity,
+        f.FlightStatus
+    FROM 
+        Flight f
+    LEFT JOIN 
+        Pilot p ON f.PilotID = p.PilotID
+    JOIN 
+        Destination o ON f.OriginID = o.DestinationID
+    JOIN 
+        Destination d ON f.DestinationID = d.DestinationID
+    ORDER BY 
+        f.DepartureDate, f.DepartureTime
+"""
+
+# The per-destination and per-pilot reports read the trigger-maintained stats
+# tables (see aggregates.py) rather than grouping Flight on every call.
+FLIGHT_SUMMARY_SQL = """
+    SELECT 
+        d.City,
+        SUM(s.FlightCount) AS TotalFlights
+    FROM 
+        DestinationStats s
+    JOIN 
+        Destination d ON s.DestinationID = d.DestinationID
+    WHERE 
+        s.FlightCount > 0
+    GROUP BY 
+        d.City
+    ORDER BY 
+        TotalFlights DESC
+"""
+
+# Time-window queries range-scan the UTC epoch indexes (see timezones.py).
+FLIGHTS_DEPARTING_BETWEEN_SQL = """
+    SELECT 
+        f.FlightNumber,
+        IFNULL(p.FirstName || ' ' || p.LastName, 'Unassigned') AS Pilot,
+        o.City AS Origin,
+        d.City AS Destination,
+        f.DepartureDate,
+        f.DepartureTime,
+        f.ArrivalDate,
+        f.ArrivalTime,
+        f.FlightStatus
+    FROM Flight f
+    LEFT JOIN Pilot p ON f.PilotID = p.PilotID
+    JOIN Destination o ON f.OriginID = o.DestinationID
+    JOIN Destination d ON f.DestinationID = d.DestinationID
+    WHERE f.DepartureUTC >= ? AND f.DepartureUTC < ?
+    ORDER BY f.DepartureUTC
+"""
+
+FLIGHTS_ARRIVING_BETWEEN_SQL = """
+    SELECT 
+        f.FlightNumber,
+        IFNULL(p.FirstName || ' ' || p.LastName, 'Unassigned') AS Pilot,
+        o.City AS Origin,
+        d.City AS Destination,
+        f.DepartureDate,
+        f.DepartureTime,
+        f.ArrivalDate,
+        f.ArrivalTime,
+        f.FlightStatus
+    FROM Flight f
+    LEFT JOIN Pilot p ON f.PilotID = p.PilotID
+    JOIN Destination o ON f.OriginID = o.DestinationID
+    JOIN Destination d ON f.DestinationID = d.DestinationID
+    WHERE f.ArrivalUTC >= ? AND f.ArrivalUTC < ?
+    ORDER BY f.ArrivalUTC
+"""
+
+FLIGHT_BY_NUMBER_SQL = "SELECT * FROM Flight WHERE FlightNumber = ?"
+
+DELETE_FLIGHT_BY_NUMBER_SQL = "DELETE FROM Flight WHERE FlightNumber = ?"
+
+FLIGHTS_PER_PILOT_SQL = """
+    SELECT 
+        IFNULL(p.FirstName || ' ' || p.LastName, 'Unassigned') AS Pilot,
+        s.FlightCount AS FlightCount
+    FROM PilotStats s
+    LEFT JOIN Pilot p ON s.PilotID = p.PilotID
+    WHERE s.FlightCount > 0
+    ORDER BY FlightCount DESC
+"""
+
+AVERAGE_DISTANCE_BY_DESTINATION_SQL = """
+    SELECT 
+        d.City,
+        ROUND(CAST(SUM(s.TotalDistance) AS REAL) / SUM(s.FlightCount), 2) AS AvgDistance
+    FROM DestinationStats s
+    JOIN Destination d ON s.DestinationID = d.DestinationID
+    WHERE s.FlightCount > 0
+    GROUP BY d.City
+    ORDER BY AvgDistance DESC
+"""
+
+TOTAL_DISTANCE_BY_PILOT_SQL = """
+    SELECT 
+        IFNULL(p.FirstName || ' ' || p.LastName, 'Unassigned') AS Pilot,
+        s.TotalDistance AS TotalDistance
+    FROM PilotStats s
+    LEFT JOIN Pilot p ON s.PilotID = p.PilotID
+    WHERE s.FlightCount > 0
+    ORDER BY TotalDistance DESC
+"""
+
+FLIGHT_COUNT_BY_DESTINATION_SQL = """
+    SELECT 
+        d.City,
+        SUM(s.FlightCount) AS FlightCount
+    FROM DestinationStats s
+    JOIN Destination d ON s.DestinationID = d.DestinationID
+    WHERE s.FlightCount > 0
+    GROUP BY d.City
+    ORDER BY FlightCount DESC
+"""
+
+ALL_FLIGHTS_SQL = """
+    SELECT f.FlightNumber, IFNULL(p.FirstName || ' ' || p.LastName, 'Unassigned') AS Pilot, 
+        o.City AS Origin, d.City AS Destination, 
+        f.DepartureDate, f.DepartureTime, 
+        f.ArrivalDate, f.ArrivalTime, f.FlightStatus 
+    FROM Flight f 
+    LEFT JOIN Pilot p ON f.PilotID = p.PilotID 
+    JOIN Destination o ON f.OriginID = o.DestinationID 
+    JOIN Destination d ON f.DestinationID = d.DestinationID
+    ORDER BY f.DepartureDate, f.DepartureTime
+"""
+
+# Keyset pagination: each page seeks past the (DepartureDate, DepartureTime,
+# FlightID) key of the previous one through idx_flight_departure, so page N costs
+# the same as page 1. The last two columns of every row are its key.
+ALL_FLIGHTS_AFTER_SQL = """
+    SELECT f.FlightNumber, IFNULL(p.FirstName || ' ' || p.LastName, 'Unassigned') AS Pilot, 
+        o.City AS Origin, d.City AS Destination, 
+        f.DepartureDate, f.DepartureTime, 
+        f.ArrivalDate, f.ArrivalTime, f.FlightStatus,
+        f.DepartureTime, f.FlightID
+    FROM Flight f 
+    LEFT JOIN Pilot p ON f.PilotID = p.PilotID 
+    JOIN Destination o ON f.OriginID = o.DestinationID 
+    JOIN Destination d ON f.DestinationID = d.DestinationID
+    WHERE (f.DepartureDate, f.DepartureTime, f.FlightID) > (?, ?, ?)
+    ORDER BY f.DepartureDate, f.DepartureTime, f.FlightID
+    LIMIT ?
+"""
+
+ALL_FLIGHTS_BEFORE_SQL = """
+    SELECT f.FlightNumber, IFNULL(p.FirstName || ' ' || p.LastName, 'Unassigned') AS Pilot, 
+        o.City AS Origin, d.City AS Destination, 
+        f.DepartureDate, f.DepartureTime, 
+        f.ArrivalDate, f.ArrivalTime, f.FlightStatus,
+        f.DepartureTime, f.FlightID
+    FROM Flight f 
+    LEFT JOIN Pilot p ON f.PilotID = p.PilotID 
+    JOIN Destination o ON f.OriginID = o.DestinationID 
+    JOIN Destination d ON f.DestinationID = d.DestinationID
+    WHERE (f.DepartureDate, f.DepartureTime, f.FlightID) < (?, ?, ?)
+    ORDER BY f.DepartureDate DESC, f.DepartureTime DESC, f.FlightID DESC
+    LIMIT ?
+"""
+
+FLIGHT_DETAILS_AFTER_SQL = """
+    SELECT 
+        f.FlightNumber,
+        f.DepartureDate,
+        IFNULL(p.FirstName || ' ' || p.LastName, 'Unassigned') AS Pilot,
+        o.City AS OriginCity,
+        d.City AS DestinationCity,
+        f.FlightStatus,
+        f.DepartureTime,
+        f.FlightID
+    FROM 
+        Flight f
+    LEFT JOIN 
+        Pilot p ON f.PilotID = p.PilotID
+    JOIN 
+        Destination o ON f.OriginID = o.DestinationID
+    JOIN 
+        Destination d ON f.DestinationID = d.DestinationID
+    WHERE (f.DepartureDate, f.DepartureTime, f.FlightID) > (?, ?, ?)
+    ORDER BY f.DepartureDate, f.DepartureTime, f.FlightID
+    LIMIT ?
+"""
+
+FLIGHT_DETAILS_BEFORE_SQL = """
+    SELECT 
+        f.FlightNumber,
+        f.DepartureDate,
+        IFNULL(p.FirstName || ' ' || p.LastName, 'Unassigned') AS Pilot,
+        o.City AS OriginCity,
+        d.City AS DestinationCity,
+        f.FlightStatus,
+        f.DepartureTime,
+        f.FlightID
+    FROM 
+        Flight f
+    LEFT JOIN 
+        Pilot p ON f.PilotID = p.PilotID
+    JOIN 
+        Destination o ON f.OriginID = o.DestinationID
+    JOIN 
+        Destination d ON f.DestinationID = d.DestinationID
+    WHERE (f.DepartureDate, f.DepartureTime, f.FlightID) < (?, ?, ?)
+    ORDER BY f.DepartureDate DESC, f.DepartureTime DESC, f.FlightID DESC
+    LIMIT ?
+"""
+
+
+def _records(cursor, record_type, batch_size=None):
+    """Wraps cursor rows in records. With no batch_size every row is fetched into a
+    list; otherwise a generator is returned that pulls rows with fetchmany.
+    """
+    if batch_size is None:
+        return [record_type(*row) for row in cursor.fetchall()]
+    return _stream(cursor, record_type, batch_size)
+
+
+def _stream(cursor, record_type, batch_size):
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield record_type(*row)
+    finally:
+        cursor.close()
+
+
+def batched(records, size):
+    """Groups any iterable of records into lists of at most size items."""
+    iterator = iter(records)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+# ---- Reads ----
+
+def flights_by_status(conn, status, batch_size=None):
+    """Returns FlightListing records with the given status, ordered by departure."""
+    return _records(conn.execute(FLIGHTS_BY_STATUS_SQL, (status,)), FlightListing, batch_size)
+
+
+def pilot_schedule(conn, pilot_id, batch_size=None):
+    """Returns ScheduleEntry records for every flight assigned to the pilot."""
+    return _records(conn.execute(PILOT_SCHEDULE_SQL, (pilot_id,)), ScheduleEntry, batch_size)
+
+
+def flight_details(conn, batch_size=None):
+    """Returns a FlightDetail record for every flight, ordered by departure."""
+    return _records(conn.execute(FLIGHT_DETAILS_SQL), FlightDetail, batch_size)
+
+
+def all_flights(conn, batch_size=None):
+    """Returns a FlightListing record for every flight, ordered by departure."""
+    return _records(conn.execute(ALL_FLIGHTS_SQL), FlightListing, batch_size)
+
+
+def flights_departing_between(conn, start, end, batch_size=None):
+    """Returns FlightListing records departing in [start, end), given as epoch seconds
+    or datetimes (naive means UTC), ordered by actual departure instant.
+    """
+    return _records(conn.execute(FLIGHTS_DEPARTING_BETWEEN_SQL, (to_epoch(start), to_epoch(end))),
+                    FlightListing, batch_size)
+
+
+def flights_arriving_between(conn, start, end, batch_size=None):
+    """Returns FlightListing records arriving in [start, end), ordered by arrival instant."""
+    return _records(conn.execute(FLIGHTS_ARRIVING_BETWEEN_SQL, (to_epoch(start), to_epoch(end))),
+                    FlightListing, batch_size)
+
+
+def flights_departing_within(conn, hours, now=None, batch_size=None):
+    """Returns FlightListing records departing in the next `hours` hours from now."""
+    start = to_epoch(now) if now is not None else int(time.time())
+    return flights_departing_between(conn, start, start + int(hours * 3600), batch_size)
+
+
+# Start key that sorts before every flight.
+FIRST_KEY = ("", "", 0)
+
+DEFAULT_PAGE_SIZE = 20
+
+
+def _page(conn, after_sql, before_sql, record_type, after, before, size):
+    width = len(record_type.__slots__)
+    if before is not None:
+        rows = conn.execute(before_sql, (*before, size + 1)).fetchall()
+        has_previous, has_next = len(rows) > size, True
+        rows = rows[:size][::-1]
+    else:
+        rows = conn.execute(after_sql, (*(after or FIRST_KEY), size + 1)).fetchall()
+        has_previous, has_next = after is not None, len(rows) > size
+        rows = rows[:size]
+    key = lambda row: (row[record_type.__slots__.index("departure_date")], row[width], row[width + 1])
+    return Page([record_type(*row[:width]) for row in rows],
+                key(rows[0]) if rows else None, key(rows[-1]) if rows else None,
+                has_previous and bool(rows), has_next and bool(rows))
+
+
+def all_flights_page(conn, after=None, before=None, size=DEFAULT_PAGE_SIZE):
+    """Returns a Page of FlightListing records in departure order: the first page,
+    the page after key `after`, or the page before key `before`.
+    """
+    return _page(conn, ALL_FLIGHTS_AFTER_SQL, ALL_FLIGHTS_BEFORE_SQL, FlightListing, after, before, size)
+
+
+def flight_details_page(conn, after=None, before=None, size=DEFAULT_PAGE_SIZE):
+    """Returns a Page of FlightDetail records; see all_flights_page."""
+    return _page(conn, FLIGHT_DETAILS_AFTER_SQL, FLIGHT_DETAILS_BEFORE_SQL, FlightDetail, after, before, size)
+
+
+def flight_by_number(conn, flight_number):
+    """Returns the Flight with the given flight number, or None."""
+    row = conn.execute(FLIGHT_BY_NUMBER_SQL, (flight_number,)).fetchone()
+    return Flight(*row) if row else None
+
+
+def flight_summary(conn):
+    """Returns CityStat records of total flights per destination city."""
+    return _records(conn.execute(FLIGHT_SUMMARY_SQL), CityStat)
+
+
+def flight_count_by_destination(conn):
+    """Returns CityStat records of flight counts per destination city."""
+    return _records(conn.execute(FLIGHT_COUNT_BY_DESTINATION_SQL), CityStat)
+
+
+def average_distance_by_destination(conn):
+    """Returns CityStat records of average distance (km) per destination city."""
+    return _records(conn.execute(AVERAGE_DISTANCE_BY_DESTINATION_SQL), CityStat)
+
+
+def flights_per_pilot(conn):
+    """Returns PilotStat records of flight counts per pilot ('Unassigned' for none)."""
+    return _records(conn.execute(FLIGHTS_PER_PILOT_SQL), PilotStat)
+
+
+def total_distance_by_pilot(conn):
+    """Returns PilotStat records of total distance (km) per pilot."""
+    return _records(conn.execute(TOTAL_DISTANCE_BY_PILOT_SQL), PilotStat)
+
+
+# ---- Writes ----
+# Each write commits on success, like the console operations always have.
+
+# Caches of the Destination and Pilot tables (dimensions.DimensionCache) register
+# here; every write to those tables below invalidates the entries it touches.
+_dimension_caches = weakref.WeakSet()
+
+
+def register_dimension_cache(cache):
+    _dimension_caches.add(cache)
+
+
+def _dimension_changed(table, key=None):
+    for cache in list(_dimension_caches):
+        cache.invalidate(table, key)
+
+
+def add_flight(conn, flight_number, pilot_id, origin_id, destination_id,
+               departure_date, departure_time, arrival_date, arrival_time,
+               status, distance, aircraft_code=None):
+    """Inserts a flight and returns its new FlightID."""
+    zones = dict(conn.execute(FLIGHT_ZONES_SQL, (origin_id, destination_id)))
+    cursor = conn.execute(INSERT_FLIGHT_SQL, (
+        flight_number, pilot_id, origin_id, destination_id,
+        departure_date, departure_time, arrival_date, arrival_time,
+        status, distance, aircraft_code,
+        *flight_utc_times(zones, origin_id, destination_id, departure_date, departure_time,
+                          arrival_date, arrival_time)
+    ))
+    conn.commit()
+    return cursor.lastrowid
+
+
+def update_flight_status(conn, flight_id, status):
+    """Sets the status of a flight. Returns the number of rows changed."""
+    cursor = conn.execute(UPDATE_FLIGHT_STATUS_SQL, (status, flight_id))
+    conn.commit()
+    return cursor.rowcount
+
+
+def assign_pilot(conn, flight_id, pilot_id):
+    """Assigns a pilot to a flight. Returns the number of rows changed."""
+    cursor = conn.execute(ASSIGN_PILOT_SQL, (pilot_id, flight_id))
+    conn.commit()
+    return cursor.rowcount
+
+
+def remove_pilot(conn, flight_id):
+    """Clears the pilot of a flight. Returns the number of rows changed."""
+    cursor = conn.execute(REMOVE_PILOT_SQL, (flight_id,))
+    conn.commit()
+    return cursor.rowcount
+
+
+def add_destination(conn, city, country, airport_code, time_zone=None, notes=None):
+    """Inserts a destination and returns its new DestinationID. The time zone may be
+    an IANA name or a legacy abbreviation such as 'CET'.
+    """
+    cursor = conn.execute(INSERT_DESTINATION_SQL,
+                          (city, country, airport_code, normalize_zone(time_zone, country), notes))
+    conn.commit()
+    _dimension_changed("Destination", cursor.lastrowid)
+    return cursor.lastrowid
+
+
+def add_pilot(conn, first_name, last_name, rank, license_number, license_expiry, flight_type,
+              certified_aircraft_code, certification_expiry, email=None, phone_number=None):
+    """Inserts a pilot and returns the new PilotID."""
+    cursor = conn.execute(INSERT_PILOT_SQL, (
+        first_name, last_name, rank, license_number, license_expiry, flight_type,
+        certified_aircraft_code, certification_expiry, email, phone_number
+    ))
+    conn.commit()
+    _dimension_changed("Pilot", cursor.lastrowid)
+    return cursor.lastrowid
+
+
+def update_destination_notes(conn, destination_id, notes):
+    """Replaces the notes of a destination. Returns the number of rows changed."""
+    cursor = conn.execute(UPDATE_DESTINATION_NOTES_SQL, (notes, destination_id))
+    conn.commit()
+    _dimension_changed("Destination")
+    return cursor.rowcount
+
+
+def delete_flight_by_number(conn, flight_number):
+    """Deletes a flight by flight number. Returns the number of rows deleted."""
+    cursor = conn.execute(DELETE_FLIGHT_BY_NUMBER_SQL, (flight_number,))
+    conn.commit()
+    return cursor.rowcount
+
+
+def reset(conn):
+    """Deletes all flights, pilots and destinations and restarts their IDs at 1, by
+    copying an empty database over this one (see snapshots.reset).
+    """
+    from snapshots import reset as reset_to_empty
+    return reset_to_empty(conn)
@@ -0,0 +1,353 @@
+import changelog
+import queries
+from timezones import to_epoch
+
+# NumPy is loaded with the first RouteNetwork, as in analytics.py.
+np = None
+
+
+def _import_numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise RuntimeError("Route search needs NumPy; install it with 'pip install numpy'.")
+        np = numpy
+
+# Flights that can still be booked. Times are the indexed UTC epochs, so rows
+# without a known time zone are left out.
+TIMETABLE_SQL = """
+    SELECT FlightID, OriginID, DestinationID, DepartureUTC, ArrivalUTC, Distance
+    FROM Flight
+    WHERE FlightStatus IN ('Scheduled', 'Delayed') AND ArrivalUTC > DepartureUTC
+"""
+
+CHANGED_TIMETABLE_SQL = TIMETABLE_SQL + " AND FlightID IN ({})"
+
+AIRPORTS_SQL = "SELECT DestinationID, AirportCode, TimeZone FROM Destination"
+
+FLIGHT_NUMBERS_SQL = "SELECT FlightID, FlightNumber FROM Flight WHERE FlightID IN ({})"
+
+# (name, dtype) of each timetable column, in TIMETABLE_SQL order.
+COLUMNS = (
+    ("flight_id", "int64"),
+    ("origin", "int64"),
+    ("destination", "int64"),
+    ("departure", "int64"),
+    ("arrival", "int64"),
+    ("distance", "int64"),
+)
+
+LOAD_BATCH_SIZE = 100000
+
+LOOKUP_CHUNK = 500
+
+DEFAULT_MIN_CONNECTION_MINUTES = 45
+DEFAULT_MAX_HOURS = 48
+DEFAULT_MAX_LEGS = 4
+
+# A search first looks at the flights departing within FIRST_WINDOW_HOURS and
+# doubles the window until the destination is reached.
+FIRST_WINDOW_HOURS = 24
+
+# Changed flights are kept in a small overlay timetable; once they exceed this
+# fraction of the main one, both are rebuilt as one.
+REBUILD_RATIO = 0.02
+
+# Larger than any epoch or total distance, but still safe to add to.
+NEVER = 2 ** 40 - 1
+
+
+class Leg(queries.Record):
+    __slots__ = ("flight_id", "flight_number", "origin", "destination", "departure_utc", "arrival_utc", "distance")
+
+
+class Itinerary(queries.Record):
+    __slots__ = ("legs", "departure_utc", "arrival_utc", "distance")
+
+    @property
+    def hours(self):
+        return round((self.arrival_utc - self.departure_utc) / 3600, 2)
+
+    def as_dict(self):
+        values = super().as_dict()
+        values["legs"] = [leg.as_dict() for leg in self.legs]
+        return values
+
+
+def _to_columns(rows):
+    data = np.array(rows, dtype=np.int64).reshape(-1, len(COLUMNS))
+    return {name: data[:, i] for i, (name, _) in enumerate(COLUMNS)}
+
+
+class _Timetable:
+    """Flights sorted by departure, so the flights a search can use are one slice."""
+
+    def __init__(self, columns):
+        order = np.argsort(columns["departure"], kind="stable")
+        for name, _ in COLUMNS:
+            setattr(self, name, columns[name][order])
+        self.size = len(order)
+        self.dead = np.zeros(self.size, dtype=bool)
+        self.dead_count = 0
+        self.id_order = np.argsort(self.flight_id, kind="stable")
+
+    def kill(self, flight_ids):
+        """Marks flights as no longer bookable, e.g. after they were changed or cancelled."""
+        ids = np.fromiter(flight_ids, dtype=np.int64)
+        if not self.size or not len(ids):
+            return
+        sorted_ids = self.flight_id[self.id_order]
+        found = np.minimum(np.searchsorted(sorted_ids, ids), self.size - 1)
+        self.dead[self.id_order[found[sorted_ids[found] == ids]]] = True
+        self.dead_count = int(self.dead.sum())
+
+    def window(self, start, end):
+        """Returns the columns of the live flights departing in [start, end)."""
+        low, high = np.searchsorted(self.departure, (start, end))
+        columns = {name: getattr(self, name)[low:high] for name, _ in COLUMNS}
+        if self.dead_count:
+            live = ~self.dead[low:high]
+            columns = {name: values[live] for name, values in columns.items()}
+        return columns
+
+
+class RouteNetwork:
+    """In-memory timetable of the bookable flights for connection searches.
+
+    Searches are round-based connection scans: every round passes over all flights
+    of the search window at once (vectorized) and extends the itineraries found so
+    far by one flight, so a search costs a few passes over the flights departing in
+    its window, whatever the size of the whole schedule. Changes are read from
+    changelog.ChangeLog before every search: changed flights are dropped from the
+    timetable and their current version goes into a small overlay, which is folded
+    back in once it grows past REBUILD_RATIO.
+    """
+
+    def __init__(self, conn):
+        _import_numpy()
+        self.conn = conn
+        self.timetable = None
+        self.overlay = None
+        self.overlay_rows = {}
+        self.change_seq = None
+        self.rebuilds = 0
+        self.flights_patched = 0
+
+    # ---- Loading ----
+
+    def refresh(self):
+        """Brings the timetable up to date; returns the number of flights re-read."""
+        latest = changelog.current_seq(self.conn)
+        if self.timetable is None or latest < self.change_seq:
+            return self._rebuild(latest)
+        if latest == self.change_seq:
+            return 0
+        try:
+            keys, latest = changelog.changed_keys(self.conn, self.change_seq, ["Flight", "Destination"])
+        except changelog.ChangeLogGap:
+            return self._rebuild(changelog.current_seq(self.conn))
+        if "Destination" in keys:
+            # A new TimeZone moves the UTC times of the airport's flights, which the
+            # log records as a Destination change only; other edits, such as notes or
+            # a new airport code, only need the airport maps re-read.
+            zones = self.zones
+            self._load_airports()
+            if self.zones != zones:
+                return self._rebuild(latest)
+        changed = sorted(keys.get("Flight", ()))
+        if len(self.overlay_rows.keys() | set(changed)) > REBUILD_RATIO * max(self.timetable.size, 1):
+            return self._rebuild(latest)
+        self.timetable.kill(changed)
+        for flight_id in changed:
+            self.overlay_rows.pop(flight_id, None)
+        for start in range(0, len(changed), LOOKUP_CHUNK):
+            chunk = changed[start:start + LOOKUP_CHUNK]
+            for row in self.conn.execute(CHANGED_TIMETABLE_SQL.format(", ".join("?" * len(chunk))), chunk):
+                self.overlay_rows[row[0]] = row
+        rows = list(self.overlay_rows.values())
+        self.overlay = _Timetable(_to_columns(rows)) if rows else None
+        self.change_seq = latest
+        self.flights_patched += len(changed)
+        return len(changed)
+
+    def _load_airports(self):
+        airports = self.conn.execute(AIRPORTS_SQL).fetchall()
+        self.codes = {destination_id: code for destination_id, code, _ in airports}
+        self.zones = {destination_id: zone for destination_id, _, zone in airports}
+        self.airports = {code.upper(): destination_id for destination_id, code, _ in airports if code}
+        self.nodes = max(self.codes, default=0) + 1
+
+    def _rebuild(self, latest):
+        self._load_airports()
+        cursor = self.conn.execute(TIMETABLE_SQL)
+        parts = []
+        while True:
+            rows = cursor.fetchmany(LOAD_BATCH_SIZE)
+            if not rows:
+                break
+            parts.append(_to_columns(rows))
+        self.timetable = _Timetable({name: np.concatenate([part[name] for part in parts]) if parts
+                                     else np.zeros(0, dtype=dtype) for name, dtype in COLUMNS})
+        self.overlay = None
+        self.overlay_rows = {}
+        self.change_seq = latest
+        self.rebuilds += 1
+        return self.timetable.size
+
+    # ---- Helpers ----
+
+    def _node(self, airport):
+        if isinstance(airport, int) and airport in self.codes:
+            return airport
+        node = self.airports.get(str(airport).upper())
+        if node is None:
+            raise ValueError(f"Unknown airport '{airport}'")
+        return node
+
+    def _endpoints(self, origin, destination):
+        self.refresh()
+        source, target = self._node(origin), self._node(destination)
+        if source == target:
+            raise ValueError("Origin and destination are the same airport")
+        return source, target
+
+    def _window(self, start, end):
+        tables = [table for table in (self.timetable, self.overlay) if table is not None]
+        parts = [table.window(start, end) for table in tables]
+        if len(parts) == 1:
+            return parts[0]
+        return {name: np.concatenate([part[name] for part in parts]) for name, _ in COLUMNS}
+
+    def _last_departure(self):
+        return max([int(table.departure[-1]) for table in (self.timetable, self.overlay)
+                    if table is not None and table.size] or [0])
+
+    def _itinerary(self, flights, path):
+        """Builds an Itinerary from the window positions of its flights, in travel order."""
+        ids = [int(flights["flight_id"][i]) for i in path]
+        numbers = dict(self.conn.execute(FLIGHT_NUMBERS_SQL.format(", ".join("?" * len(ids))), ids))
+        legs = [Leg(flight_id, numbers.get(flight_id), self.codes.get(int(flights["origin"][i])),
+                    self.codes.get(int(flights["destination"][i])), int(flights["departure"][i]),
+                    int(flights["arrival"][i]), int(flights["distance"][i]))
+                for flight_id, i in zip(ids, path)]
+        return Itinerary(legs, legs[0].departure_utc, legs[-1].arrival_utc, sum(leg.distance for leg in legs))
+
+    # ---- Searches ----
+
+    def earliest_arrival(self, origin, destination, depart_after,
+                         min_connection_minutes=DEFAULT_MIN_CONNECTION_MINUTES):
+        """Returns the Itinerary that reaches destination soonest, leaving origin at or
+        after depart_after (epoch seconds or datetime) with at least
+        min_connection_minutes between flights, or None when there is none.
+        """
+        source, target = self._endpoints(origin, destination)
+        start, connection = to_epoch(depart_after), int(min_connection_minutes * 60)
+        last, hours = self._last_departure(), FIRST_WINDOW_HOURS
+        while True:
+            end = start + hours * 3600
+            flights = self._window(start, end)
+            path = self._earliest_path(flights, source, target, start, connection)
+            # Any flight departing after the window also arrives after it, so an
+            # arrival by `end` is the earliest overall; a later one may be beaten by
+            # flights the window left out, unless it already holds every flight.
+            if path is not None and (flights["arrival"][path[-1]] <= end or end > last):
+                return self._itinerary(flights, path)
+            if end > last:
+                return None
+            hours *= 2
+
+    def _earliest_path(self, flights, source, target, start, connection):
+        """Round k finds the earliest arrival at every airport with at most k flights;
+        the rounds stop when no airport improves.
+        """
+        origin, destination = flights["origin"], flights["destination"]
+        departure, arrival = flights["departure"], flights["arrival"]
+        reached = np.full(self.nodes, NEVER)
+        reached[source] = start - connection
+        via = np.full(self.nodes, -1)
+        while True:
+            usable = ((departure >= reached[origin] + connection) & (arrival < reached[destination])
+                      & (arrival < reached[target]))
+            if not usable.any():
+                break
+            improved = reached.copy()
+            np.minimum.at(improved, destination[usable], arrival[usable])
+            picks = np.flatnonzero(usable & (arrival == improved[destination]))
+            via[destination[picks]] = picks
+            reached = improved
+        if reached[target] == NEVER:
+            return None
+        # Each flight's origin was reached before it departed, so the walk ends at source.
+        path, node = [], target
+        while node != source:
+            path.append(int(via[node]))
+            node = int(origin[path[-1]])
+        return path[::-1]
+
+    def shortest_distance(self, origin, destination, depart_after,
+                          min_connection_minutes=DEFAULT_MIN_CONNECTION_MINUTES,
+                          max_hours=DEFAULT_MAX_HOURS, max_legs=DEFAULT_MAX_LEGS):
+        """Returns the Itinerary with the least total distance that leaves origin at or
+        after depart_after, arrives within max_hours of it and has at most max_legs
+        flights, or None when there is none.
+        """
+        source, target = self._endpoints(origin, destination)
+        start, connection = to_epoch(depart_after), int(min_connection_minutes * 60)
+        deadline = start + int(max_hours * 3600)
+        flights = self._window(start, deadline)
+        arrives = flights["arrival"] <= deadline
+        flights = {name: values[arrives] for name, values in flights.items()}
+        path = self._shortest_path(flights, source, target, connection, max_legs)
+        return self._itinerary(flights, path) if path is not None else None
+
+    def _shortest_path(self, flights, source, target, connection, max_legs):
+        """Time-expanded shortest path: total[c] is the least distance of an itinerary
+        ending with flight c, and round k lets it use at most k flights. A flight can
+        follow any flight into its origin that lands connection seconds before it
+        departs, so each round takes a running minimum over the flights into every
+        airport in arrival order.
+        """
+        origin, destination = flights["origin"], flights["destination"]
+        departure, arrival, distance = flights["departure"], flights["arrival"], flights["distance"]
+        if not len(origin):
+            return None
+        total = np.where(origin == source, distance, NEVER)
+        parents = [np.full(len(origin), -1)]
+        # (airport, time) pairs pack into one int64, which sorts much faster than a lexsort.
+        landing = (destination << 32) | arrival
+        by_arrival = np.argsort(landing)
+        landed = destination[by_arrival]
+        # before[c]: the last flight (in by_arrival order) c can connect from, if it
+        # lands at c's origin. Searching for the keys in order is several times faster.
+        ready = (origin << 32) | (departure - connection)
+        by_ready = np.argsort(ready)
+        before = np.empty(len(origin), dtype=np.int64)
+        before[by_ready] = np.searchsorted(landing[by_arrival], ready[by_ready], side="right") - 1
+        connects = (before >= 0) & (landed[np.maximum(before, 0)] == origin)
+        before = np.maximum(before, 0)
+        positions = np.arange(len(origin))
+        for _ in range(max_legs - 1):
+            ordered = total[by_arrival]
+            # Offsetting by airport keeps earlier airports' totals out of the minimum.
+            running = np.minimum.accumulate(((self.nodes - landed) << 40) | ordered) & NEVER
+            running_at = np.maximum.accumulate(np.where(ordered == running, positions, -1))
+            candidate = np.where(connects, np.minimum(running[before] + distance, NEVER), NEVER)
+            better = candidate < total
+            if not better.any():
+                break
+            parent = parents[-1].copy()
+            parent[better] = by_arrival[running_at[before[better]]]
+            parents.append(parent)
+            total = np.where(better, candidate, total)
+        ends = np.flatnonzero((destination == target) & (total < NEVER))
+        if not len(ends):
+            return None
+        flight, path = int(ends[np.argmin(total[ends])]), []
+        for parent in reversed(parents):
+            path.append(flight)
+            flight = int(parent[flight])
+            if flight < 0:
+                break
+        return path[::-1]
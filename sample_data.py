@@ -1,19 +1,21 @@
 import sqlite3
 
+from timezones import fill_utc_times
+
 def sample_data(cursor,conn):
 
     # Sample Destinations
     destinations = [
-        ('London', 'UK', 'LHR', 'GMT', 'Heathrow Airport'),
-        ('New York', 'USA', 'JFK', 'EST', 'John F. Kennedy International'),
-        ('Dubai', 'UAE', 'DXB', 'GST', 'Dubai International Airport'),
-        ('Tokyo', 'Japan', 'HND', 'JST', 'Tokyo Haneda Airport'),
-        ('Paris', 'France', 'CDG', 'CET', 'Charles de Gaulle Airport'),
-        ('Sydney', 'Australia', 'SYD', 'AEST', 'Sydney Kingsford Smith Airport'),
-        ('Frankfurt', 'Germany', 'FRA', 'CET', 'Frankfurt Main Airport'),
-        ('Toronto', 'Canada', 'YYZ', 'EST', 'Toronto Pearson Airport'),
-        ('Singapore', 'Singapore', 'SIN', 'SGT', 'Changi Airport'),
-        ('Johannesburg', 'South Africa', 'JNB', 'SAST', 'OR Tambo International Airport')
+        ('London', 'UK', 'LHR', 'Europe/London', 'Heathrow Airport'),
+        ('New York', 'USA', 'JFK', 'America/New_York', 'John F. Kennedy International'),
+        ('Dubai', 'UAE', 'DXB', 'Asia/Dubai', 'Dubai International Airport'),
+        ('Tokyo', 'Japan', 'HND', 'Asia/Tokyo', 'Tokyo Haneda Airport'),
+        ('Paris', 'France', 'CDG', 'Europe/Paris', 'Charles de Gaulle Airport'),
+        ('Sydney', 'Australia', 'SYD', 'Australia/Sydney', 'Sydney Kingsford Smith Airport'),
+        ('Frankfurt', 'Germany', 'FRA', 'Europe/Berlin', 'Frankfurt Main Airport'),
+        ('Toronto', 'Canada', 'YYZ', 'America/Toronto', 'Toronto Pearson Airport'),
+        ('Singapore', 'Singapore', 'SIN', 'Asia/Singapore', 'Changi Airport'),
+        ('Johannesburg', 'South Africa', 'JNB', 'Africa/Johannesburg', 'OR Tambo International Airport')
     ]
 
     # Sample Pilots
@@ -47,6 +49,7 @@ def sample_data(cursor,conn):
     cursor.executemany("INSERT INTO Destination (city, country, airportCode, timeZone, notes) VALUES (?, ?, ?, ?, ?)", destinations)
     cursor.executemany("INSERT INTO Pilot (FirstName, LastName, Rank, LicenseNumber, LicenseExpiry, FlightType, CertifiedAircraftCode, CertificationExpiry, Email, PhoneNumber) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", pilots)
     cursor.executemany("INSERT INTO Flight (flightNumber, pilotID, OriginID, DestinationID, departureDate, departureTime, arrivalDate, arrivalTime, flightStatus, distance) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", flights)
+    fill_utc_times(cursor)
     
     conn.commit()
     print("Sample data inserted successfully.")
@@ -0,0 +1,241 @@
+import string
+
+import queries
+
+# SearchIndex is an FTS5 table with the trigram tokenizer, so any run of three or
+# more characters is an index lookup: prefixes, substrings and, by splitting a
+# query into pieces, candidates for typo-tolerant matches. Triggers keep it in step
+# with the searched tables. Each row's rowid packs the source row: key * 4 + kind.
+KINDS = ("flight", "pilot", "destination")
+
+# (kind, table, key column, label columns)
+SOURCES = (
+    ("flight", "Flight", "FlightID", ("FlightNumber",)),
+    ("pilot", "Pilot", "PilotID", ("FirstName", "LastName", "LicenseNumber")),
+    ("destination", "Destination", "DestinationID", ("City", "Country", "AirportCode")),
+)
+
+DEFAULT_LIMIT = 20
+
+# The trigram index needs three characters. Shorter texts, e.g. the airline prefix
+# "LH", are matched as prefixes of flight numbers and airport codes only, through
+# the unique indexes on those columns.
+MIN_QUERY_LENGTH = 3
+CODE_COLUMNS = {"flight": "FlightNumber", "destination": "AirportCode"}
+
+# Rows read from the index per phase before ranking.
+CANDIDATES = 100
+
+# Characters tried in place of a typo when a query is too short to find its
+# candidates by unchanged pieces alone.
+ALPHABET = string.ascii_lowercase + string.digits
+
+
+def _label(columns, row=""):
+    return " || ' ' || ".join(f"IFNULL({row}{column}, '')" for column in columns)
+
+
+SEARCH_INDEX_SQL = ["CREATE VIRTUAL TABLE IF NOT EXISTS SearchIndex USING fts5(Label, tokenize = 'trigram')"]
+for _code, (_kind, _table, _key, _columns) in enumerate(SOURCES):
+    SEARCH_INDEX_SQL += [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{_table.lower()}_search_insert AFTER INSERT ON {_table} BEGIN
+            INSERT INTO SearchIndex (rowid, Label) VALUES (NEW.{_key} * 4 + {_code}, {_label(_columns, 'NEW.')});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{_table.lower()}_search_update
+        AFTER UPDATE OF {_key}, {', '.join(_columns)} ON {_table} BEGIN
+            DELETE FROM SearchIndex WHERE rowid = OLD.{_key} * 4 + {_code};
+            INSERT INTO SearchIndex (rowid, Label) VALUES (NEW.{_key} * 4 + {_code}, {_label(_columns, 'NEW.')});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{_table.lower()}_search_delete AFTER DELETE ON {_table} BEGIN
+            DELETE FROM SearchIndex WHERE rowid = OLD.{_key} * 4 + {_code};
+        END
+        """,
+        f"INSERT OR IGNORE INTO SearchIndex (rowid, Label) SELECT {_key} * 4 + {_code}, {_label(_columns)} FROM {_table}",
+    ]
+
+# LIKE is served by the trigram index as long as the pattern has three characters in
+# a row and no ESCAPE clause (with one, every row is scanned); texts containing % or _
+# skip this phase.
+PREFIX_SQL = "SELECT rowid, Label FROM SearchIndex WHERE Label LIKE ? {} LIMIT ?"
+
+MATCH_SQL = "SELECT rowid, Label FROM SearchIndex WHERE SearchIndex MATCH ? {} LIMIT ?"
+
+# kind -> range scan of the unique index on its code column, for texts too short for MATCH.
+CODE_PREFIX_SQL = {
+    _kind: f"""
+        SELECT {_key} * 4 + {_code}, {_label(_columns)} FROM {_table}
+        WHERE {CODE_COLUMNS[_kind]} >= ? AND {CODE_COLUMNS[_kind]} < ?
+        ORDER BY {CODE_COLUMNS[_kind]} LIMIT ?
+    """
+    for _code, (_kind, _table, _key, _columns) in enumerate(SOURCES) if _kind in CODE_COLUMNS
+}
+
+
+class SearchResult(queries.Record):
+    """score 0: the query starts a word of the label; 1: it appears inside one;
+    1 + n: it matches with n typos.
+    """
+    __slots__ = ("kind", "key", "label", "score")
+
+
+def create_search_index(cursor):
+    """Creates SearchIndex and its triggers and indexes the existing rows."""
+    for statement in SEARCH_INDEX_SQL:
+        cursor.execute(statement)
+
+
+def _phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _kind_filter(kinds):
+    if not kinds:
+        return ""
+    codes = [KINDS.index(kind) for kind in kinds]
+    return f"AND rowid % 4 IN ({', '.join(str(code) for code in codes)})"
+
+
+def _pieces(query, typos):
+    """Texts of three or more characters, one of which appears unchanged in any run
+    within typos edits of query: typos + 1 disjoint pieces, plus each pair of
+    neighbours with the characters either side of their boundary swapped. A query
+    too short to split has its one-edit variants instead, with every character of
+    ALPHABET in the edited place where the rest is too short to look up alone.
+    """
+    count = typos + 1
+    if len(query) >= MIN_QUERY_LENGTH * count:
+        size, extra = divmod(len(query), count)
+        bounds = [0]
+        for i in range(count):
+            bounds.append(bounds[-1] + size + (i < extra))
+        pieces = {query[start:end] for start, end in zip(bounds, bounds[1:])}
+        for start, middle, end in zip(bounds, bounds[1:], bounds[2:]):
+            swapped = query[:middle - 1] + query[middle] + query[middle - 1] + query[middle + 1:]
+            pieces.update((swapped[start:middle], swapped[middle:end]))
+        return pieces
+    pieces = {query[:i] + query[i + 1] + query[i] + query[i + 2:] for i in range(len(query) - 1)}
+    pieces.update(query[:i] + query[i + 1:] for i in range(len(query)))
+    # (text before, text after) a replaced character, then an inserted one
+    edits = [(query[:i], query[i + 1:]) for i in range(len(query))]
+    edits += [(query[:i], query[i:]) for i in range(len(query) + 1)]
+    for before, after in edits:
+        if max(len(before), len(after)) >= MIN_QUERY_LENGTH:
+            pieces.add(max(before, after, key=len))
+        else:
+            pieces.update(before + char + after for char in ALPHABET)
+    return {piece for piece in pieces if len(piece) >= MIN_QUERY_LENGTH}
+
+
+def _is_code(word):
+    return word.isupper() or any(char.isdigit() for char in word)
+
+
+def _distance(query, target, limit, whole):
+    """Fewest edits (a swap of neighbours counting as one) turning query into target
+    or, unless whole, into a prefix of target at least as long as query; anything
+    above limit counts as limit + 1.
+    """
+    # Rows of the edit table, kept to the band of cells within limit of the
+    # diagonal (the others are above limit anyway).
+    size = min(len(target), len(query) + limit)
+    above = limit + 1
+    before, row = None, [min(b, above) for b in range(size + 1)]
+    for a in range(1, len(query) + 1):
+        current = [above] * (size + 1)
+        if a <= limit:
+            current[0] = a
+        for b in range(max(a - limit, 1), min(a + limit, size) + 1):
+            value = min(row[b] + 1, current[b - 1] + 1, row[b - 1] + (query[a - 1] != target[b - 1]))
+            if a > 1 and b > 1 and query[a - 1] == target[b - 2] and query[a - 2] == target[b - 1]:
+                value = min(value, before[b - 2] + 1)
+            current[b] = min(value, above)
+        if min(current) > limit:
+            return above
+        before, row = row, current
+    ends = [] if whole else row[len(query):]
+    if len(target) <= size:
+        ends.append(row[len(target)])
+    return min(ends, default=above)
+
+
+def _typos(query, label, limit, pieces):
+    """Fewest edits turning query into a run of words of label, or a prefix of one;
+    anything above limit counts as limit + 1. Codes (words in capitals or with
+    digits, such as flight, license and airport codes) must match whole, within one
+    edit. Runs holding none of pieces are skipped.
+    """
+    words = label.split()
+    span = len(query.split())
+    best = limit + 1
+    for i in range(max(len(words) - span + 1, 1)):
+        run = words[i:i + span]
+        target = " ".join(run).lower()
+        if any(piece in target for piece in pieces):
+            code = _is_code(run[-1])
+            count = _distance(query, target, min(limit, 1) if code else limit, code)
+            if count <= (1 if code else limit):
+                best = min(best, count)
+    return best
+
+
+def _search_codes(conn, prefix, kinds, limit):
+    """Airport codes, then flight numbers, starting with prefix, in code order."""
+    end = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    found = []
+    for kind in ("destination", "flight"):
+        if kind in kinds and len(found) < limit:
+            found += conn.execute(CODE_PREFIX_SQL[kind], (prefix, end, limit - len(found))).fetchall()
+    return [SearchResult(KINDS[rowid % 4], rowid // 4, label, 0) for rowid, label in found]
+
+
+def search(conn, text, kinds=None, limit=DEFAULT_LIMIT):
+    """Searches flight numbers, pilot names and license numbers, and destination
+    cities, countries and airport codes. Returns up to limit SearchResult records,
+    best first: labels with a word starting with the text, then labels containing
+    it, then labels within one typo (two for texts of nine or more characters).
+    Texts of one or two characters only match the start of flight numbers and
+    airport codes. kinds restricts the search to some of KINDS.
+    """
+    query = " ".join(text.split()).lower()
+    if not query:
+        raise ValueError("Nothing to search for")
+    for kind in kinds or ():
+        if kind not in KINDS:
+            raise ValueError(f"Unknown search kind '{kind}'; choose from {', '.join(KINDS)}")
+    if len(query) < MIN_QUERY_LENGTH:
+        return _search_codes(conn, query.upper(), kinds or KINDS, limit)
+    where = _kind_filter(kinds)
+    found = {}
+
+    def collect(rows, score_of):
+        for rowid, label in rows:
+            if rowid not in found:
+                score = score_of(label)
+                if score is not None:
+                    found[rowid] = (score, len(label), label)
+
+    def word_start(label):
+        lowered = label.lower()
+        return 0 if lowered.startswith(query) or f" {query}" in lowered else 1
+
+    typos = 1 if len(query) < 9 else 2
+    pieces = _pieces(query, typos)
+
+    def fuzzy(label):
+        count = _typos(query, label, typos, pieces)
+        return 1 + count if count <= typos else None
+
+    if "%" not in query and "_" not in query:
+        collect(conn.execute(PREFIX_SQL.format(where), (query + "%", CANDIDATES)), lambda label: 0)
+    if len(found) < limit:
+        collect(conn.execute(MATCH_SQL.format(where), (_phrase(query), CANDIDATES)), word_start)
+    if len(found) < limit:
+        collect(conn.execute(MATCH_SQL.format(where), (" OR ".join(map(_phrase, pieces)), CANDIDATES)), fuzzy)
+
+    ranked = sorted(found.items(), key=lambda item: (item[1], item[0] % 4))[:limit]
+    return [SearchResult(KINDS[rowid % 4], rowid // 4, label, score) for rowid, (score, _, label) in ranked]
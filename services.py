@@ -1,17 +1,44 @@
+import dimensions
+import instrumentation
+import queries
+from assignments import validate_assignment
+from db_config import load_profile
+from flight_status import update_statuses
+from migrations import apply_migrations
 
-import sqlite3
 
-from tabulate import tabulate
+def tabulate(*args, **kwargs):
+    """tabulate.tabulate, imported on first use so that starting up stays fast."""
+    from tabulate import tabulate as render
+    return render(*args, **kwargs)
+
+
+# Rows shown per page by the paginated flight listings.
+PAGE_SIZE = queries.DEFAULT_PAGE_SIZE
 
 class FlightService:
-    def __init__(self):
-        """Initializes the database connection and ensures tables are created."""
-        self.conn = sqlite3.connect("FlightManagement.db")
+    def __init__(self, db_path=None, profile=None, check_same_thread=True):
+        """Initializes the database connection and ensures tables are created.
+        Connection settings come from the given profile, or from the config file and
+        environment (see db_config.py); db_path overrides the profile's path.
+        """
+        self.profile = profile or load_profile()
+        if db_path:
+            self.profile = self.profile.with_path(db_path)
+        self.conn = self.profile.connect(check_same_thread=check_same_thread)
         self.cursor = self.conn.cursor()
+        # City and pilot names for the flight listings come from this cache.
+        self.dimensions = dimensions.DimensionCache()
+        self.instrumented = isinstance(self.conn, instrumentation.InstrumentedConnection)
+        if self.instrumented:
+            # Statements are reported under the name of the method that ran them.
+            instrumentation.instrument_methods(self)
         self._create_tables()
 
     def _create_tables(self):
-        """Creates Pilot, Destination, and Flight tables if they do not already exist."""
+        """Creates Pilot, Destination, and Flight tables if they do not already exist,
+        then applies any pending schema migrations.
+        """
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS Pilot (
                 PilotID INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -59,6 +86,7 @@ class FlightService:
             );
         """)
         self.conn.commit()
+        apply_migrations(self.conn)
 
     def add_new_flight(self):
         """Prompts user for flight information and inserts a new flight into the database."""
@@ -73,16 +101,10 @@ class FlightService:
                 input("Arrival Date (YYYY-MM-DD): "),
                 input("Arrival Time (HH:MM): "),
                 input("Flight Status (Scheduled, Departed, etc.): "),
-                int(input("Distance in km: "))
+                int(input("Distance in km: ")),
+                input("Aircraft Code (can be blank): ") or None
             )
-            self.cursor.execute("""
-                INSERT INTO Flight (
-                    FlightNumber, PilotID, OriginID, DestinationID,
-                    DepartureDate, DepartureTime, ArrivalDate, ArrivalTime,
-                    FlightStatus, Distance
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, flight_data)
-            self.conn.commit()
+            queries.add_flight(self.conn, *flight_data)
             print("Flight added successfully.")
         except Exception as e:
             print("Error adding flight:", e)
@@ -92,26 +114,7 @@ class FlightService:
         pilot name, origin, destination and departure/arrival info using JOINS.
         """
         status = input("Enter flight status: ").strip().capitalize()
-        self.cursor.execute("""
-            SELECT 
-                f.FlightNumber,
-                IFNULL(p.FirstName || ' ' || p.LastName, 'Unassigned') AS Pilot,
-                o.City AS Origin,
-                d.City AS Destination,
-                f.DepartureDate,
-                f.DepartureTime,
-                f.ArrivalDate,
-                f.ArrivalTime,
-                f.FlightStatus
-            FROM Flight f
-            LEFT JOIN Pilot p ON f.PilotID = p.PilotID
-            JOIN Destination o ON f.OriginID = o.DestinationID
-            JOIN Destination d ON f.DestinationID = d.DestinationID
-            WHERE f.FlightStatus = ?
-            ORDER BY f.DepartureDate, f.DepartureTime
-        """, (status,))
-
-        rows = self.cursor.fetchall()
+        rows = dimensions.flights_by_status(self.conn, status, cache=self.dimensions)
 
         if rows:
             print("\n********** Flights with Status:", status, "**********")
@@ -124,50 +127,49 @@ class FlightService:
             print(f"No flights found with status '{status}'.")
 
     def update_flight_status(self):
-        """Updates the flight status for a given flight ID."""
-        flight_id = input("Enter Flight ID: ")
+        """Updates the flight status for a given flight ID, if the change is allowed."""
+        try:
+            flight_id = int(input("Enter Flight ID: "))
+        except ValueError:
+            print("Flight ID must be a number.")
+            return
         new_status = input("Enter new status: ")
-        self.cursor.execute("UPDATE Flight SET FlightStatus = ? WHERE FlightID = ?", (new_status, flight_id))
-        self.conn.commit()
-        print("Flight status updated.")
+        change = update_statuses(self.conn, [(flight_id, new_status)])[0]
+        if change.result == "updated":
+            print("Flight status updated.")
+        elif change.result == "unchanged":
+            print(f"Flight is already {change.new_status}.")
+        else:
+            print("Flight status not updated:", change.reason)
 
     def assign_pilot_to_flight(self):
-        """Assigns a pilot to a flight based on IDs."""
-        flight_id = input("Enter Flight ID: ")
-        pilot_id = input("Enter Pilot ID: ")
-        self.cursor.execute("UPDATE Flight SET PilotID = ? WHERE FlightID = ?", (pilot_id, flight_id))
-        self.conn.commit()
+        """Assigns a pilot to a flight based on IDs, after checking the pilot's
+        license, certification and schedule.
+        """
+        try:
+            flight_id = int(input("Enter Flight ID: "))
+            pilot_id = int(input("Enter Pilot ID: "))
+        except ValueError:
+            print("Flight ID and Pilot ID must be numbers.")
+            return
+        check = validate_assignment(self.conn, flight_id, pilot_id)
+        if not check.ok:
+            print("Pilot cannot be assigned:", "; ".join(check.reasons))
+            return
+        queries.assign_pilot(self.conn, flight_id, pilot_id)
         print("Pilot assigned to flight.")
 
     def remove_pilot_from_flight(self):
         """Removes a pilot assignment from a specific flight."""
         flight_id = input("Enter Flight ID to remove pilot from: ")
-        self.cursor.execute("UPDATE Flight SET PilotID = NULL WHERE FlightID = ?", (flight_id,))
-        self.conn.commit()
+        queries.remove_pilot(self.conn, flight_id)
         print("Pilot removed from flight.")
 
     def view_pilot_schedule(self):
         """Displays all flights assigned to a particular pilot."""
         pilot_id = input("Enter Pilot ID: ").strip()
 
-        self.cursor.execute("""
-            SELECT 
-                f.FlightNumber,
-                f.DepartureDate,
-                f.DepartureTime,
-                f.ArrivalDate,
-                f.ArrivalTime,
-                o.City AS Origin,
-                d.City AS Destination,
-                f.FlightStatus
-            FROM Flight f
-            JOIN Destination o ON f.OriginID = o.DestinationID
-            JOIN Destination d ON f.DestinationID = d.DestinationID
-            WHERE f.PilotID = ?
-            ORDER BY f.DepartureDate, f.DepartureTime
-        """, (pilot_id,))
-
-        results = self.cursor.fetchall()
+        results = dimensions.pilot_schedule(self.conn, pilot_id, cache=self.dimensions)
 
         if results:
             print("\n********** Pilot Flight Schedule **********")
@@ -185,15 +187,11 @@ class FlightService:
             input("City: "),
             input("Country: "),
             input("Airport Code: "),
-            input("Time Zone: "),
+            input("Time Zone (e.g. Europe/London): "),
             input("Notes: ")
         )
         try:
-            self.cursor.execute("""
-                INSERT INTO Destination (City, Country, AirportCode, TimeZone, Notes)
-                VALUES (?, ?, ?, ?, ?)
-            """, destination_data)
-            self.conn.commit()
+            queries.add_destination(self.conn, *destination_data)
             print("Destination added.")
         except Exception as e:
             print("Error adding destination:", e)
@@ -202,48 +200,47 @@ class FlightService:
         """Updates the notes for a specific destination by ID."""
         dest_id = input("Enter Destination ID: ")
         notes = input("Enter updated notes: ")
-        self.cursor.execute("UPDATE Destination SET Notes = ? WHERE DestinationID = ?", (notes, dest_id))
-        self.conn.commit()
+        queries.update_destination_notes(self.conn, dest_id, notes)
         print("Destination notes updated.")
 
+    def _browse(self, title, headers, fetch_page):
+        """Shows one page at a time and lets the user move with [n]ext / [p]rev / [q]uit.
+        Each move is a keyset seek from the current page's first or last key.
+        """
+        page = fetch_page()
+        if not page.rows:
+            print("No flights available.")
+            return
+        number = 1
+        while True:
+            print(f"\n========== {title} (page {number}) ==========\n")
+            print(tabulate(page.rows, headers=headers, tablefmt="grid"))
+            options = (["[n]ext"] if page.has_next else []) + (["[p]rev"] if page.has_previous else []) + ["[q]uit"]
+            choice = input(" / ".join(options) + ": ").strip().lower()
+            if choice == "n" and page.has_next:
+                page, number = fetch_page(after=page.last_key), number + 1
+            elif choice == "p" and page.has_previous:
+                page, number = fetch_page(before=page.first_key), number - 1
+            elif choice == "q":
+                break
+            else:
+                print("Invalid choice.")
+                continue
+            if not page.rows:
+                print("No more flights.")
+                break
+
     def view_flight_details(self):
-        """Displays detailed info of all flights including pilot, origin, and destination."""
-        self.cursor.execute("""
-            SELECT 
-                f.FlightNumber,
-                f.DepartureDate,
-                IFNULL(p.FirstName || ' ' || p.LastName, 'Unassigned') AS Pilot,
-                o.City AS OriginCity,
-                d.City AS DestinationCity,
-                f.FlightStatus
-            FROM 
-                Flight f
-            LEFT JOIN 
-                Pilot p ON f.PilotID = p.PilotID
-            JOIN 
-                Destination o ON f.OriginID = o.DestinationID
-            JOIN 
-                Destination d ON f.DestinationID = d.DestinationID
-        """)
-        for row in self.cursor.fetchall():
-            print(row)
+        """Displays detailed info of all flights including pilot, origin, and destination,
+        one page at a time in departure order.
+        """
+        headers = ["Flight Number", "Departure Date", "Pilot", "Origin", "Destination", "Status"]
+        self._browse("FLIGHT DETAILS", headers,
+                     lambda **key: queries.flight_details_page(self.conn, size=PAGE_SIZE, **key))
 
     def get_flight_summary(self):
         """Displays a summary of how many flights go to each destination."""
-        self.cursor.execute("""
-            SELECT 
-                d.City,
-                COUNT(f.FlightID) AS TotalFlights
-            FROM 
-                Flight f
-            JOIN 
-                Destination d ON f.DestinationID = d.DestinationID
-            GROUP BY 
-                d.City
-            ORDER BY 
-                TotalFlights DESC
-        """)
-        results = self.cursor.fetchall()
+        results = queries.flight_summary(self.conn)
         if results:
             print("\n********** Flight Summary by Destination **********")
             print(f"{'Destination':<20} | {'Total Flights':<15}")
@@ -259,8 +256,7 @@ class FlightService:
             "Deletes a flight record from the database using the flight number."
             flight_number = input("Enter Flight Number to delete: ")
         # Step 1: Check if the flight exists
-            self.cursor.execute("SELECT * FROM Flight WHERE FlightNumber = ?", (flight_number,))
-            flight = self.cursor.fetchone()
+            flight = queries.flight_by_number(self.conn, flight_number)
 
             if not flight:
                 print(f"No flight found with flight number '{flight_number}'.")
@@ -268,15 +264,14 @@ class FlightService:
 
             # Step 2: Display flight info to confirm
             print("\nFlight found:")
-            print(f"Flight ID: {flight[0]}")
-            print(f"Flight Number: {flight[1]}")
-            print(f"Status: {flight[9]}")
+            print(f"Flight ID: {flight.flight_id}")
+            print(f"Flight Number: {flight.flight_number}")
+            print(f"Status: {flight.status}")
             
         # Step 3: Confirm deletion
             confirm = input("Are you sure you want to delete this flight? (yes/no): ").strip().lower()
             if confirm == "yes":
-                self.cursor.execute("DELETE FROM Flight WHERE FlightNumber = ?", (flight_number,))
-                self.conn.commit()
+                queries.delete_flight_by_number(self.conn, flight_number)
                 print("Flight deleted.")
             else:
                 print("Deletion cancelled.")
@@ -286,16 +281,7 @@ class FlightService:
         Displays the number of flights assigned to each pilot.
         Uses JOIN and GROUP BY to count assignments.
         """
-        self.cursor.execute("""
-            SELECT 
-                IFNULL(p.FirstName || ' ' || p.LastName, 'Unassigned') AS Pilot,
-                COUNT(f.FlightID) AS FlightCount
-            FROM Flight f
-            LEFT JOIN Pilot p ON f.PilotID = p.PilotID
-            GROUP BY f.PilotID
-            ORDER BY FlightCount DESC
-        """)
-        rows = self.cursor.fetchall()
+        rows = queries.flights_per_pilot(self.conn)
         print(f"\n{'Pilot':<25} | {'Flights Assigned'}")
         print("-" * 45)
         for row in rows:
@@ -306,16 +292,7 @@ class FlightService:
         Shows average flight distance to each destination city.
         Uses JOIN and AVG to calculate route trends.
         """
-        self.cursor.execute("""
-            SELECT 
-                d.City,
-                ROUND(AVG(f.Distance), 2) AS AvgDistance
-            FROM Flight f
-            JOIN Destination d ON f.DestinationID = d.DestinationID
-            GROUP BY d.City
-            ORDER BY AvgDistance DESC
-        """)
-        rows = self.cursor.fetchall()
+        rows = queries.average_distance_by_destination(self.conn)
         print(f"\n{'Destination':<20} | {'Avg Distance (km)'}")
         print("-" * 45)
         for row in rows:
@@ -326,16 +303,7 @@ class FlightService:
         Displays total distance flown by each pilot.
         Useful for tracking workload or performance.
         """
-        self.cursor.execute("""
-            SELECT 
-                IFNULL(p.FirstName || ' ' || p.LastName, 'Unassigned') AS Pilot,
-                SUM(f.Distance) AS TotalDistance
-            FROM Flight f
-            LEFT JOIN Pilot p ON f.PilotID = p.PilotID
-            GROUP BY f.PilotID
-            ORDER BY TotalDistance DESC
-        """)
-        rows = self.cursor.fetchall()
+        rows = queries.total_distance_by_pilot(self.conn)
         print(f"\n{'Pilot':<25} | {'Total Distance (km)'}")
         print("-" * 50)
         for row in rows:
@@ -346,45 +314,55 @@ class FlightService:
         Shows how many flights go to each destination.
         Uses COUNT and GROUP BY for basic demand analysis.
         """
-        self.cursor.execute("""
-            SELECT 
-                d.City,
-                COUNT(f.FlightID) AS FlightCount
-            FROM Flight f
-            JOIN Destination d ON f.DestinationID = d.DestinationID
-            GROUP BY d.City
-            ORDER BY FlightCount DESC
-        """)
-        rows = self.cursor.fetchall()
+        rows = queries.flight_count_by_destination(self.conn)
         print(f"\n{'Destination':<20} | {'Flight Count'}")
         print("-" * 40)
         for row in rows:
             print(f"{row[0]:<20} | {row[1]}")
 
     def view_all_flights(self) : 
-        "Displays all flights with full details regardless of status." 
-        self.cursor.execute(""" SELECT f.FlightNumber, IFNULL(p.FirstName || ' ' || p.LastName, 'Unassigned') AS Pilot, 
-                            o.City AS Origin, d.City AS Destination, 
-                            f.DepartureDate, f.DepartureTime, 
-                            f.ArrivalDate, f.ArrivalTime, f.FlightStatus 
-                            FROM Flight f 
-                            LEFT JOIN Pilot p ON f.PilotID = p.PilotID 
-                            JOIN Destination o ON f.OriginID = o.DestinationID 
-                            JOIN Destination d ON f.DestinationID = d.DestinationID ORDER BY f.DepartureDate, f.DepartureTime """) 
-        rows = self.cursor.fetchall() 
+        """Displays all flights with full details regardless of status, one page at a
+        time in departure order. Only the page on screen is fetched.
+        """
         headers = [ "Flight Number", "Pilot", "Origin", "Destination", "Departure Date", "Departure Time", "Arrival Date", "Arrival Time", "Status" ] 
-        if rows: 
-            print("\n========== ALL FLIGHTS ==========\n") 
-            print(tabulate(rows, headers=headers, tablefmt="grid")) 
-        else: print("No flights available.")
+        self._browse("ALL FLIGHTS", headers,
+                     lambda **key: queries.all_flights_page(self.conn, size=PAGE_SIZE, **key))
+
+    def show_cache_stats(self):
+        """Displays hit/miss counters of the destination and pilot name cache."""
+        for table, stats in self.dimensions.stats().items():
+            print(f"{table:<12} | size {stats['size']}/{stats['maxsize']} | hits {stats['hits']} | "
+                  f"misses {stats['misses']} | evictions {stats['evictions']} | hit ratio {stats['hit_ratio']:.1%}")
+
+    def show_query_stats(self):
+        """Displays per-operation database time, the slowest statements and the slow query log."""
+        if not self.instrumented:
+            print("Query timing is off. Set FMS_INSTRUMENT=1 (or instrument = 1 in the [database] "
+                  "section of flight_management.ini) and restart to record it.")
+            return
+        instrumentation.print_stats()
+
+    def search(self):
+        """Searches flights, pilots and destinations by name, number or code, allowing
+        for a typo, and displays the best matches.
+        """
+        from search import search
+        text = input("Search for (flight number, pilot, license, city, country or airport code): ")
+        try:
+            results = search(self.conn, text)
+        except ValueError as e:
+            print(e)
+            return
+        if results:
+            print(tabulate([(result.kind.title(), result.key, result.label) for result in results],
+                           headers=["Kind", "ID", "Match"], tablefmt="grid"))
+        else:
+            print("No matches found.")
 
     def reset_database(self):
         " Deletes all data from the tables "
         try:
-            self.cursor.execute("DELETE FROM Flight")
-            self.cursor.execute("DELETE FROM Pilot")
-            self.cursor.execute("DELETE FROM Destination")
-            self.conn.commit()
+            queries.reset(self.conn)
             print("All data deleted from the database.")
         except Exception as e:
             print("Error during reset:", e)
@@ -0,0 +1,168 @@
+import os
+import pathlib
+import sqlite3
+import time
+
+import changelog
+import queries
+import timezones
+from migrations import apply_migrations
+
+# Snapshots, restores and resets all copy whole databases with the SQLite backup
+# API. The copy runs STEP_PAGES pages at a time: between steps the source is
+# unlocked, so readers and writers of a live database wait for one step at most.
+# A write by another connection restarts the copy.
+STEP_PAGES = 1024
+
+# Seconds to wait before retrying a step that found the database locked.
+BUSY_SLEEP = 0.01
+
+# Rows that outlive a restore or reset: the registered change log consumers
+# (e.g. replicas), so compaction keeps waiting for them.
+KEPT_TABLES = ("ChangeConsumers",)
+
+# Shadow tables of virtual tables (e.g. the FTS5 search index) are left out: creating
+# the virtual table creates them.
+SCHEMA_SQL = """
+    SELECT sql FROM sqlite_master
+    WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'
+      AND name NOT IN (SELECT name FROM pragma_table_list WHERE schema = 'main' AND type = 'shadow')
+    ORDER BY type != 'table', rowid
+"""
+
+TABLES_SQL = "SELECT name FROM sqlite_master WHERE type = 'table'"
+
+
+class CopyReport(queries.Record):
+    __slots__ = ("path", "pages", "steps", "seconds")
+
+
+def _copy(source, target, step_pages):
+    """Backs source up into target step_pages at a time; returns (pages, steps)."""
+    progress = {"pages": 0, "steps": 0}
+
+    def count(status, remaining, total):
+        progress["pages"], progress["steps"] = total, progress["steps"] + 1
+
+    source.backup(target, pages=step_pages, progress=count, sleep=BUSY_SLEEP)
+    return progress["pages"], progress["steps"]
+
+
+def snapshot(conn, path, step_pages=STEP_PAGES):
+    """Copies the database behind conn to the file at path and returns a CopyReport.
+
+    The copy is written next to path and renamed over it when complete, so an
+    interrupted snapshot never leaves a half-written file in its place. Uncommitted
+    changes would be left out of the copy, so conn must not be in a transaction.
+    """
+    if conn.in_transaction:
+        raise ValueError("Cannot snapshot inside a transaction; commit or roll back first")
+    started = time.perf_counter()
+    temporary = f"{path}.partial"
+    if os.path.exists(temporary):
+        os.remove(temporary)
+    target = sqlite3.connect(temporary)
+    try:
+        pages, steps = _copy(conn, target, step_pages)
+    finally:
+        target.close()
+    os.replace(temporary, path)
+    return CopyReport(path, pages, steps, round(time.perf_counter() - started, 3))
+
+
+def _open_snapshot(path):
+    if not os.path.isfile(path):
+        raise ValueError(f"No snapshot at '{path}'")
+    # Read-only, so a restore can never write to the snapshot.
+    source = sqlite3.connect(pathlib.Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        tables = {row[0] for row in source.execute(TABLES_SQL)}
+    except sqlite3.DatabaseError as e:
+        source.close()
+        raise ValueError(f"'{path}' is not a SQLite database: {e}")
+    if not {"Flight", "Pilot", "Destination"} <= tables:
+        source.close()
+        raise ValueError(f"'{path}' is not a flight management database")
+    return source
+
+
+def _kept_rows(conn):
+    tables = {row[0] for row in conn.execute(TABLES_SQL)}
+    return {table: conn.execute(f"SELECT * FROM {table}").fetchall() for table in KEPT_TABLES if table in tables}
+
+
+def _after_swap(conn, seq, kept):
+    """Puts back the kept rows and moves the change log past `seq`, the newest Seq
+    any consumer can have seen. Marking everything up to there as truncated makes
+    every consumer (caches, replicas) reload in full instead of patching from a log
+    that no longer matches the data.
+    """
+    seq = max(seq, changelog.current_seq(conn)) + 1
+    for table, rows in kept.items():
+        conn.execute(f"DELETE FROM {table}")
+        if rows:
+            conn.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' * len(rows[0]))})", rows)
+    conn.execute("DELETE FROM sqlite_sequence WHERE name = 'ChangeLog'")
+    conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('ChangeLog', ?)", (seq,))
+    conn.execute("UPDATE ChangeLogCompaction SET TruncatedThrough = ?", (seq,))
+    conn.commit()
+    queries._dimension_changed("Destination")
+    queries._dimension_changed("Pilot")
+
+
+def _swap_in(conn, source, step_pages):
+    """Replaces the whole content of conn's database with source's."""
+    if conn.in_transaction:
+        raise ValueError("Cannot replace the database inside a transaction")
+    seq, kept = changelog.current_seq(conn), _kept_rows(conn)
+    pages, steps = _copy(source, conn, step_pages)
+    apply_migrations(conn)
+    _after_swap(conn, seq, kept)
+    if conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+        # Hand the space back: the copy went through the WAL.
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return pages, steps
+
+
+def restore(conn, path, step_pages=STEP_PAGES):
+    """Replaces the database behind conn with the snapshot at path and returns a
+    CopyReport. Other connections see the restored data from their next
+    transaction; an older snapshot is migrated to the current schema.
+    """
+    started = time.perf_counter()
+    source = _open_snapshot(path)
+    try:
+        pages, steps = _swap_in(conn, source, step_pages)
+    finally:
+        source.close()
+    return CopyReport(path, pages, steps, round(time.perf_counter() - started, 3))
+
+
+def _template(conn):
+    """Returns an in-memory database with conn's schema, page size and schema
+    version and no rows, so every AUTOINCREMENT counter starts again at 1.
+    """
+    template = sqlite3.connect(":memory:")
+    timezones.register(template)
+    template.execute(f"PRAGMA page_size = {conn.execute('PRAGMA page_size').fetchone()[0]}")
+    for (sql,) in conn.execute(SCHEMA_SQL).fetchall():
+        template.execute(sql)
+    template.execute(f"PRAGMA user_version = {conn.execute('PRAGMA user_version').fetchone()[0]}")
+    template.execute("INSERT OR IGNORE INTO ChangeLogCompaction (ID, TruncatedThrough) VALUES (1, 0)")
+    template.commit()
+    return template
+
+
+def reset(conn, step_pages=STEP_PAGES):
+    """Deletes every flight, pilot and destination by copying an empty database with
+    the same schema over this one. Unlike deleting the rows, this takes as long as
+    copying the empty schema, gives the space back and restarts IDs at 1. Returns
+    a CopyReport.
+    """
+    started = time.perf_counter()
+    template = _template(conn)
+    try:
+        pages, steps = _swap_in(conn, template, step_pages)
+    finally:
+        template.close()
+    return CopyReport(changelog.database_file(conn), pages, steps, round(time.perf_counter() - started, 3))
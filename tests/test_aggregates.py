@@ -0,0 +1,57 @@
+import pytest
+
+import queries
+from aggregates import check_aggregates, rebuild_aggregates
+from bulk_import import import_flights
+from flight_status import update_statuses
+from services import FlightService
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = FlightService(str(tmp_path / "flights.db")).conn
+    london = queries.add_destination(conn, "London", "UK", "LHR", "Europe/London")
+    paris = queries.add_destination(conn, "Paris", "France", "CDG", "Europe/Paris")
+    for first, last, license_number in [("Ivy", "Smith", "LIC0000012"), ("Olu", "Khan", "LIC0000023")]:
+        queries.add_pilot(conn, first, last, "Captain", license_number, "2030-01-01", "Commercial",
+                          "A320", "2030-01-01")
+    for number, pilot_id, origin, destination, distance in [("BA1", 1, london, paris, 344),
+                                                            ("BA2", 1, paris, london, 344),
+                                                            ("BA3", None, london, paris, 400)]:
+        queries.add_flight(conn, number, pilot_id, origin, destination, "2025-07-01", "09:00",
+                           "2025-07-01", "11:15", "Scheduled", distance)
+    return conn
+
+
+def test_triggers_match_a_recount_after_every_kind_of_write(conn):
+    assert check_aggregates(conn) == []
+
+    queries.assign_pilot(conn, 3, 2)
+    queries.remove_pilot(conn, 1)
+    update_statuses(conn, [(2, "Departed"), (2, "Completed"), (3, "Cancelled")])
+    conn.execute("UPDATE Flight SET Distance = 500, DestinationID = 1 WHERE FlightID = 1")
+    conn.commit()
+    queries.delete_flight_by_number(conn, "BA2")
+    import_flights(conn, [{"FlightNumber": "BA4", "LicenseNumber": "LIC0000012", "OriginCode": "CDG",
+                           "DestinationCode": "LHR", "DepartureDate": "2025-07-02", "DepartureTime": "08:00",
+                           "ArrivalDate": "2025-07-02", "ArrivalTime": "08:30", "FlightStatus": "Delayed",
+                           "Distance": "344"}])
+
+    assert check_aggregates(conn) == []
+    assert conn.execute("SELECT FlightCount, TotalDistance, Scheduled, Delayed, Cancelled FROM DestinationStats "
+                        "WHERE DestinationID = 1").fetchone() == (2, 844, 1, 1, 0)
+    assert conn.execute("SELECT FlightCount, TotalDistance FROM PilotStats WHERE PilotID = 0").fetchone() == (1, 500)
+
+
+def test_check_finds_drift_and_rebuild_repairs_it(conn):
+    conn.execute("UPDATE DestinationStats SET FlightCount = FlightCount + 1 WHERE DestinationID = 2")
+    conn.execute("DELETE FROM PilotStats WHERE PilotID = 0")
+    conn.commit()
+
+    assert check_aggregates(conn) == [
+        ("DestinationStats", 2, (3, 744, 2, 0, 0, 0, 0), (2, 744, 2, 0, 0, 0, 0)),
+        ("PilotStats", 0, None, (1, 400, 1, 0, 0, 0, 0)),
+    ]
+
+    rebuild_aggregates(conn)
+    assert check_aggregates(conn) == []
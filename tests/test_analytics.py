@@ -0,0 +1,96 @@
+import pytest
+
+import queries
+from analytics import FlightAnalytics
+from generate_data import generate
+from services import FlightService
+
+REPORTS = ("flight_count_by_destination", "flight_summary", "average_distance_by_destination",
+           "flights_per_pilot", "total_distance_by_pilot")
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = FlightService(str(tmp_path / "flights.db")).conn
+    generate(conn, 20, 30, 400, seed=7)
+    return conn
+
+
+def _same_reports(conn, analytics):
+    # Records with equal values may come in either order.
+    for report in REPORTS:
+        expected = sorted(map(tuple, getattr(queries, report)(conn)))
+        assert sorted(map(tuple, getattr(analytics, report)())) == expected, report
+
+
+def _change_some_flights(conn):
+    """Inserts, deletes or updates seven flights."""
+    conn.execute("UPDATE Flight SET FlightStatus = 'Cancelled' WHERE FlightID IN (1, 3)")
+    conn.commit()
+    queries.remove_pilot(conn, 4)
+    queries.assign_pilot(conn, 5, 1)
+    conn.execute("UPDATE Flight SET Distance = Distance + 1000, DestinationID = 3 WHERE FlightID = 6")
+    conn.commit()
+    queries.delete_flight_by_number(conn, conn.execute("SELECT FlightNumber FROM Flight WHERE FlightID = 7"
+                                                       ).fetchone()[0])
+    queries.add_flight(conn, "ZZ0000001", 2, 1, 2, "2025-07-01", "09:00", "2025-07-01", "11:15", "Scheduled", 777)
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_reports_match_sql_before_and_after_patches(conn, tmp_path, cached):
+    analytics = FlightAnalytics(conn, cache_dir=str(tmp_path / "columns") if cached else False)
+    assert analytics.refresh() == 400
+    _same_reports(conn, analytics)
+
+    _change_some_flights(conn)
+
+    assert analytics.refresh() == 7
+    assert (analytics.full_loads, analytics.rows_patched) == (1, 7)
+    _same_reports(conn, analytics)
+    assert analytics.refresh() == 0
+
+
+def test_cached_columns_are_reused_and_patched(conn, tmp_path):
+    cache_dir = str(tmp_path / "columns")
+    FlightAnalytics(conn, cache_dir=cache_dir).refresh()
+    _change_some_flights(conn)
+
+    analytics = FlightAnalytics(conn, cache_dir=cache_dir)
+
+    assert analytics.refresh() == 7
+    assert analytics.full_loads == 0
+    _same_reports(conn, analytics)
+
+
+def test_many_changes_reload_in_full(conn):
+    analytics = FlightAnalytics(conn, cache_dir=False)
+    analytics.refresh()
+
+    conn.execute("UPDATE Flight SET FlightStatus = 'Cancelled' WHERE FlightID <= 200")
+    conn.commit()
+
+    assert analytics.refresh() == 400
+    assert analytics.full_loads == 2
+    _same_reports(conn, analytics)
+
+
+def test_distributions_match_sql(conn):
+    analytics = FlightAnalytics(conn, cache_dir=False)
+    analytics.refresh()
+
+    routes = conn.execute("""
+        SELECT o.AirportCode, d.AirportCode, COUNT(*), SUM(f.Distance)
+        FROM Flight f JOIN Destination o ON o.DestinationID = f.OriginID
+        JOIN Destination d ON d.DestinationID = f.DestinationID
+        WHERE f.FlightStatus = 'Scheduled'
+        GROUP BY f.OriginID, f.DestinationID
+    """).fetchall()
+    busiest = analytics.busiest_routes(5, status="Scheduled")
+    assert [route.flights for route in busiest] == sorted((row[2] for row in routes), reverse=True)[:5]
+    assert {tuple(route) for route in busiest} <= set(routes)
+
+    days = conn.execute("SELECT DepartureDate, COUNT(*) FROM Flight GROUP BY DepartureDate").fetchall()
+    assert [tuple(day) for day in analytics.daily_volumes() if day.flights] == days
+
+    distances = sorted(row[0] for row in conn.execute("SELECT Distance FROM Flight"))
+    assert dict(analytics.distance_percentiles((0, 100))) == {0: distances[0], 100: distances[-1]}
@@ -0,0 +1,144 @@
+import random
+
+import pytest
+
+import queries
+from assignments import MAX_PENDING, PilotIntervalIndex, assign_pilot, validate_roster
+from services import FlightService
+
+
+def _index(*intervals):
+    index = PilotIntervalIndex()
+    for start, end, flight_id in intervals:
+        index.add(1, start, end, flight_id)
+    return index
+
+
+@pytest.mark.parametrize("start, end, free", [
+    (0, 100, True),     # ends where the first flight starts
+    (200, 300, True),   # starts where the first flight ends
+    (150, 160, False),  # inside the first flight
+    (90, 110, False),   # overlaps its start
+    (190, 210, False),  # overlaps its end
+    (50, 1000, False),  # contains both flights
+    (400, 500, True),   # between the flights
+    (599, 601, False),  # overlaps the second flight by a minute
+    (700, 800, True),   # after both
+])
+def test_is_free_at_the_edges(start, end, free):
+    index = _index((100, 200, 1), (600, 700, 2))
+
+    assert index.is_free(1, start, end) is free
+    assert (index.conflicts(1, start, end) == []) is free
+    assert index.is_free(2, start, end)
+
+
+def test_a_long_flight_hidden_behind_later_starts():
+    # Flight 1 starts first but ends last, so the query below only finds it
+    # through the running maximum of the ends.
+    index = _index((400, 450, 3), (100, 1000, 1), (300, 350, 2))
+
+    assert index.flights(1) == [(100, 1000, 1), (300, 350, 2), (400, 450, 3)]
+    assert not index.is_free(1, 500, 600)
+    assert index.conflicts(1, 500, 600) == [1]
+    assert index.conflicts(1, 320, 420) == [1, 2, 3]
+
+
+def test_remove_updates_the_running_maximum():
+    index = _index((100, 1000, 1), (300, 350, 2))
+
+    assert index.remove(1, 1)
+    assert not index.remove(1, 1)
+    assert index.is_free(1, 500, 600)
+    assert index.flights(1) == [(300, 350, 2)]
+
+
+def test_flights_with_equal_starts_keep_insertion_order():
+    index = _index((100, 200, 1), (100, 150, 2))
+
+    assert index.flights(1) == [(100, 200, 1), (100, 150, 2)]
+    assert index.conflicts(1, 160, 170) == [1]
+
+
+def test_changes_before_and_after_settling_match_a_scan():
+    rng = random.Random(3)
+    stored = {}
+    for flight_id in range(50):
+        start = rng.randrange(0, 5000)
+        stored[flight_id] = (start, start + rng.randrange(1, 400))
+    index = _index(*((start, end, flight_id) for flight_id, (start, end) in stored.items()))
+    index.settle()
+
+    for step in range(3 * MAX_PENDING):
+        if rng.random() < 0.4:
+            flight_id = rng.choice(list(stored))
+            assert index.remove(1, flight_id)
+            del stored[flight_id]
+        else:
+            flight_id, start = 100 + step, rng.randrange(0, 5000)
+            stored[flight_id] = (start, start + rng.randrange(1, 400))
+            index.add(1, *stored[flight_id], flight_id)
+        start = rng.randrange(0, 5000)
+        end = start + rng.randrange(1, 400)
+        expected = sorted((flight_start, flight_id) for flight_id, (flight_start, flight_end) in stored.items()
+                          if flight_start < end and flight_end > start)
+        assert index.is_free(1, start, end) == (not expected)
+        assert sorted(index.conflicts(1, start, end)) == sorted(flight_id for _, flight_id in expected)
+
+    assert sorted(index.flights(1)) == sorted((start, end, flight_id) for flight_id, (start, end) in stored.items())
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = FlightService(str(tmp_path / "flights.db")).conn
+    london = queries.add_destination(conn, "London", "UK", "LHR", "Europe/London")
+    paris = queries.add_destination(conn, "Paris", "France", "CDG", "Europe/Paris")
+    queries.add_pilot(conn, "Ivy", "Smith", "Captain", "LIC0000012", "2030-01-01", "Commercial",
+                      "A320", "2030-01-01")
+    queries.add_pilot(conn, "Olu", "Khan", "Captain", "LIC0000023", "2025-06-30", "Commercial",
+                      "B787", "2030-01-01")
+    # London to Paris, so in UTC BA1 is 08:00-09:15, BA2 09:15-10:30 and BA3 08:30-10:00.
+    for number, departure, arrival in [("BA1", "09:00", "11:15"), ("BA2", "10:15", "12:30"),
+                                       ("BA3", "09:30", "12:00")]:
+        queries.add_flight(conn, number, None, london, paris, "2025-07-01", departure,
+                           "2025-07-01", arrival, "Scheduled", 344, "A320")
+    return conn
+
+
+def _checks(checks):
+    return [(check.flight_id, check.pilot_id, check.ok, check.reasons) for check in checks]
+
+
+def test_roster_conflicts_within_itself(conn):
+    checks = validate_roster(conn, [("1", "1"), (2, 1), (3, 1), (3, 2), (9, 1), (1, 9)])
+
+    assert _checks(checks) == [
+        (1, 1, True, []),
+        (2, 1, True, []),  # BA2 departs the minute BA1 arrives
+        (3, 1, False, ["overlaps flight 1, 2"]),
+        (3, 2, False, ["license expires 2025-06-30", "certified for B787, flight uses A320"]),
+        (9, 1, False, ["no such flight"]),
+        (1, 9, False, ["no such pilot"]),
+    ]
+
+
+def test_reassigning_a_flight_frees_its_old_pilot(conn):
+    queries.assign_pilot(conn, 1, 1)
+    conn.execute("UPDATE Pilot SET LicenseExpiry = '2030-01-01', CertifiedAircraftCode = 'A320' WHERE PilotID = 2")
+    conn.commit()
+
+    checks = validate_roster(conn, [(1, 1), (1, 2), (3, 1)])
+
+    assert [check.ok for check in checks] == [True, True, True]
+
+
+def test_cancelled_flights_do_not_block_a_pilot(conn):
+    queries.assign_pilot(conn, 1, 1)
+    assert assign_pilot(conn, 2, 1) == 1
+    with pytest.raises(ValueError, match="overlaps flight 1, 2"):
+        assign_pilot(conn, 3, 1)
+
+    queries.update_flight_status(conn, 1, "Cancelled")
+    queries.update_flight_status(conn, 2, "Cancelled")
+
+    assert assign_pilot(conn, 3, 1) == 1
@@ -0,0 +1,22 @@
+from auto_roster import solve
+
+
+def _pilot(workload, location):
+    # [license_expiry, certification_expiry, aircraft, workload, location, free_at]
+    return ["2099-12-31", "2099-12-31", "A320", workload, location, None]
+
+
+def _flight(flight_id, origin, destination, start, end):
+    return (flight_id, origin, destination, start, end, "2025-01-01", 100, "A320")
+
+
+def test_set_aside_pilot_stays_available():
+    # Pilot 1 has the lighter workload but must be back at X for a leg Y -> X at
+    # minute 1000, so they are set aside for flight 10 and must still be there for
+    # flight 11, which takes them to Y.
+    pilots = {1: _pilot(0, "X"), 2: _pilot(100, "X")}
+    fixed = {1: [(1000, 1100, "Y", "X")]}
+    flights = [_flight(10, "X", "Z", 100, 200), _flight(11, "X", "Y", 300, 400)]
+
+    assert solve(flights, pilots, fixed) == [(2, 10), (1, 11)]
+
@@ -0,0 +1,125 @@
+import sqlite3
+
+import pytest
+
+import bulk_import
+import queries
+from bulk_import import import_flights
+from services import FlightService
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = FlightService(str(tmp_path / "flights.db")).conn
+    queries.add_destination(conn, "London", "UK", "LHR", "Europe/London")
+    queries.add_destination(conn, "Paris", "France", "CDG", "Europe/Paris")
+    queries.add_pilot(conn, "Ivy", "Smith", "Captain", "LIC0000012", "2030-01-01", "Commercial",
+                      "A320", "2030-01-01")
+    return conn
+
+
+def _record(number, **changes):
+    record = {"FlightNumber": number, "LicenseNumber": "lic0000012", "OriginCode": "lhr",
+              "DestinationCode": "CDG", "DepartureDate": "2025-07-01", "DepartureTime": "09:00",
+              "ArrivalDate": "2025-07-01", "ArrivalTime": "11:15", "FlightStatus": "Scheduled",
+              "Distance": "344", "AircraftCode": "a320"}
+    record.update(changes)
+    return record
+
+
+def _flight_numbers(conn):
+    return [row[0] for row in conn.execute("SELECT FlightNumber FROM Flight ORDER BY FlightID")]
+
+
+class _CountingConnection:
+    """Passes everything on to the connection, recording the size of each
+    executemany call that succeeded.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.batches = []
+
+    def executemany(self, sql, rows):
+        rows = list(rows)
+        cursor = self._conn.executemany(sql, rows)
+        self.batches.append(len(rows))
+        return cursor
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def test_unresolved_rows_are_rejected_and_the_rest_inserted(conn):
+    report = import_flights(conn, [
+        _record("BA1"),
+        _record("BA2", LicenseNumber="LIC9999999"),
+        _record("BA3", OriginCode="XXX"),
+        _record("BA4", LicenseNumber="", Distance="not a number"),
+        _record("BA5", LicenseNumber=""),
+    ])
+
+    assert (report.rows_read, report.rows_inserted, report.rows_rejected) == (5, 2, 3)
+    assert report.errors == ["row 2: unknown license number 'LIC9999999'",
+                             "row 3: unknown origin airport 'XXX'",
+                             "row 4: invalid literal for int() with base 10: 'not a number'"]
+    assert _flight_numbers(conn) == ["BA1", "BA5"]
+    assert conn.execute("SELECT PilotID, AircraftCode, DepartureUTC FROM Flight WHERE FlightNumber = 'BA1'"
+                        ).fetchone() == (1, "A320", 1751356800)
+
+
+def test_reported_errors_are_capped(conn):
+    report = import_flights(conn, [_record(f"BA{i}", OriginCode="XXX")
+                                   for i in range(bulk_import.MAX_REPORTED_ERRORS + 5)])
+
+    assert report.rows_rejected == bulk_import.MAX_REPORTED_ERRORS + 5
+    assert len(report.errors) == bulk_import.MAX_REPORTED_ERRORS
+
+
+def test_rows_are_written_in_batches(conn):
+    counting = _CountingConnection(conn)
+
+    report = import_flights(counting, [_record(f"BA{i}") for i in range(5)], batch_size=2)
+
+    assert counting.batches == [2, 2, 1]
+    assert report.rows_inserted == 5
+
+
+def test_database_error_rolls_back_every_batch(conn):
+    records = [_record("BA1"), _record("BA2"), _record("BA3"), _record("BA1")]
+
+    with pytest.raises(sqlite3.IntegrityError):
+        import_flights(conn, records, batch_size=2)
+
+    assert _flight_numbers(conn) == []
+    assert conn.execute("PRAGMA foreign_keys").fetchone() == (0,)
+
+
+def test_foreign_keys_are_checked_at_commit(conn, monkeypatch):
+    # An airport that exists when the lookups are read but not when the rows are
+    # written: only the deferred check at commit can catch it.
+    airports, pilots, zones = bulk_import.load_lookups(conn)
+    monkeypatch.setattr(bulk_import, "load_lookups",
+                        lambda conn: (dict(airports, GONE=99), pilots, zones))
+    counting = _CountingConnection(conn)
+
+    with pytest.raises(sqlite3.IntegrityError, match="FOREIGN KEY"):
+        import_flights(counting, [_record("BA1"), _record("BA2", DestinationCode="GONE")], batch_size=1)
+
+    assert counting.batches == [1, 1]
+    assert _flight_numbers(conn) == []
+    assert conn.execute("PRAGMA foreign_keys").fetchone() == (0,)
+
+
+def test_import_file_reads_csv_and_jsonl(conn, tmp_path):
+    csv_path = tmp_path / "flights.csv"
+    csv_path.write_text(",".join(bulk_import.IMPORT_FIELDS) + "\n"
+                        "BA1,LIC0000012,LHR,CDG,2025-07-01,09:00,2025-07-01,11:15,Scheduled,344,A320\n")
+    jsonl_path = tmp_path / "flights.jsonl"
+    jsonl_path.write_text('{"FlightNumber": "BA2", "OriginCode": "CDG", "DestinationCode": "LHR", '
+                          '"DepartureDate": "2025-07-02", "DepartureTime": "08:00", "ArrivalDate": "2025-07-02", '
+                          '"ArrivalTime": "08:30", "FlightStatus": "Scheduled", "Distance": 344}\n\n')
+
+    assert bulk_import.import_flights_file(conn, str(csv_path)).rows_inserted == 1
+    assert bulk_import.import_flights_file(conn, str(jsonl_path)).rows_inserted == 1
+    assert _flight_numbers(conn) == ["BA1", "BA2"]
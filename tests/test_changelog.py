@@ -0,0 +1,67 @@
+import sqlite3
+
+import queries
+from changelog import CURRENT_SEQ_SQL, compact, current_seq, sync_replica
+from services import FlightService
+from timezones import fill_utc_times
+
+
+def _log(conn):
+    return conn.execute("SELECT TableName, RowKey, Operation FROM ChangeLog ORDER BY Seq").fetchall()
+
+
+def test_one_entry_per_flight_insert(tmp_path):
+    conn = FlightService(str(tmp_path / "flights.db")).conn
+    london = queries.add_destination(conn, "London", "UK", "LHR", "Europe/London")
+    paris = queries.add_destination(conn, "Paris", "France", "CDG", "Europe/Paris")
+    before = len(_log(conn))
+
+    flight_id = queries.add_flight(conn, "BA304", None, london, paris, "2025-07-01", "09:00",
+                                   "2025-07-01", "11:15", "Scheduled", 344)
+
+    assert _log(conn)[before:] == [("Flight", flight_id, "insert")]
+    assert conn.execute("SELECT DepartureUTC, ArrivalUTC FROM Flight WHERE FlightID = ?",
+                        (flight_id,)).fetchone() == (1751356800, 1751361300)
+
+
+def test_utc_recompute_is_not_logged_per_flight(tmp_path):
+    conn = FlightService(str(tmp_path / "flights.db")).conn
+    london = queries.add_destination(conn, "London", "UK", "LHR", "Europe/London")
+    paris = queries.add_destination(conn, "Paris", "France", "CDG", "Europe/Paris")
+    queries.add_flight(conn, "BA304", None, london, paris, "2025-07-01", "09:00",
+                       "2025-07-01", "11:15", "Scheduled", 344)
+    before = len(_log(conn))
+
+    conn.execute("UPDATE Destination SET TimeZone = 'UTC' WHERE DestinationID = ?", (london,))
+    fill_utc_times(conn, london)
+    conn.commit()
+
+    assert _log(conn)[before:] == [("Destination", london, "update")]
+
+
+def test_replica_mirrors_source(tmp_path):
+    conn = FlightService(str(tmp_path / "flights.db")).conn
+    london = queries.add_destination(conn, "London", "UK", "LHR", "Europe/London")
+    paris = queries.add_destination(conn, "Paris", "France", "CDG", "Europe/Paris")
+    flight_id = queries.add_flight(conn, "BA304", None, london, paris, "2025-07-01", "09:00",
+                                   "2025-07-01", "11:15", "Scheduled", 344)
+    replica_path = str(tmp_path / "replica.db")
+    sync_replica(conn, replica_path)
+
+    queries.update_destination_notes(conn, london, "Terminal 5")
+    queries.update_flight_status(conn, flight_id, "Delayed")
+    queries.update_flight_status(conn, flight_id, "Scheduled")
+    conn.execute("UPDATE Destination SET TimeZone = 'UTC' WHERE DestinationID = ?", (paris,))
+    fill_utc_times(conn, paris)
+    conn.commit()
+    assert sync_replica(conn, replica_path).changes == 4
+
+    replica = sqlite3.connect(replica_path)
+    assert _log(replica) == _log(conn)
+    assert replica.execute(CURRENT_SEQ_SQL).fetchone() == conn.execute(CURRENT_SEQ_SQL).fetchone()
+    assert replica.execute("SELECT DepartureUTC, ArrivalUTC FROM Flight WHERE FlightID = ?",
+                           (flight_id,)).fetchone() == (1751356800, 1751368500)
+
+    compact(conn, through=current_seq(conn))
+    sync_replica(conn, replica_path)
+    assert _log(replica) == _log(conn) == []
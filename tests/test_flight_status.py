@@ -0,0 +1,70 @@
+import pytest
+
+import queries
+from flight_status import NOT_FOUND, REJECTED, UNCHANGED, UPDATED, update_status, update_statuses
+from services import FlightService
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = FlightService(str(tmp_path / "flights.db")).conn
+    london = queries.add_destination(conn, "London", "UK", "LHR", "Europe/London")
+    paris = queries.add_destination(conn, "Paris", "France", "CDG", "Europe/Paris")
+    for number in ("BA1", "BA2"):
+        queries.add_flight(conn, number, None, london, paris, "2025-07-01", "09:00",
+                           "2025-07-01", "11:15", "Scheduled", 344)
+    return conn
+
+
+def _status(conn, flight_id):
+    return conn.execute("SELECT FlightStatus FROM Flight WHERE FlightID = ?", (flight_id,)).fetchone()[0]
+
+
+def _results(changes):
+    return [(change.old_status, change.new_status, change.result) for change in changes]
+
+
+@pytest.mark.parametrize("old, new, result", [
+    ("Scheduled", "Delayed", UPDATED),
+    ("Scheduled", "Departed", UPDATED),
+    ("Scheduled", "Cancelled", UPDATED),
+    ("Scheduled", "Completed", REJECTED),
+    ("Delayed", "Scheduled", UPDATED),
+    ("Departed", "Completed", UPDATED),
+    ("Departed", "Scheduled", REJECTED),
+    ("Completed", "Departed", REJECTED),
+    ("Cancelled", "Scheduled", REJECTED),
+    ("Delayed", "Delayed", UNCHANGED),
+])
+def test_transitions(conn, old, new, result):
+    conn.execute("UPDATE Flight SET FlightStatus = ? WHERE FlightID = 1", (old,))
+    conn.commit()
+
+    assert update_statuses(conn, [(1, new)])[0].result == result
+    assert _status(conn, 1) == (new if result == UPDATED else old)
+
+
+def test_one_batch_moves_a_flight_through_several_states(conn):
+    changes = update_statuses(conn, [(1, "departed"), ("BA1", "Completed"), (1, "Scheduled")])
+
+    assert _results(changes) == [("Scheduled", "Departed", UPDATED), ("Departed", "Completed", UPDATED),
+                                 ("Completed", "Scheduled", REJECTED)]
+    assert _status(conn, 1) == "Completed"
+
+
+def test_bad_rows_do_not_stop_the_rest(conn):
+    changes = update_statuses(conn, [(99, "Delayed"), ("XX1", "Delayed"), ("abc", "Delayed"),
+                                     (1, "Boarding"), (2, "Delayed")])
+
+    assert [change.result for change in changes] == [NOT_FOUND, NOT_FOUND, NOT_FOUND, REJECTED, UPDATED]
+    assert changes[3].reason == "unknown status 'Boarding'"
+    assert (_status(conn, 1), _status(conn, 2)) == ("Scheduled", "Delayed")
+
+
+def test_update_status_raises_for_rejected_changes(conn):
+    assert update_status(conn, 1, "Delayed") == 1
+    assert update_status(conn, 1, "Delayed") == 0
+    with pytest.raises(ValueError, match="cannot change Delayed to Completed"):
+        update_status(conn, 1, "Completed")
+    with pytest.raises(ValueError, match="no such flight"):
+        update_status(conn, "XX1", "Delayed")
@@ -0,0 +1,97 @@
+import sqlite3
+
+import pytest
+
+import instrumentation
+import queries
+from db_config import ConnectionProfile
+from instrumentation import Histogram, InstrumentedConnection, operation, shared_stats
+from services import FlightService
+
+
+@pytest.fixture
+def stats():
+    stats = shared_stats()
+    stats.reset()
+    yield stats
+    stats.reset()
+
+
+def _service(tmp_path, **settings):
+    return FlightService(profile=ConnectionProfile(str(tmp_path / "flights.db"), instrument=1, **settings))
+
+
+def test_histogram_percentiles_are_bucket_bounds_capped_at_the_maximum():
+    histogram = Histogram()
+    for ms in (0.05, 0.3, 0.3, 0.7, 4):
+        histogram.add(ms)
+
+    assert histogram.count == 5
+    assert histogram.percentile(40) == 0.5
+    assert histogram.percentile(80) == 1
+    assert histogram.percentile(100) == 4
+    histogram.add(9000)
+    assert histogram.percentile(100) == 9000
+    assert Histogram().percentile(50) == 0.0
+
+
+def test_connections_are_plain_unless_asked(tmp_path, stats):
+    conn = FlightService(profile=ConnectionProfile(str(tmp_path / "flights.db"))).conn
+
+    assert type(conn) is sqlite3.Connection
+    conn.execute("SELECT 1").fetchall()
+    assert stats.statements == {}
+
+
+def test_statements_rows_and_commits_go_to_the_operation(tmp_path, stats):
+    conn = _service(tmp_path).conn
+    assert isinstance(conn, InstrumentedConnection)
+    stats.reset()
+
+    with operation("load"):
+        london = queries.add_destination(conn, "London", "UK", "LHR", "Europe/London")
+        with operation("nested"):
+            queries.add_destination(conn, "Paris", "France", "CDG", "Europe/Paris")
+        queries.add_flight(conn, "BA1", None, london, 2, "2025-07-01", "09:00", "2025-07-01", "11:15",
+                           "Scheduled", 344)
+    with operation("list"):
+        rows = list(queries.all_flights(conn, batch_size=1))
+
+    assert set(stats.operations) == {"load", "list"}
+    load, listing = stats.operations["load"], stats.operations["list"]
+    assert (load.latency.count, load.commits) == (1, 3)
+    assert (listing.latency.count, listing.statements, listing.rows) == (1, 1, len(rows))
+    assert stats.statements[" ".join(queries.ALL_FLIGHTS_SQL.split())].rows == 1
+
+
+def test_statements_outside_an_operation_are_unattributed(tmp_path, stats):
+    conn = _service(tmp_path).conn
+    stats.reset()
+
+    conn.execute("SELECT COUNT(*) FROM Flight").fetchone()
+    conn.commit()
+
+    assert stats.operations[instrumentation.UNATTRIBUTED].latency.count == 2
+
+
+def test_slow_statements_are_logged_with_their_plan(tmp_path, stats):
+    conn = _service(tmp_path, slow_query_ms=0).conn
+    stats.reset()
+
+    with operation("lookup"):
+        queries.flight_by_number(conn, "BA1")
+
+    slow = [query for query in stats.slow_queries if query.operation == "lookup"]
+    assert len(slow) == 1
+    assert slow[0].params == ("BA1",)
+    assert any("USING INDEX" in detail for detail in slow[0].plan)
+
+
+def test_service_methods_are_operations(tmp_path, stats, monkeypatch):
+    service = _service(tmp_path)
+    stats.reset()
+    monkeypatch.setattr("builtins.input", lambda prompt="": "Delayed")
+
+    service.view_flights_by_status()
+
+    assert list(stats.operations) == ["view_flights_by_status"]
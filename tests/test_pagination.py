@@ -0,0 +1,70 @@
+import pytest
+
+import queries
+from services import FlightService
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = FlightService(str(tmp_path / "flights.db")).conn
+    london = queries.add_destination(conn, "London", "UK", "LHR", "Europe/London")
+    paris = queries.add_destination(conn, "Paris", "France", "CDG", "Europe/Paris")
+    # Inserted out of order; BA3, BA4 and BA5 share a departure, so FlightID breaks the tie.
+    for number, day, clock in [("BA6", "2025-07-03", "08:00"), ("BA1", "2025-07-01", "06:00"),
+                               ("BA2", "2025-07-01", "07:00"), ("BA3", "2025-07-02", "09:00"),
+                               ("BA4", "2025-07-02", "09:00"), ("BA5", "2025-07-02", "09:00"),
+                               ("BA7", "2025-07-03", "09:00")]:
+        queries.add_flight(conn, number, None, london, paris, day, clock, day, "23:00", "Scheduled", 344)
+    return conn
+
+
+def _numbers(page):
+    return [row.flight_number for row in page.rows]
+
+
+def _flags(page):
+    return page.has_previous, page.has_next
+
+
+@pytest.mark.parametrize("fetch", [queries.all_flights_page, queries.flight_details_page])
+def test_forward_and_back(conn, fetch):
+    first = fetch(conn, size=3)
+    second = fetch(conn, after=first.last_key, size=3)
+    third = fetch(conn, after=second.last_key, size=3)
+
+    assert [_numbers(page) for page in (first, second, third)] == [["BA1", "BA2", "BA3"], ["BA4", "BA5", "BA6"],
+                                                                   ["BA7"]]
+    assert [_flags(page) for page in (first, second, third)] == [(False, True), (True, True), (True, False)]
+    assert second.first_key == ("2025-07-02", "09:00", 5)
+
+    back = fetch(conn, before=third.first_key, size=3)
+    assert (_numbers(back), _flags(back), back.first_key, back.last_key) == \
+        (_numbers(second), (True, True), second.first_key, second.last_key)
+    back = fetch(conn, before=back.first_key, size=3)
+    assert (_numbers(back), _flags(back)) == (["BA1", "BA2", "BA3"], (False, True))
+
+
+def test_page_that_ends_on_the_last_flight(conn):
+    first = queries.all_flights_page(conn, size=7)
+
+    assert len(first.rows) == 7
+    assert _flags(first) == (False, False)
+
+    after_last = queries.all_flights_page(conn, after=first.last_key, size=7)
+    assert (after_last.rows, after_last.first_key, after_last.last_key, _flags(after_last)) == \
+        ([], None, None, (False, False))
+
+
+def test_short_first_page_when_going_back(conn):
+    # Going back from BA3 leaves only two flights before it.
+    page = queries.all_flights_page(conn, before=("2025-07-02", "09:00", 4), size=3)
+
+    assert _numbers(page) == ["BA1", "BA2"]
+    assert _flags(page) == (False, True)
+
+
+def test_pages_follow_the_data_between_requests(conn):
+    first = queries.all_flights_page(conn, size=3)
+    queries.delete_flight_by_number(conn, "BA4")
+
+    assert _numbers(queries.all_flights_page(conn, after=first.last_key, size=3)) == ["BA5", "BA6", "BA7"]
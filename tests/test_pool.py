@@ -0,0 +1,99 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+import queries
+from async_service import AsyncFlightService
+from pool import ConnectionPool
+from services import FlightService
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "flights.db")
+    conn = FlightService(path).conn
+    london = queries.add_destination(conn, "London", "UK", "LHR", "Europe/London")
+    paris = queries.add_destination(conn, "Paris", "France", "CDG", "Europe/Paris")
+    queries.add_pilot(conn, "Ivy", "Smith", "Captain", "LIC0000012", "2030-01-01", "Commercial",
+                      "A320", "2030-01-01")
+    for number in ("BA1", "BA2"):
+        queries.add_flight(conn, number, None, london, paris, "2025-07-01", "09:00",
+                           "2025-07-01", "11:15", "Scheduled", 344, "A320")
+    conn.close()
+    return path
+
+
+def test_each_thread_reads_through_its_own_read_only_connection(db_path):
+    with ConnectionPool(db_path) as pool:
+        readers = {}
+
+        def read(name):
+            readers[name] = pool.reader()
+            assert pool.reader() is readers[name]
+            assert len(pool.flights_by_status("Scheduled")) == 2
+
+        threads = [threading.Thread(target=read, args=(name,)) for name in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({id(conn) for conn in readers.values()}) == 3
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            pool.read(queries.remove_pilot, 1)
+
+
+def test_writes_are_checked_and_seen_by_readers(db_path):
+    with ConnectionPool(db_path) as pool:
+        assert pool.flight_by_number("BA1").status == "Scheduled"
+
+        assert pool.update_flight_status(1, "Delayed") == 1
+        with pytest.raises(ValueError, match="cannot change Delayed to Completed"):
+            pool.update_flight_status(1, "Completed")
+        assert pool.assign_pilot(1, 1) == 1
+        with pytest.raises(ValueError, match="overlaps flight 1"):
+            pool.assign_pilot(2, 1)
+
+        flight = pool.flight_by_number("BA1")
+        assert (flight.status, flight.pilot_id) == ("Delayed", 1)
+        with pytest.raises(AttributeError):
+            pool.drop_everything
+
+
+def test_identical_reads_in_flight_are_coalesced(db_path):
+    async def scenario():
+        async with AsyncFlightService(db_path) as service:
+            results = await asyncio.gather(*[service.flight_summary() for _ in range(5)],
+                                           service.flight_status("BA1"), service.flight_status("BA2"))
+            assert (service.executions, service.coalesced) == (3, 4)
+            assert all(result == results[0] for result in results[:5])
+            assert results[5:] == ["Scheduled", "Scheduled"]
+
+            # Once a read has finished, the next identical one runs again and sees new data.
+            await service.update_flight_status(1, "Delayed")
+            assert await service.flight_status("BA1") == "Delayed"
+            assert (service.executions, service.coalesced) == (4, 4)
+
+            # Writes are never coalesced.
+            assert await service.assign_pilot(1, 1) == 1
+            assert await asyncio.gather(service.remove_pilot(1), service.remove_pilot(1)) == [1, 1]
+            assert service.executions == 4
+
+    asyncio.run(scenario())
+
+
+def test_a_cancelled_caller_does_not_cancel_the_shared_read(db_path):
+    async def scenario():
+        async with AsyncFlightService(db_path) as service:
+            first = asyncio.ensure_future(service.flights_by_status("Scheduled"))
+            second = asyncio.ensure_future(service.flights_by_status("Scheduled"))
+            await asyncio.sleep(0)
+            first.cancel()
+
+            assert len(await second) == 2
+            assert first.cancelled()
+            assert (service.executions, service.coalesced) == (1, 1)
+
+    asyncio.run(scenario())
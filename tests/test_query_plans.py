@@ -0,0 +1,122 @@
+import re
+
+import pytest
+
+import aggregates
+import analytics
+import assignments
+import auto_roster
+import bulk_import
+import changelog
+import dimensions
+import export
+import flight_status
+import queries
+import routes
+import search
+import snapshots
+import timezones
+from services import FlightService
+
+# Flight and ChangeLog are the tables that grow without bound; the Pilot and
+# Destination dimensions are small enough that scanning them to drive a report is fine.
+FACT_TABLES = ("Flight", "ChangeLog")
+
+# Modules whose *_SQL constants (or dicts of them) are complete statements to check.
+QUERY_MODULES = (aggregates, analytics, assignments, auto_roster, bulk_import, changelog, dimensions,
+                 export, flight_status, queries, routes, search, snapshots, timezones)
+
+# Listings of every flight, for which walking one index from end to end is the
+# access path. Each is pinned to that index; any other scan of a fact table, even
+# one through an index, fails the check.
+FULL_LISTINGS = {
+    "export.EXPORT_FLIGHTS_SQL": "idx_flight_departure",
+    "queries.ALL_FLIGHTS_SQL": "idx_flight_departure",
+    "queries.FLIGHT_DETAILS_SQL": "idx_flight_departure",
+}
+
+# Statements that read a whole fact table by design: the full load of the analytics
+# cache, the recount of the stats tables, the schedule of every pilot, the recompute
+# of every UTC time and the collapse of superseded log entries.
+WHOLE_TABLE_READS = (
+    "aggregates.LIVE_STATS_SQL[DestinationStats]",
+    "aggregates.LIVE_STATS_SQL[PilotStats]",
+    "analytics.FLIGHT_COLUMNS_SQL",
+    "assignments.PILOT_FLIGHTS_SQL",
+    "changelog.COLLAPSE_SQL",
+    "timezones.ALL_FLIGHT_TIMES_SQL",
+)
+
+
+def collect_queries(modules=QUERY_MODULES):
+    """Returns every *_SQL statement defined in the given modules as (name, sql) pairs."""
+    found = []
+    for module in modules:
+        for name, value in vars(module).items():
+            if not name.endswith("_SQL"):
+                continue
+            if isinstance(value, str):
+                found.append((f"{module.__name__}.{name}", value))
+            elif isinstance(value, dict):
+                found += [(f"{module.__name__}.{name}[{key}]", sql) for key, sql in value.items()]
+    return sorted(found)
+
+
+def explain(conn, sql):
+    """Returns the EXPLAIN QUERY PLAN detail lines for a statement. An IN ({})
+    template is checked with a single placeholder, and any other {} slot (an
+    optional filter) left empty.
+    """
+    sql = sql.replace("({})", "(?)").replace("{}", "")
+    params = (None,) * sql.count("?")
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def _table_aliases(sql):
+    """Maps each alias used in the statement to the table it refers to."""
+    aliases = {}
+    pattern = r"\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|SET\b|LEFT\b|JOIN\b|GROUP\b|ORDER\b)(\w+))?"
+    for table, alias in re.findall(pattern, sql, re.IGNORECASE):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    return aliases
+
+
+def full_scans(sql, plan, tables=FACT_TABLES, allowed_index=None):
+    """Returns the plan lines that scan one of the given tables, with or without an
+    index, other than a walk of allowed_index. Keyed queries must SEARCH them.
+    """
+    aliases = _table_aliases(sql)
+    bad = []
+    for detail in plan:
+        match = re.match(r"SCAN (?:TABLE )?(\w+)(.*)", detail)
+        if not match or aliases.get(match.group(1), match.group(1)) not in tables:
+            continue
+        if allowed_index and re.fullmatch(rf" USING (?:COVERING )?INDEX {allowed_index}", match.group(2)):
+            continue
+        bad.append(detail)
+    return bad
+
+
+@pytest.fixture(scope="module")
+def conn():
+    conn = FlightService(":memory:").conn
+    yield conn
+    conn.close()
+
+
+def test_every_module_is_checked():
+    names = {name.split(".")[0] for name, _ in collect_queries()}
+    assert names == {module.__name__ for module in QUERY_MODULES}
+
+
+@pytest.mark.parametrize("name, sql", [pytest.param(name, sql, id=name) for name, sql in collect_queries()
+                                       if name not in WHOLE_TABLE_READS])
+def test_query_searches_fact_tables(conn, name, sql):
+    plan = explain(conn, sql)
+    assert full_scans(sql, plan, allowed_index=FULL_LISTINGS.get(name)) == [], "\n".join(plan)
+
+
+def test_exempted_queries_exist():
+    assert set(WHOLE_TABLE_READS) | FULL_LISTINGS.keys() <= dict(collect_queries()).keys()
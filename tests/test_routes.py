@@ -0,0 +1,47 @@
+from datetime import datetime
+
+import queries
+from routes import RouteNetwork
+from services import FlightService
+from timezones import fill_utc_times
+
+
+def test_earliest_arrival_looks_past_the_first_window(tmp_path):
+    conn = FlightService(str(tmp_path / "flights.db")).conn
+    london = queries.add_destination(conn, "London", "UK", "LHR", "UTC")
+    paris = queries.add_destination(conn, "Paris", "France", "CDG", "UTC")
+    # SLOW1 is found within the first 24-hour window, but FAST1, departing after
+    # it, arrives more than a day earlier.
+    queries.add_flight(conn, "SLOW1", None, london, paris, "2025-07-01", "23:00",
+                       "2025-07-03", "12:00", "Scheduled", 344)
+    queries.add_flight(conn, "FAST1", None, london, paris, "2025-07-02", "02:00",
+                       "2025-07-02", "04:00", "Scheduled", 344)
+
+    itinerary = RouteNetwork(conn).earliest_arrival("LHR", "CDG", datetime(2025, 7, 1))
+
+    assert [leg.flight_number for leg in itinerary.legs] == ["FAST1"]
+
+
+def test_only_airport_or_time_zone_changes_rebuild(tmp_path):
+    conn = FlightService(str(tmp_path / "flights.db")).conn
+    london = queries.add_destination(conn, "London", "UK", "LHR", "UTC")
+    paris = queries.add_destination(conn, "Paris", "France", "CDG", "UTC")
+    queries.add_flight(conn, "BA304", None, london, paris, "2025-07-01", "09:00",
+                       "2025-07-01", "11:15", "Scheduled", 344)
+    network = RouteNetwork(conn)
+    network.refresh()
+
+    queries.update_destination_notes(conn, paris, "Terminal 2")
+    network.refresh()
+    assert network.rebuilds == 1
+
+    queries.add_destination(conn, "Rome", "Italy", "FCO", "Europe/Rome")
+    network.refresh()
+    assert network.rebuilds == 2
+
+    conn.execute("UPDATE Destination SET TimeZone = 'Europe/Paris' WHERE DestinationID = ?", (paris,))
+    fill_utc_times(conn, paris)
+    conn.commit()
+    itinerary = network.earliest_arrival("LHR", "CDG", datetime(2025, 7, 1))
+    assert network.rebuilds == 3
+    assert itinerary.arrival_utc == 1751361300
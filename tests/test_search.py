@@ -0,0 +1,48 @@
+import pytest
+
+import queries
+from search import search
+from services import FlightService
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = FlightService(str(tmp_path / "flights.db")).conn
+    london = queries.add_destination(conn, "London", "UK", "LHR", "Europe/London")
+    paris = queries.add_destination(conn, "Paris", "France", "CDG", "Europe/Paris")
+    for first, last, license_number in [("Ivy", "Smith", "LIC0000012"), ("Olu", "Khan", "LIC0000023"),
+                                        ("Clara", "Montgomery", "LIC0000031")]:
+        queries.add_pilot(conn, first, last, "Captain", license_number, "2030-01-01", "Commercial",
+                          "A320", "2030-01-01")
+    queries.add_flight(conn, "LH1234", None, london, paris, "2025-07-01", "09:00",
+                       "2025-07-01", "11:15", "Scheduled", 344)
+    return conn
+
+
+def _found(conn, text, kind=None):
+    return [(result.label, result.score) for result in search(conn, text, [kind] if kind else None)]
+
+
+def test_short_texts_match_code_prefixes(conn):
+    assert _found(conn, "lh") == [("London UK LHR", 0), ("LH1234", 0)]
+    assert _found(conn, "x") == []
+
+
+def test_three_characters_allow_one_typo(conn):
+    assert _found(conn, "Khn") == [("Olu Khan LIC0000023", 2)]
+
+
+@pytest.mark.parametrize("text", ["Smoth", "Smtih", "Smih", "Smiith"])
+def test_four_to_eight_characters_allow_one_typo(conn, text):
+    assert _found(conn, text, "pilot") == [("Ivy Smith LIC0000012", 2)]
+
+
+def test_nine_or_more_characters_allow_two_typos(conn):
+    assert _found(conn, "Montgomry") == [("Clara Montgomery LIC0000031", 2)]
+    assert _found(conn, "Mongtomry") == [("Clara Montgomery LIC0000031", 3)]
+    assert _found(conn, "Mngtomry") == []
+
+
+def test_codes_only_match_whole(conn):
+    assert _found(conn, "LIC0000012") == [("Ivy Smith LIC0000012", 0)]
+    assert _found(conn, "LIC0000019") == [("Ivy Smith LIC0000012", 2)]
@@ -0,0 +1,89 @@
+import pytest
+
+import changelog
+import queries
+import snapshots
+from services import FlightService
+
+TABLES = ("Destination", "Pilot", "Flight", "DestinationStats", "PilotStats")
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = FlightService(str(tmp_path / "flights.db")).conn
+    london = queries.add_destination(conn, "London", "UK", "LHR", "Europe/London")
+    paris = queries.add_destination(conn, "Paris", "France", "CDG", "Europe/Paris")
+    queries.add_pilot(conn, "Ivy", "Smith", "Captain", "LIC0000012", "2030-01-01", "Commercial",
+                      "A320", "2030-01-01")
+    queries.add_flight(conn, "BA1", 1, london, paris, "2025-07-01", "09:00", "2025-07-01", "11:15", "Scheduled", 344)
+    return conn
+
+
+def _contents(conn):
+    return {table: conn.execute(f"SELECT * FROM {table}").fetchall() for table in TABLES}
+
+
+def test_restore_brings_back_the_snapshot(conn, tmp_path):
+    path = str(tmp_path / "snapshot.db")
+    saved = _contents(conn)
+    report = snapshots.snapshot(conn, path, step_pages=1)
+    assert report.steps >= report.pages > 1
+
+    queries.add_destination(conn, "Rome", "Italy", "FCO", "Europe/Rome")
+    queries.delete_flight_by_number(conn, "BA1")
+    queries.update_destination_notes(conn, 1, "Terminal 5")
+    snapshots.restore(conn, path)
+
+    assert _contents(conn) == saved
+    queries.add_destination(conn, "Rome", "Italy", "FCO", "Europe/Rome")
+    assert snapshots.restore(conn, path).path == path
+    assert _contents(conn) == saved
+
+
+def test_restore_makes_change_log_readers_reload(conn, tmp_path):
+    path = str(tmp_path / "snapshot.db")
+    snapshots.snapshot(conn, path)
+    queries.update_destination_notes(conn, 1, "Terminal 5")
+    position = changelog.current_seq(conn)
+
+    snapshots.restore(conn, path)
+
+    with pytest.raises(changelog.ChangeLogGap):
+        changelog.changes_since(conn, position)
+    assert changelog.current_seq(conn) > position
+
+
+def test_reset_empties_every_table_and_restarts_ids(conn):
+    position = changelog.current_seq(conn)
+
+    queries.reset(conn)
+
+    assert _contents(conn) == {table: [] for table in TABLES}
+    assert queries.add_destination(conn, "Rome", "Italy", "FCO", "Europe/Rome") == 1
+    assert changelog.current_seq(conn) > position
+
+
+def test_snapshot_of_an_empty_database_restores_over_a_full_one(conn, tmp_path):
+    path = str(tmp_path / "empty.db")
+    empty = FlightService(str(tmp_path / "other.db")).conn
+    snapshots.snapshot(empty, path)
+
+    snapshots.restore(conn, path)
+
+    assert _contents(conn) == {table: [] for table in TABLES}
+
+
+def test_bad_snapshots_and_open_transactions_are_refused(conn, tmp_path):
+    not_sqlite = tmp_path / "notes.txt"
+    not_sqlite.write_text("not a database" * 100)
+
+    with pytest.raises(ValueError, match="No snapshot"):
+        snapshots.restore(conn, str(tmp_path / "missing.db"))
+    with pytest.raises(ValueError, match="not a SQLite database"):
+        snapshots.restore(conn, str(not_sqlite))
+
+    conn.execute("UPDATE Destination SET Notes = 'x'")
+    with pytest.raises(ValueError, match="inside a transaction"):
+        snapshots.snapshot(conn, str(tmp_path / "snapshot.db"))
+    conn.rollback()
+    assert not (tmp_path / "snapshot.db").exists()
@@ -0,0 +1,158 @@
+from datetime import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Flight times are stored as local wall-clock text (departure in the origin's zone,
+# arrival in the destination's) plus DepartureUTC / ArrivalUTC epoch seconds derived
+# from them and Destination.TimeZone, an IANA zone name. The app's write paths
+# compute the epochs in Python; there are no triggers for them, since a trigger
+# would need utc_epoch() registered on every connection, including ones from the
+# sqlite3 shell or other tools. Rows written elsewhere are filled by fill_utc_times.
+
+# Abbreviations the system used before IANA names, mapped to a representative zone.
+ZONE_ALIASES = {
+    "GMT": "Europe/London",
+    "BST": "Europe/London",
+    "UTC": "UTC",
+    "EST": "America/New_York",
+    "EDT": "America/New_York",
+    "CST": "America/Chicago",
+    "CDT": "America/Chicago",
+    "MST": "America/Denver",
+    "PST": "America/Los_Angeles",
+    "PDT": "America/Los_Angeles",
+    "CET": "Europe/Paris",
+    "CEST": "Europe/Paris",
+    "EET": "Europe/Athens",
+    "GST": "Asia/Dubai",
+    "IST": "Asia/Kolkata",
+    "SGT": "Asia/Singapore",
+    "JST": "Asia/Tokyo",
+    "AEST": "Australia/Sydney",
+    "SAST": "Africa/Johannesburg",
+}
+
+# Where one abbreviation covers several countries, the country picks the zone.
+COUNTRY_ZONES = {
+    ("CET", "Germany"): "Europe/Berlin",
+    ("CET", "Spain"): "Europe/Madrid",
+    ("CET", "Italy"): "Europe/Rome",
+    ("CET", "Norway"): "Europe/Oslo",
+    ("EST", "Canada"): "America/Toronto",
+    ("CST", "Mexico"): "America/Mexico_City",
+    ("PST", "Canada"): "America/Vancouver",
+}
+
+
+def normalize_zone(zone, country=None):
+    """Returns the IANA name for a zone name or legacy abbreviation, None for a blank
+    zone, and raises ValueError for anything else.
+    """
+    if zone is None or not str(zone).strip():
+        return None
+    zone = str(zone).strip()
+    alias = zone.upper()
+    if (alias, country) in COUNTRY_ZONES:
+        return COUNTRY_ZONES[alias, country]
+    if alias in ZONE_ALIASES:
+        return ZONE_ALIASES[alias]
+    try:
+        ZoneInfo(zone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone '{zone}'; use an IANA name such as Europe/London")
+    return zone
+
+
+@lru_cache(maxsize=None)
+def _zone(name):
+    return ZoneInfo(ZONE_ALIASES.get(name.upper(), name))
+
+
+@lru_cache(maxsize=65536)
+def utc_epoch(day, clock, zone):
+    """Converts a local 'YYYY-MM-DD' date and 'HH:MM' time in an IANA zone to UTC
+    epoch seconds; legacy abbreviations are read through ZONE_ALIASES. Returns None
+    when the zone is missing or unknown. Local times that are skipped or repeated
+    by a DST change resolve to the earlier offset.
+    """
+    if not day or not clock or not zone:
+        return None
+    try:
+        local = datetime.fromisoformat(f"{day}T{clock}").replace(tzinfo=_zone(zone))
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+    return int(local.timestamp())
+
+
+def to_epoch(value):
+    """Accepts epoch seconds or a datetime (naive datetimes are taken as UTC)."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=_zone("UTC"))
+        return int(value.timestamp())
+    return int(value)
+
+
+def register(conn):
+    """Makes utc_epoch() available to SQL on this connection (the schema does not need it)."""
+    conn.create_function("utc_epoch", 3, utc_epoch, deterministic=True)
+
+
+def flight_utc_times(zones, origin_id, destination_id, departure_date, departure_time, arrival_date, arrival_time):
+    """Returns (DepartureUTC, ArrivalUTC) of a flight; zones maps DestinationID to TimeZone."""
+    return (utc_epoch(departure_date, departure_time, zones.get(origin_id)),
+            utc_epoch(arrival_date, arrival_time, zones.get(destination_id)))
+
+
+ZONES_SQL = "SELECT DestinationID, TimeZone FROM Destination"
+
+_FLIGHT_TIMES = """
+    SELECT FlightID, OriginID, DestinationID, DepartureDate, DepartureTime, ArrivalDate, ArrivalTime
+    FROM Flight
+"""
+
+ALL_FLIGHT_TIMES_SQL = _FLIGHT_TIMES
+
+AIRPORT_FLIGHT_TIMES_SQL = _FLIGHT_TIMES + " WHERE OriginID = ? OR DestinationID = ?"
+
+MISSING_FLIGHT_TIMES_SQL = _FLIGHT_TIMES + " WHERE DepartureUTC IS NULL OR ArrivalUTC IS NULL"
+
+UPDATE_UTC_TIMES_SQL = "UPDATE Flight SET DepartureUTC = ?, ArrivalUTC = ? WHERE FlightID = ?"
+
+DESTINATION_ZONES_SQL = "SELECT DestinationID, TimeZone, Country FROM Destination"
+
+UPDATE_ZONE_SQL = "UPDATE Destination SET TimeZone = ? WHERE DestinationID = ?"
+
+
+def fill_utc_times(cursor, destination_id=None, missing_only=True):
+    """Computes DepartureUTC and ArrivalUTC of the flights that lack one (or, with
+    missing_only=False, of every flight), or of the flights to and from one
+    destination after its TimeZone changed. Returns the number of flights updated.
+    """
+    zones = dict(cursor.execute(ZONES_SQL).fetchall())
+    if destination_id is not None:
+        rows = cursor.execute(AIRPORT_FLIGHT_TIMES_SQL, (destination_id, destination_id)).fetchall()
+    elif missing_only:
+        rows = cursor.execute(MISSING_FLIGHT_TIMES_SQL).fetchall()
+    else:
+        rows = cursor.execute(ALL_FLIGHT_TIMES_SQL).fetchall()
+    cursor.executemany(UPDATE_UTC_TIMES_SQL, [(*flight_utc_times(zones, *row[1:]), row[0]) for row in rows])
+    return len(rows)
+
+
+def create_utc_times(cursor):
+    """Moves Destination.TimeZone to IANA names, adds the indexed UTC epoch columns
+    to Flight and fills them.
+    """
+    for destination_id, zone, country in cursor.execute(DESTINATION_ZONES_SQL).fetchall():
+        try:
+            normalized = normalize_zone(zone, country)
+        except ValueError:
+            normalized = zone  # left for an operator to fix; its flights get NULL times
+        if normalized != zone:
+            cursor.execute(UPDATE_ZONE_SQL, (normalized, destination_id))
+    cursor.execute("ALTER TABLE Flight ADD COLUMN DepartureUTC INTEGER")
+    cursor.execute("ALTER TABLE Flight ADD COLUMN ArrivalUTC INTEGER")
+    fill_utc_times(cursor)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_flight_departure_utc ON Flight (DepartureUTC)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_flight_arrival_utc ON Flight (ArrivalUTC)")